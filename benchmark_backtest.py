@@ -0,0 +1,46 @@
+# Benchmark: replay the fixture draw history (fixtures/lottomax-results-archive(*).html)
+# through the backtester, then score a million v9 tickets against every draw, per draw
+# with AND/popcount versus bit-sliced across all draws at once (match_histogram).
+
+#   python benchmark_backtest.py
+
+import time
+import numpy as np
+from fixture_server import fixture_draws
+from lotto_max_backtest import Backtest, draw_masks, format_result, histogram, match_histogram, score, to_masks
+from lotto_max_batch import generate_batch
+from lotto_max_history import CombinationStats
+from lotto_max_stats import StatisticsProvider
+
+TICKETS_PER_DRAW = 10
+TICKETS = 1_000_000
+PER_DRAW_SAMPLE = 50  # draws scored one at a time, extrapolated to the full history
+
+def main():
+    draws = fixture_draws()
+    start = time.perf_counter()
+    results = Backtest(draws, TICKETS_PER_DRAW).run(damping_factors=(0.2, 0.8))
+    print(f"Replayed {len(draws)} draws, {TICKETS_PER_DRAW} tickets per draw, "
+          f"{len(results)} runs in {time.perf_counter() - start:.1f} s")
+    for result in results:
+        print(f"  {format_result(result)}")
+
+    stats = StatisticsProvider(tables=CombinationStats(draws).tables())
+    tickets = to_masks(generate_batch(TICKETS, 0.8, seed=2024, stats=stats))
+    winning_masks, bonuses = draw_masks(draws)
+
+    start = time.perf_counter()
+    per_draw = np.zeros((8, 2), dtype=np.int64)
+    for i in range(PER_DRAW_SAMPLE):
+        per_draw += histogram(*score(tickets, winning_masks[i], bonuses[i]))
+    per_draw_time = (time.perf_counter() - start) * len(draws) / PER_DRAW_SAMPLE
+    print(f"Per-draw popcount: {per_draw_time:6.1f} s for {TICKETS:,} tickets x {len(draws)} draws (extrapolated)")
+
+    start = time.perf_counter()
+    total = match_histogram(tickets, winning_masks, bonuses)
+    print(f"Bit-sliced:        {time.perf_counter() - start:6.1f} s")
+    assert (match_histogram(tickets, winning_masks[:PER_DRAW_SAMPLE], bonuses[:PER_DRAW_SAMPLE]) == per_draw).all()
+    print(f"Tickets matching 3 to 7 numbers: {[int(n) for n in total[3:].sum(axis=1)]}")
+
+if __name__ == "__main__":
+    main()
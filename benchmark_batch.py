@@ -0,0 +1,66 @@
+# Benchmark: v9 tickets/sec from the per-ticket loop (generate_lotto_max_set once per
+# ticket, its output discarded) versus the vectorized generate_batch(), on the fixture
+# tables, and a check that both give each number with the same frequency. Each side runs once
+# to warm up and then reports its best of a few runs, as a resident service would see it.
+
+#   python benchmark_batch.py [tickets]
+
+import contextlib
+import os
+import random
+import sys
+import time
+import numpy as np
+import generator_v9_good
+from fixture_server import fixture_tables
+from lotto_max_batch import generate_batch
+from lotto_max_stats import StatisticsProvider
+
+REPEATS = 3
+
+def best_time(run):
+    """Runs run() once to warm up, then REPEATS times; returns (fastest time, last result)."""
+    result = run()
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def loop_tickets_for(count, lucky_numbers, frequency_table):
+    random.seed(2024)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return np.array([
+            generator_v9_good.generate_lotto_max_set(frequency_table, 0.8, lucky_numbers)
+            for _ in range(count)
+        ])
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    loop_tickets = max(tickets // 50, 1000)
+    stats = StatisticsProvider(tables=fixture_tables())
+    generator_v9_good.stats = stats
+    frequency_table = stats.frequency_table
+
+    for lucky_numbers in (None, [7, 21]):
+        elapsed, loop = best_time(lambda: loop_tickets_for(loop_tickets, lucky_numbers, frequency_table))
+        loop_rate = loop_tickets / elapsed
+        elapsed, batch = best_time(lambda: generate_batch(tickets, 0.8, lucky_numbers, seed=2024, stats=stats))
+        batch_rate = tickets / elapsed
+
+        # Share of tickets containing each number, in loop standard errors (lucky numbers,
+        # on every ticket, are left out)
+        loop_share = np.bincount(loop.ravel(), minlength=51)[1:] / loop_tickets
+        batch_share = np.bincount(batch.ravel(), minlength=51)[1:] / tickets
+        varies = (loop_share > 0) & (loop_share < 1)
+        z = np.abs(loop_share - batch_share)[varies] / np.sqrt(loop_share * (1 - loop_share) / loop_tickets)[varies]
+
+        print(f"lucky numbers {lucky_numbers}:")
+        print(f"  per-ticket loop: {loop_rate:12.0f} tickets/sec ({loop_tickets} tickets)")
+        print(f"  generate_batch:  {batch_rate:12.0f} tickets/sec ({tickets} tickets, "
+              f"{batch_rate / loop_rate:.0f}x)")
+        print(f"  largest per-number difference: {z.max():.2f} standard errors")
+
+if __name__ == "__main__":
+    main()
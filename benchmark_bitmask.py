@@ -0,0 +1,75 @@
+# Micro-benchmark: v9 ticket generation with Python sets (the previous implementation,
+# reproduced below) versus the bitmask path now in generator_v9_good.py. The bitmask path
+# picks combinations through CombinationIndex, which draws from a different random stream,
+# so the tickets are checked for validity rather than compared one for one.
+
+#   python benchmark_bitmask.py [tickets]
+
+import contextlib
+import os
+import random
+import sys
+import time
+import generator_v9_good
+from fixture_server import fixture_tables
+from generator_v9_good import generate_weighted_random_number
+from lotto_max_stats import StatisticsProvider
+
+def set_select_weighted_set(set_list, numbers_set, max_size, weight, selected_count):
+    available_sets = [s for s in set_list if all(num not in numbers_set for num in s.numbers)]
+    if available_sets and len(numbers_set) < max_size and selected_count < weight:
+        weighted_choice = random.choices(available_sets, weights=[s.frequency for s in available_sets], k=1)[0].numbers
+        if len(numbers_set) + len(weighted_choice) <= max_size:
+            numbers_set.update(weighted_choice)
+            selected_count += 1
+    return selected_count
+
+def set_generate_lotto_max_set(stats, frequency_table, damping_factor=0.8):
+    numbers_set = set()
+    selected_counts = {"pairs": 0, "triplets": 0, "quads": 0}
+    weighted_sets = [
+        (stats.most_common_pairs, 5, "pairs"),
+        (stats.most_common_consecutive_pairs, 4, "pairs"),
+        (stats.most_common_triplets, 3, "triplets"),
+        (stats.most_common_consecutive_triplets, 2, "triplets"),
+        (stats.most_common_four_numbers, 1, "quads"),
+    ]
+    while len(numbers_set) < 7:
+        if len(numbers_set) < 5:
+            number = generate_weighted_random_number(frequency_table, damping_factor)
+            if number not in numbers_set:
+                numbers_set.add(number)
+        for set_list, weight, kind in weighted_sets:
+            if len(numbers_set) < 7:
+                selected_counts[kind] = set_select_weighted_set(set_list, numbers_set, 7, weight, selected_counts[kind])
+            else:
+                break
+    while len(numbers_set) < 7:
+        number = generate_weighted_random_number(frequency_table, damping_factor)
+        if number not in numbers_set:
+            numbers_set.add(number)
+    return sorted(numbers_set)
+
+def run(generate, tickets, seed=2024):
+    random.seed(seed)
+    start = time.perf_counter()
+    results = [generate() for _ in range(tickets)]
+    return results, tickets / (time.perf_counter() - start)
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    stats = StatisticsProvider(tables=fixture_tables())
+    generator_v9_good.stats = stats
+    frequency_table = stats.frequency_table
+
+    set_tickets, set_rate = run(lambda: set_generate_lotto_max_set(stats, frequency_table), tickets)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        mask_tickets, mask_rate = run(lambda: generator_v9_good.generate_lotto_max_set(frequency_table), tickets)
+    assert all(len(set(t)) == 7 and all(1 <= n <= 50 for n in t) for t in mask_tickets), "invalid ticket"
+
+    print(f"{tickets} tickets")
+    print(f"sets:     {set_rate:10.0f} tickets/sec")
+    print(f"bitmasks: {mask_rate:10.0f} tickets/sec ({mask_rate / set_rate:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# Benchmark: cold, warm and revalidated starts of the scraper with the on-disk ResponseCache.
+# Each "start" is a fresh LottoMaxScraper (as in a new generator process) loading all six
+# tables from the local fixture server; the server's request counter shows the round trips.
+
+#   python benchmark_cache.py
+
+import tempfile
+import time
+from fixture_server import FixtureServer
+from lotto_max_cache import ResponseCache
+from lotto_max_scraper import LottoMaxScraper
+
+def start(server, cache_dir, ttl):
+    cache = ResponseCache(cache_dir, ttl=ttl)
+    scraper = LottoMaxScraper(base_url=server.base_url, cache=cache)
+    requests_before = server.request_count
+    begin = time.perf_counter()
+    scraper.fetch_all()
+    elapsed = time.perf_counter() - begin
+    return elapsed, server.request_count - requests_before, cache.stats()
+
+def main():
+    with tempfile.TemporaryDirectory() as cache_dir, FixtureServer(latency=0.05, handshake_latency=0.1) as server:
+        for label, ttl in [("cold start", 3600), ("warm start", 3600), ("expired, revalidated", 0)]:
+            elapsed, round_trips, stats = start(server, cache_dir, ttl)
+            print(f"{label:<22} {elapsed * 1000:8.1f} ms  round trips: {round_trips}  {stats}")
+
+if __name__ == "__main__":
+    main()
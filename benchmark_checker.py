@@ -0,0 +1,63 @@
+# Benchmark: scoring stored tickets against a draw. A Python loop over set intersections
+# (on a sample) versus check() on the same tickets as 7-byte binary rows and as a packed
+# rank file, each memory-mapped from disk, against the main draw alone and together with
+# MAXMILLIONS draws; with the peak of memory allocated while checking. The one-off build
+# of the packed decoding tables is timed on its own.
+
+#   python benchmark_checker.py [tickets]
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from lotto_max_batch import generate_batch
+from lotto_max_checker import check, open_store, parse_draw
+from lotto_max_cli import FORMATS
+from lotto_max_packed import write_packed
+from lotto_max_rank import rank_tickets, unrank_masks
+
+LOOP_TICKETS = 200_000
+MAIN_DRAW = parse_draw("3,11,23,28,34,41,47+49")
+MAXMILLIONS = [parse_draw("2,9,16,22,31,40,45"), parse_draw("5,8,13,21,30,38,44"), parse_draw("1,12,19,26,33,42,50")]
+
+def python_loop(tickets, draw):
+    winning, prizes = set(draw.numbers), 0
+    for ticket in tickets:
+        if len(winning.intersection(ticket)) >= 3:
+            prizes += 1
+    return prizes
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 10_000_000
+    tickets = generate_batch(n, seed=2024)
+    sample = tickets[:LOOP_TICKETS].tolist()
+    start = time.perf_counter()
+    python_loop(sample, MAIN_DRAW)
+    print(f"{'Python loop, sets':<32}{LOOP_TICKETS / (time.perf_counter() - start) / 1e6:>10.2f} M tickets/s")
+    with tempfile.TemporaryDirectory() as directory:
+        rows_path = os.path.join(directory, "tickets.bin")
+        with open(rows_path, "wb") as f:
+            f.write(FORMATS["binary"].encode(tickets))
+        packed_path = os.path.join(directory, "tickets.lmxp")
+        write_packed(packed_path, rank_tickets(tickets))
+        del tickets
+        start = time.perf_counter()
+        unrank_masks([0])  # builds the decoding tables once per process
+        print(f"Packed decoding tables built in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+        print(f"{n} tickets{'':<22}{'M tickets/s':>11}{'peak MB':>10}")
+        for name, path in (("binary rows", rows_path), ("packed", packed_path)):
+            for draws in ([MAIN_DRAW], [MAIN_DRAW, *MAXMILLIONS]):
+                store = open_store(path)
+                tracemalloc.start()
+                start = time.perf_counter()
+                results = check(store, draws)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                label = f"{name}, {len(draws)} draw{'s' if len(draws) > 1 else ''}"
+                print(f"{label:<32}{n / elapsed / 1e6:>10.1f}{peak / 1e6:>10.1f}   ({len(results[0].winners)} winners)")
+                del store, results
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,62 @@
+# Benchmark: wall time of one command-line run for a few tickets, with the statistics
+# loaded by the run itself (lotto_max_cli.py) versus asked of the resident daemon
+# (lotto_max_client.py), against a bare interpreter start; and the round trip of one
+# request over the socket from an already running client.
+# The runs use a temporary home directory holding a snapshot of the fixture tables, so
+# nothing is scraped and the real cache is left alone.
+
+#   python benchmark_daemon.py
+
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from fixture_server import fixture_tables
+import lotto_max_client
+from lotto_max_snapshot import write_snapshot
+
+RUNS = 10
+ROUND_TRIPS = 1000
+
+def wall_times(command, env, runs=RUNS):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+def report(label, times):
+    times = sorted(times)
+    print(f"{label:<44}{statistics.median(times) * 1000:>10.1f}{times[int(len(times) * 0.99)] * 1000:>10.1f}")
+
+def main():
+    with tempfile.TemporaryDirectory() as home:
+        cache_dir = os.path.join(home, ".cache", "lotto_max")
+        write_snapshot(os.path.join(cache_dir, "statistics.snapshot"), fixture_tables())
+        socket_path = os.path.join(cache_dir, "daemon.sock")
+        env = dict(os.environ, HOME=home)
+        here = os.path.dirname(os.path.abspath(__file__))
+        client = [sys.executable, os.path.join(here, "lotto_max_client.py"), "--socket", socket_path, "-n", "5"]
+        try:
+            start = time.perf_counter()
+            subprocess.run(client, env=env, check=True, stdout=subprocess.DEVNULL)
+            print(f"First client run, starting the daemon: {(time.perf_counter() - start) * 1000:.0f} ms\n")
+            print(f"{'5 tickets':<44}{'p50 ms':>10}{'p99 ms':>10}")
+            report("python -c pass", wall_times([sys.executable, "-c", "pass"], env))
+            report("python lotto_max_cli.py -n 5", wall_times([sys.executable, os.path.join(here, "lotto_max_cli.py"), "-n", "5"], env))
+            report("python lotto_max_client.py -n 5 (daemon)", wall_times(client, env))
+            times = []
+            for _ in range(ROUND_TRIPS):
+                start = time.perf_counter()
+                lotto_max_client.request({"count": 5}, io.BytesIO(), socket_path, start=False)
+                times.append(time.perf_counter() - start)
+            report("request() round trip, in process", times)
+        finally:
+            lotto_max_client.request({"command": "stop"}, io.BytesIO(), socket_path, start=False)
+
+if __name__ == "__main__":
+    main()
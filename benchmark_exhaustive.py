@@ -0,0 +1,52 @@
+# Benchmark: scoring the whole ticket space (lotto_max_exhaustive.py). Tickets/sec of
+# score_tickets() on unranked tickets, one mask test per table combination, versus the
+# run-by-run scorer; a full pass over all C(50, 7) tickets with each worker count, checking
+# they all keep the same best tickets; and a rerun that finds every task in its checkpoint.
+
+#   python benchmark_exhaustive.py [workers ...]
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from lotto_max_exhaustive import ExhaustiveSearch, RunScorer, run_tasks, score_model, score_tickets, top_of_runs
+from lotto_max_rank import TICKET_COUNT, unrank_ranks
+from lotto_max_stats import get_statistics
+
+SAMPLE_TICKETS = 1_000_000
+
+def main(argv):
+    worker_counts = [int(workers) for workers in argv[1:]] or [1, 2, 4]
+    model = score_model(get_statistics())
+    print(f"{len(model.combinations)} table combinations")
+    start = time.perf_counter()
+    score_tickets(model, unrank_ranks(np.arange(SAMPLE_TICKETS)))
+    print(f"{'score_tickets, unranked':<28}{SAMPLE_TICKETS / (time.perf_counter() - start) / 1e6:>8.2f} M tickets/s")
+    scorer = RunScorer(model)
+    tasks = run_tasks()
+    sample = tasks[::8]
+    start = time.perf_counter()
+    for first_run, stop_run, _, _ in sample:
+        top_of_runs(scorer, first_run, stop_run, 1000)
+    tickets = sum(stop - first for _, _, first, stop in sample)
+    print(f"{'run scorer, 1 process':<28}{tickets / (time.perf_counter() - start) / 1e6:>8.2f} M tickets/s\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        reference = None
+        for workers in worker_counts:
+            path = os.path.join(directory, f"exhaustive-{workers}.jsonl")
+            start = time.perf_counter()
+            top = ExhaustiveSearch(path, model).run(workers)
+            elapsed = time.perf_counter() - start
+            same = reference is None or np.array_equal(top.ranks, reference.ranks)
+            reference = reference or top
+            label = f"full pass, {workers} worker{'s' if workers > 1 else ''}"
+            print(f"{label:<28}{elapsed:>8.1f} s  {TICKET_COUNT / elapsed / 1e6:.1f} M tickets/s"
+                  f"  ({'same' if same else 'DIFFERENT'} best {len(top.ranks)})")
+        start = time.perf_counter()
+        ExhaustiveSearch(path, model).run()
+        print(f"{'resumed, nothing left':<28}{time.perf_counter() - start:>8.2f} s")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,45 @@
+# Benchmark: serial get_* calls (what generators v4-v9 do at import) versus fetch_all().
+# Runs against the local fixture server with simulated handshake and round-trip delays,
+# so the numbers reflect the shape of the real site without touching the network.
+
+#   python benchmark_fetch_all.py [latency_seconds] [handshake_seconds]
+
+import sys
+import time
+import requests
+from fixture_server import FixtureServer
+from lotto_max_scraper import LottoMaxScraper
+
+def fetch_serial_unpooled(scraper):
+    """The original behaviour: one bare requests.get per table, one after another."""
+    scraper.session = requests  # module-level get(): a new connection for every request
+    return [scraper.get_table(name) for name in scraper.endpoints]
+
+def fetch_serial(scraper):
+    return [scraper.get_table(name) for name in scraper.endpoints]
+
+def fetch_concurrent(scraper):
+    return scraper.fetch_all()
+
+def time_run(label, fetch, server, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        scraper = LottoMaxScraper(base_url=server.base_url)
+        start = time.perf_counter()
+        fetch(scraper)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best * 1000:8.1f} ms")
+    return best
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    handshake = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    print(f"Fixture server: {latency * 1000:.0f} ms per request, {handshake * 1000:.0f} ms per new connection\n")
+    with FixtureServer(latency=latency, handshake_latency=handshake) as server:
+        baseline = time_run("serial, no session", fetch_serial_unpooled, server)
+        time_run("serial, pooled session", fetch_serial, server)
+        concurrent = time_run("fetch_all()", fetch_concurrent, server)
+    print(f"\nSpeedup of fetch_all() over the original: {baseline / concurrent:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Micro-benchmark: filling a partial ticket with distinct weighted numbers, one draw at a
+# time discarding repeats (the generators' previous fill loops) versus AliasSampler.sample,
+# both fully renormalising (max_tries=0, no wasted draws) and with its default bound on
+# wasted draws, for several damping factors and numbers of lucky numbers already on the
+# ticket. Reports the mean and worst wasted draws of the loop and the time per fill.
+
+#   python benchmark_fill.py [fills]
+
+import random
+import sys
+import time
+from fixture_server import fixture_tables
+from lotto_max_bitmask import to_mask
+from lotto_max_sampler import sampler_for
+
+def loop_fill(sampler, numbers_set):
+    """Returns the draws the previous fill loop needed to complete the ticket."""
+    draws = 0
+    while len(numbers_set) < 7:
+        number = sampler.draw()
+        draws += 1
+        if number not in numbers_set:
+            numbers_set.add(number)
+    return draws
+
+def main():
+    fills = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    frequency_table = fixture_tables().number_frequency_table
+    rng = random.Random(2024)
+    print(f"{'damping':>7} {'lucky':>5}  {'wasted mean':>11} {'worst':>5}  "
+          f"{'loop us':>8} {'renormalise us':>14} {'sample us':>9}")
+    for damping_factor in (None, 0.8, 0.2):
+        sampler = sampler_for(frequency_table, damping_factor)
+        for lucky in (0, 3, 6):
+            partials = [set(rng.sample(range(1, 51), lucky)) for _ in range(fills)]
+
+            start = time.perf_counter()
+            draws = [loop_fill(sampler, set(numbers_set)) for numbers_set in partials]
+            loop_time = time.perf_counter() - start
+
+            times = []
+            for max_tries in (0, 4):
+                filled = [set(numbers_set) for numbers_set in partials]
+                start = time.perf_counter()
+                for numbers_set in filled:
+                    numbers_set.update(sampler.sample(7 - len(numbers_set), to_mask(numbers_set), max_tries=max_tries))
+                times.append(time.perf_counter() - start)
+                assert all(len(numbers_set) == 7 for numbers_set in filled)
+
+            wasted = (sum(draws) - fills * (7 - lucky)) / fills
+            worst = max(draws) - (7 - lucky)
+            label = "none" if damping_factor is None else f"{damping_factor:.1f}"
+            print(f"{label:>7} {lucky:>5}  {wasted:11.3f} {worst:5}  {loop_time / fills * 1e6:8.2f} "
+                  f"{times[0] / fills * 1e6:14.2f} {times[1] / fills * 1e6:9.2f}")
+
+if __name__ == "__main__":
+    main()
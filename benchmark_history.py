@@ -0,0 +1,39 @@
+# Benchmark: ingest the full draw history from the local fixture server, then compare
+# rebuilding the combination statistics from scratch with adding one draw incrementally.
+
+#   python benchmark_history.py
+
+import datetime
+import os
+import tempfile
+import time
+from fixture_server import FixtureServer
+from lotto_max_history import CombinationStats, DrawHistory
+from lotto_max_scraper import LottoMaxScraper
+
+def main():
+    with tempfile.TemporaryDirectory() as directory, FixtureServer() as server:
+        history = DrawHistory(os.path.join(directory, "draws.csv"))
+        start = time.perf_counter()
+        history.update(LottoMaxScraper(base_url=server.base_url), today=datetime.date(2026, 10, 17))
+        print(f"Ingested {len(history)} draws in {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"({server.request_count} pages)")
+
+        *earlier, latest = history.draws
+        start = time.perf_counter()
+        stats = CombinationStats(earlier)
+        full = time.perf_counter() - start
+        print(f"Full build over {len(earlier)} draws:  {full * 1000:8.2f} ms")
+
+        start = time.perf_counter()
+        stats.add_draw(latest)
+        incremental = time.perf_counter() - start
+        print(f"Incremental add of one draw:    {incremental * 1000:8.3f} ms")
+
+        start = time.perf_counter()
+        tables = stats.tables()
+        print(f"Building the six tables:        {(time.perf_counter() - start) * 1000:8.2f} ms")
+        assert tables == CombinationStats(history).tables(), "incremental counts differ from a rebuild"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Benchmark: time to import each generator module in a fresh interpreter.
+# Statistics are loaded lazily on first use, so importing must not touch the network or
+# the snapshot; the script also reports whether any table was loaded during the import.
+
+#   python benchmark_import.py
+
+import subprocess
+import sys
+
+MODULES = ["generator_v3_good", "generator_v5", "generator_v6", "generator_v7", "generator_v8", "generator_v9_good", "generator_v4"]
+
+PROBE = """
+import time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from lotto_max_stats import get_statistics
+loaded = [name for name in get_statistics().loaded]
+print(f"{{elapsed * 1000:.1f}} {{len(loaded)}}")
+"""
+
+def main():
+    print(f"{'module':<22}{'import ms':>10}{'tables loaded':>15}")
+    for module in MODULES:
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            capture_output=True, text=True, check=True, stdin=subprocess.DEVNULL,
+        ).stdout.split()
+        print(f"{module:<22}{float(output[0]):>10.1f}{int(output[1]):>15}")
+
+if __name__ == "__main__":
+    main()
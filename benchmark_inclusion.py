@@ -0,0 +1,38 @@
+# Benchmark: v9 inclusion probabilities from the fixture tables, computed exactly where the
+# state space fits the budget and sampled otherwise (lotto_max_inclusion.py), against
+# counting 100,000 generated tickets. Errors are measured against the exact result, or
+# against a sample with a four times smaller tolerance when there is none.
+
+#   python benchmark_inclusion.py
+
+import time
+import numpy as np
+from fixture_server import FixtureServer
+from lotto_max_batch import generate_batch
+from lotto_max_inclusion import inclusion_probabilities, marginals, sampled_inclusion
+from lotto_max_scraper import LottoMaxScraper
+from lotto_max_stats import StatisticsProvider
+
+LUCKY_NUMBERS = [[3, 9, 17, 28], [3, 9, 17], [5, 30], []]
+TICKETS = 100_000
+
+def main():
+    with FixtureServer() as server:
+        stats = StatisticsProvider(tables=LottoMaxScraper(base_url=server.base_url).fetch_all())
+    print(f"{'lucky numbers':<16}{'method':<10}{'seconds':>9}{'number error':>14}{'pair error':>12}   counting {TICKETS:,} tickets")
+    for lucky_numbers in LUCKY_NUMBERS:
+        start = time.perf_counter()
+        result = inclusion_probabilities(stats, 0.8, lucky_numbers, seed=1)
+        elapsed = time.perf_counter() - start
+        reference = result if result.exact else sampled_inclusion(stats, 0.8, lucky_numbers, tolerance=result.tolerance / 4, seed=2)
+        start = time.perf_counter()
+        tickets = generate_batch(TICKETS, 0.8, lucky_numbers, seed=3, stats=stats)
+        numbers, pairs = marginals(tickets, np.full(TICKETS, 1.0 / TICKETS))
+        counted = time.perf_counter() - start
+        method = "exact" if result.exact else "sampled"
+        print(f"{str(lucky_numbers):<16}{method:<10}{elapsed:>9.2f}"
+              f"{np.abs(result.numbers - reference.numbers).max():>14.5f}{np.abs(result.pairs - reference.pairs).max():>12.5f}"
+              f"   {counted:5.2f} s, errors {np.abs(numbers - reference.numbers).max():.5f} / {np.abs(pairs - reference.pairs).max():.5f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Micro-benchmark: choosing a combination that shares no number with a partial ticket, by
+# scanning the whole table (the previous select_weighted_set) versus CombinationIndex, and
+# versus CombinationIndex.choose_exact, the path taken once rejection draws keep clashing.
+# Runs on the fixture tables (100 entries each) and on tables built from the full fixture
+# draw history, where every pair, triplet and quad that was ever drawn is an entry.
+
+#   python benchmark_index.py [lookups]
+
+import random
+import sys
+import time
+from fixture_server import fixture_draws, fixture_tables
+from lotto_max_bitmask import CombinationIndex, combination_masks, to_mask
+from lotto_max_history import CombinationStats
+
+def scan_choose(set_masks, numbers_mask):
+    available = [i for i, mask in enumerate(set_masks.masks) if not mask & numbers_mask]
+    if not available:
+        return None
+    return random.choices(available, weights=[set_masks.frequencies[i] for i in available], k=1)[0]
+
+def partial_tickets(count, seed=2024):
+    rng = random.Random(seed)
+    return [to_mask(rng.sample(range(1, 51), rng.randint(1, 5))) for _ in range(count)]
+
+def time_lookups(choose, tickets):
+    start = time.perf_counter()
+    for numbers_mask in tickets:
+        choose(numbers_mask)
+    return len(tickets) / (time.perf_counter() - start)
+
+def compare(label, table, tickets):
+    set_masks = combination_masks(table)
+    start = time.perf_counter()
+    index = CombinationIndex(set_masks)
+    build = time.perf_counter() - start
+    scan_rate = time_lookups(lambda numbers_mask: scan_choose(set_masks, numbers_mask), tickets)
+    index_rate = time_lookups(index.choose, tickets)
+    start = time.perf_counter()
+    index.choose_exact(0)  # builds the subset index
+    subsets = time.perf_counter() - start
+    exact_rate = time_lookups(index.choose_exact, tickets)
+    print(f"{label:<42} {len(table):>6} entries  build {build * 1000:7.2f} ms  "
+          f"scan {scan_rate:9.0f}/s  index {index_rate:9.0f}/s ({index_rate / scan_rate:.1f}x)  "
+          f"exact {exact_rate:9.0f}/s ({exact_rate / scan_rate:.1f}x, subsets {subsets * 1000:.0f} ms)")
+
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tickets = partial_tickets(lookups)
+    fixture = fixture_tables()
+    history = CombinationStats(fixture_draws()).tables(limit=None, consecutive_limit=None)
+    for source, tables in (("fixture", fixture), ("full history", history)):
+        for name in ("most_common_pairs", "most_common_triplets", "most_common_four_numbers"):
+            compare(f"{source} {name}", getattr(tables, name), tickets)
+
+if __name__ == "__main__":
+    main()
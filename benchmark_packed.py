@@ -0,0 +1,64 @@
+# Benchmark: ten million v9 tickets as CSV, as 7-byte binary rows and as a packed rank file
+# (lotto_max_packed.py): file size and time to write; scalar versus vectorized ranking
+# and unranking (lotto_max_rank.py); and opening the packed file and looking tickets up
+# by binary search in place.
+
+#   python benchmark_packed.py [tickets]
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from lotto_max_batch import generate_batch
+from lotto_max_cli import FORMATS
+from lotto_max_rank import rank, rank_tickets, unrank, unrank_ranks
+from lotto_max_packed import open_packed, write_packed
+
+SCALAR_TICKETS = 100_000
+LOOKUPS = 10_000
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 10_000_000
+    tickets = generate_batch(n, seed=2024)
+    print(f"{n} tickets")
+
+    sample = tickets[:SCALAR_TICKETS].tolist()
+    ranks, seconds = timed(lambda: [rank(ticket) for ticket in sample])
+    print(f"rank, scalar        {SCALAR_TICKETS / seconds:>14,.0f} tickets/s")
+    _, seconds = timed(lambda: [unrank(ticket_rank) for ticket_rank in ranks])
+    print(f"unrank, scalar      {SCALAR_TICKETS / seconds:>14,.0f} tickets/s")
+    ranks, seconds = timed(rank_tickets, tickets)
+    print(f"rank, vectorized    {n / seconds:>14,.0f} tickets/s")
+    _, seconds = timed(unrank_ranks, ranks)
+    print(f"unrank, vectorized  {n / seconds:>14,.0f} tickets/s\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'format':<10}{'MB':>10}{'write s':>10}")
+        for name in ("csv", "binary"):
+            path = os.path.join(directory, name)
+
+            def write():
+                with open(path, "wb") as f:
+                    f.write(FORMATS[name].encode(tickets))
+
+            _, seconds = timed(write)
+            print(f"{name:<10}{os.path.getsize(path) / 1e6:>10.1f}{seconds:>10.2f}")
+        path = os.path.join(directory, "tickets.lmxp")
+        _, seconds = timed(write_packed, path, ranks)
+        print(f"{'packed':<10}{os.path.getsize(path) / 1e6:>10.1f}{seconds:>10.2f}   (from ranks)\n")
+
+        packed, seconds = timed(open_packed, path)
+        with packed:
+            print(f"open packed file     {seconds * 1000:.2f} ms")
+            queries = np.random.default_rng(1).integers(0, n, LOOKUPS)
+            found, seconds = timed(lambda: sum(packed.count(tickets[i]) > 0 for i in queries))
+            print(f"lookup               {seconds / LOOKUPS * 1e6:.1f} us per ticket ({found}/{LOOKUPS} found)")
+
+if __name__ == "__main__":
+    main(sys.argv)
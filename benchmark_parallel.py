@@ -0,0 +1,32 @@
+# Benchmark: v9 batch generation in one process versus generate_parallel() with several
+# worker counts, checking that every run gives exactly the same tickets for the seed.
+
+#   python benchmark_parallel.py [tickets]
+
+import os
+import sys
+import time
+import numpy as np
+from fixture_server import fixture_tables
+from lotto_max_batch import generate_batch, generate_parallel
+from lotto_max_stats import StatisticsProvider
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 4_000_000
+    stats = StatisticsProvider(tables=fixture_tables())
+
+    start = time.perf_counter()
+    expected = generate_batch(tickets, seed=2024, stats=stats)
+    single = time.perf_counter() - start
+    print(f"{os.cpu_count()} CPUs, {tickets} tickets")
+    print(f"generate_batch:          {tickets / single:12.0f} tickets/sec")
+
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        result = generate_parallel(tickets, seed=2024, stats=stats, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert np.array_equal(result, expected), f"{workers} workers gave different tickets"
+        print(f"generate_parallel({workers}):    {tickets / elapsed:12.0f} tickets/sec ({single / elapsed:.1f}x), identical")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Benchmark: BeautifulSoup parsers versus the targeted lotto_max_parser backend.
+# Parses the saved pages in fixtures/ with both backends, checks they agree, and reports
+# pages/sec and the peak memory allocated while parsing one page (tracemalloc).
+
+#   python benchmark_parser.py [seconds_per_case]
+
+import os
+import sys
+import time
+import tracemalloc
+from fixture_server import FIXTURES_DIR
+from lotto_max_scraper import LottoMaxScraper
+
+PAGES = [
+    ("lottomax-statistics(1)", "parse_frequency_numbers"),
+    ("lottomax-statistics(5)", "parse_most_common_pairs"),
+    ("lottomax-statistics(6)", "parse_most_common_pairs"),
+    ("lottomax-statistics(7)", "parse_most_common_triplets"),
+    ("lottomax-statistics(8)", "parse_most_common_triplets"),
+    ("lottomax-statistics(9)", "parse_most_common_four_numbers"),
+]
+
+def pages_per_second(scraper, html, parse_name, seconds):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        scraper.parse_page(html, parse_name)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def peak_memory(scraper, html, parse_name):
+    tracemalloc.start()
+    scraper.parse_page(html, parse_name)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    backends = {name: LottoMaxScraper(parser=name) for name in ("soup", "fast")}
+    print(f"{'page':<26}{'backend':<8}{'pages/sec':>12}{'peak KiB':>12}")
+    for endpoint, parse_name in PAGES:
+        with open(os.path.join(FIXTURES_DIR, endpoint + ".html"), encoding="utf-8") as f:
+            html = f.read()
+        results = [scraper.parse_page(html, parse_name) for scraper in backends.values()]
+        assert results[0] == results[1], f"backends disagree on {endpoint}"
+        rates = {}
+        for name, scraper in backends.items():
+            rates[name] = pages_per_second(scraper, html, parse_name, seconds)
+            peak = peak_memory(scraper, html, parse_name)
+            print(f"{endpoint:<26}{name:<8}{rates[name]:>12.0f}{peak / 1024:>12.0f}")
+        print(f"{'':<26}{'speedup':<8}{rates['fast'] / rates['soup']:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
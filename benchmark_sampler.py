@@ -0,0 +1,55 @@
+# Micro-benchmark: weighted number draws with the previous generate_weighted_random_number
+# (reproduced below), which re-derived the weights on every call, versus the cached alias
+# sampler, for single and batched draws, and the cost of a sweep over damping factors.
+
+#   python benchmark_sampler.py [draws]
+
+import random
+import sys
+import time
+from fixture_server import fixture_tables
+from lotto_max_sampler import AliasSampler, clear_samplers, damped_weights, sampler_for
+
+def choices_draw(frequency_table, damping_factor=0.8):
+    numbers = list(frequency_table.keys())
+    frequencies = list(frequency_table.values())
+    total_weight = sum(frequencies)
+    probabilities = [freq / total_weight for freq in frequencies]
+    adjusted_probabilities = [(1 - damping_factor) + damping_factor * p for p in probabilities]
+    return random.choices(numbers, weights=adjusted_probabilities, k=1)[0]
+
+def rate(function, count):
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+def main():
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    frequency_table = fixture_tables().number_frequency_table
+    random.seed(2024)
+
+    choices_rate = rate(lambda: [choices_draw(frequency_table) for _ in range(draws)], draws)
+    single_rate = rate(lambda: [sampler_for(frequency_table, 0.8).draw() for _ in range(draws)], draws)
+    batch_rate = rate(lambda: sampler_for(frequency_table, 0.8).draws(draws), draws)
+    print(f"random.choices per call: {choices_rate:12.0f} draws/sec")
+    print(f"alias, single draws:     {single_rate:12.0f} draws/sec ({single_rate / choices_rate:.1f}x)")
+    print(f"alias, batched draws:    {batch_rate:12.0f} draws/sec ({batch_rate / choices_rate:.1f}x)")
+
+    # A damping sweep builds each sampler once; repeated passes are served from the cache
+    dampings = [i / 20 for i in range(21)]
+    clear_samplers()
+    start = time.perf_counter()
+    for _ in range(10):
+        for damping_factor in dampings:
+            sampler_for(frequency_table, damping_factor).draws(100)
+    sweep = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(10):
+        for damping_factor in dampings:
+            AliasSampler(*damped_weights(frequency_table, damping_factor)).draws(100)
+    rebuilt = time.perf_counter() - start
+    print(f"10 sweeps over {len(dampings)} damping factors: cached {sweep * 1000:.2f} ms, "
+          f"rebuilt every time {rebuilt * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
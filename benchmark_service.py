@@ -0,0 +1,99 @@
+# Load test for the ticket service (lotto_max_service.py). Starts a local instance on the
+# fixture tables in a separate process (or targets a running one), then sends requests
+# over keep-alive connections from concurrent asyncio clients and reports the p50/p99
+# latency and requests/sec for a few batch sizes.
+
+#   python benchmark_service.py
+#   python benchmark_service.py http://127.0.0.1:8080
+
+import asyncio
+import multiprocessing
+import socket
+import sys
+import time
+from urllib.parse import urlsplit
+from fixture_server import fixture_tables
+from lotto_max_service import serve
+from lotto_max_stats import StatisticsProvider
+
+# (query, requests, concurrent connections)
+SCENARIOS = [
+    ("n=1", 2000, 1),
+    ("n=1", 4000, 16),
+    ("n=10&lucky=7,14&damping=0.5", 4000, 16),
+    ("n=1000", 1000, 16),
+    ("n=10000", 200, 16),
+    ("n=200000&format=binary", 20, 4),
+]
+
+def fixture_provider():
+    return StatisticsProvider(tables=fixture_tables())
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def run_fixture_service(port):
+    # serve() shuts the pool and its shared memory down when terminate() sends SIGTERM
+    asyncio.run(serve(port, stats_factory=fixture_provider, refresh=False))
+
+def wait_until_listening(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+async def client(host, port, query, count, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    request = f"GET /tickets?{query} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+    for _ in range(count):
+        start = time.perf_counter()
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        status = head.split(b" ", 2)[1]
+        length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        assert status == b"200", head
+    writer.close()
+
+async def load(host, port, query, requests, concurrency):
+    latencies = []
+    start = time.perf_counter()
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    await asyncio.gather(*(client(host, port, query, count, latencies) for count in per_client if count))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{query:<32}{concurrency:>12}{requests:>10}{p50:>10.2f}{p99:>10.2f}{requests / elapsed:>10.0f}")
+
+def main(argv):
+    process = None
+    if len(argv) > 1:
+        url = urlsplit(argv[1])
+        host, port = url.hostname, url.port
+    else:
+        host, port = "127.0.0.1", free_port()
+        # Not a daemon: the service starts its own worker processes
+        process = multiprocessing.Process(target=run_fixture_service, args=(port,))
+        process.start()
+        wait_until_listening(host, port)
+    try:
+        print(f"Load test against http://{host}:{port}")
+        print(f"{'query':<32}{'connections':>12}{'requests':>10}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+        for query, requests, concurrency in SCENARIOS:
+            asyncio.run(load(host, port, query, requests, concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+
+if __name__ == "__main__":
+    main(sys.argv)
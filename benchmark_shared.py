@@ -0,0 +1,59 @@
+# Benchmark: worker start-up with the statistics tables sent as a pickle versus read from
+# shared memory (lotto_max_shared.py). Uses full-history tables, where every pair, triplet
+# and quad ever drawn is an entry, and reports per worker the time and resident memory to
+# get the tables, then to build the batch generator's arrays from them.
+
+#   python benchmark_shared.py
+
+import multiprocessing
+import pickle
+import time
+from fixture_server import fixture_draws
+from lotto_max_batch import BatchGenerator
+from lotto_max_history import CombinationStats
+from lotto_max_shared import SharedStatistics, attach_statistics
+from lotto_max_stats import StatisticsProvider
+
+def resident_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+def worker(mode, payload, results):
+    before = resident_kb()
+    start = time.perf_counter()
+    if mode == "pickle":
+        stats = StatisticsProvider(tables=pickle.loads(payload))
+    else:
+        stats = attach_statistics(payload)
+    loaded = time.perf_counter()
+    load_kb = resident_kb()
+    BatchGenerator(stats)
+    results.put((loaded - start, load_kb - before, time.perf_counter() - loaded, resident_kb() - load_kb))
+
+def run(mode, payload, workers):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, payload, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return [sum(m[i] for m in measurements) / workers for i in range(4)]
+
+def main():
+    tables = CombinationStats(fixture_draws()).tables(limit=None, consecutive_limit=None)
+    payload = pickle.dumps(tables)
+    with SharedStatistics(tables) as shared:
+        print(f"Tables: {len(payload) / 1024:.0f} KiB pickled, {shared.size / 1024:.0f} KiB in shared memory")
+        print("per worker:           tables              generator arrays")
+        for workers in (1, 2, 4, 8):
+            for mode, argument in (("pickle", payload), ("shared", shared.name)):
+                load, load_kb, build, build_kb = run(mode, argument, workers)
+                print(f"{workers} workers, {mode}:  {load * 1000:7.1f} ms +{load_kb / 1024:5.1f} MiB  "
+                      f"{build * 1000:7.1f} ms +{build_kb / 1024:5.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Benchmark: one sweep block over the fixture draw history, with every grid point replaying
+# the history and building its own tables and arrays versus all points sharing one replay
+# (run_block), then a full sweep written to a JSONL file and resumed from it.
+
+#   python benchmark_sweep.py
+
+import os
+import tempfile
+import time
+from fixture_server import fixture_draws
+from lotto_max_batch import DEFAULT_WEIGHTS
+from lotto_max_sweep import Sweep, grid, run_block
+
+TICKETS_PER_DRAW = 20
+DAMPING_FACTORS = [0.2, 0.5, 0.8, 1.0]
+WEIGHT_SCHEDULES = [DEFAULT_WEIGHTS, (1, 1, 1, 1, 1), (0, 0, 0, 0, 0)]
+
+def main():
+    draws = fixture_draws()
+    points = grid(DAMPING_FACTORS, WEIGHT_SCHEDULES)
+    start, stop = len(draws) - 64, len(draws)
+
+    begin = time.perf_counter()
+    separate = {}
+    for point in points:
+        separate.update(run_block(draws, start, stop, [point], TICKETS_PER_DRAW, 2024))
+    separate_time = time.perf_counter() - begin
+    begin = time.perf_counter()
+    shared = run_block(draws, start, stop, points, TICKETS_PER_DRAW, 2024)
+    shared_time = time.perf_counter() - begin
+    assert all((separate[point] == shared[point]).all() for point in points), "shared stages changed the results"
+    print(f"{len(points)} points x 64 draws, one replay per point: {separate_time:6.2f} s")
+    print(f"{len(points)} points x 64 draws, one shared replay:    {shared_time:6.2f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sweep.jsonl")
+        begin = time.perf_counter()
+        results = Sweep(path, draws, TICKETS_PER_DRAW).run(points)
+        print(f"Full sweep, {len(points)} points x {len(draws)} draws: {time.perf_counter() - begin:6.2f} s")
+        begin = time.perf_counter()
+        resumed = Sweep(path, draws, TICKETS_PER_DRAW).run(points)
+        print(f"Rerun resumed from the file:           {time.perf_counter() - begin:6.2f} s")
+        assert all((a.histogram == b.histogram).all() for a, b in zip(results, resumed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Benchmark: suppressing duplicates in a large run. A Python set of ticket tuples versus
+# TicketSet (lotto_max_unique.py) on the same v9 tickets, fed a chunk at a time: tickets per
+# second, and memory held once the run is done (measured on a second run). Then how often
+# each strategy repeats itself, on a short run of each.
+
+#   python benchmark_unique.py [tickets]
+
+import sys
+import time
+import tracemalloc
+from lotto_max_batch import CHUNK_SIZE, generate_batch
+from lotto_max_cli import GENERATORS, ticket_chunks
+from lotto_max_rank import rank_tickets
+from lotto_max_unique import TicketSet
+
+SET_TICKETS = 2_000_000  # the Python set is measured on a prefix; it needs about 1 GB for 10 million
+STRATEGY_TICKETS = 20_000
+
+def python_set(tickets):
+    seen, rejected = set(), 0
+    for start in range(0, len(tickets), CHUNK_SIZE):
+        for ticket in map(tuple, tickets[start:start + CHUNK_SIZE].tolist()):
+            if ticket in seen:
+                rejected += 1
+            else:
+                seen.add(ticket)
+    return seen, rejected
+
+def ticket_set(tickets):
+    seen = TicketSet()
+    for start in range(0, len(tickets), CHUNK_SIZE):
+        seen.add(rank_tickets(tickets[start:start + CHUNK_SIZE]))
+    return seen, seen.rejected
+
+def measure(function, tickets):
+    start = time.perf_counter()
+    seen, rejected = function(tickets)
+    elapsed = time.perf_counter() - start
+    del seen
+    tracemalloc.start()  # a second run for memory, as tracing slows the Python set down several times
+    seen = function(tickets)[0]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, held, rejected
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 10_000_000
+    tickets = generate_batch(n, seed=2024)
+    print(f"{'':<24}{'tickets':>12}{'M tickets/s':>13}{'MB held':>10}{'rejected':>10}")
+    for name, function, count in (("Python set of tuples", python_set, min(n, SET_TICKETS)),
+                                  ("TicketSet bitmap", ticket_set, n)):
+        elapsed, held, rejected = measure(function, tickets[:count])
+        print(f"{name:<24}{count:>12}{count / elapsed / 1e6:>13.2f}{held / 1e6:>10.1f}{rejected:>10}")
+    del tickets
+
+    print(f"\nDuplicates in {STRATEGY_TICKETS} tickets per strategy")
+    for strategy in sorted(GENERATORS):
+        seen = TicketSet()
+        for chunk in ticket_chunks(STRATEGY_TICKETS, strategy, seed=1):
+            seen.add(rank_tickets(chunk))
+        print(f"  {strategy}  {seen.rejected:>7} ({seen.rejected / STRATEGY_TICKETS:.1%})")
+
+if __name__ == "__main__":
+    main(sys.argv)
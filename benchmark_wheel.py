@@ -0,0 +1,29 @@
+# Benchmark: pair and triplet coverage of coverage-optimised portfolios (lotto_max_wheel.py)
+# against uniformly random tickets and v9 tickets (generate_batch) of the same size, counted
+# and weighted by the statistics tables, with the time to build each portfolio.
+
+#   python benchmark_wheel.py [tickets ...]
+
+import sys
+import time
+import numpy as np
+from lotto_max_batch import generate_batch
+from lotto_max_stats import get_statistics
+from lotto_max_wheel import build_wheel, coverage, coverage_weights, format_coverage, random_tickets
+
+def main(argv):
+    sizes = [int(size) for size in argv[1:]] or [100, 500, 1000]
+    stats = get_statistics()
+    for label, weights in (("counted", None), ("weighted", coverage_weights(stats))):
+        print(f"{'':<16}{'tickets':>8}{'pairs':>10}{'triplets':>11}   ({label} coverage)")
+        for n in sizes:
+            start = time.perf_counter()
+            wheel = build_wheel(n, weights, seed=1)
+            elapsed = time.perf_counter() - start
+            print(format_coverage("wheel", coverage(wheel, weights)) + f"   built in {elapsed:.2f} s")
+            print(format_coverage("random tickets", coverage(random_tickets(n, np.random.default_rng(1)), weights)))
+            print(format_coverage("v9 tickets", coverage(generate_batch(n, seed=1, stats=stats), weights)))
+        print()
+
+if __name__ == "__main__":
+    main(sys.argv)
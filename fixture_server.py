@@ -0,0 +1,122 @@
+# Local stand-in for the lotteryextreme.com statistics pages.
+# Serves the saved HTML pages in fixtures/ over HTTP/1.1 keep-alive on 127.0.0.1, so the
+# scraper (and the benchmarks) can run offline. Optional delays simulate the cost of a
+# new TCP+TLS connection and the server round trip of the real site. ETag and
+# Last-Modified validators are honoured with 304 responses.
+
+#   with FixtureServer(latency=0.05) as server:
+#       scraper = LottoMaxScraper(base_url=server.base_url)
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email.utils import formatdate
+from urllib.parse import unquote
+import os
+import threading
+import time
+import lotto_max_parser
+from lotto_max_parser import LottoMaxTables
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def fixture_tables(directory=FIXTURES_DIR):
+    """Parses the saved statistics pages straight from disk into a LottoMaxTables."""
+    from lotto_max_scraper import LottoMaxScraper
+    endpoints = LottoMaxScraper().endpoints
+
+    def read(name):
+        with open(os.path.join(directory, endpoints[name] + ".html"), encoding="utf-8") as f:
+            return f.read()
+
+    return LottoMaxTables(
+        lotto_max_parser.parse_frequency_numbers(read("number_frequency_table")),
+        *(lotto_max_parser.parse_combinations(read(name)) for name in LottoMaxTables._fields[1:]),
+    )
+
+def fixture_draws(directory=FIXTURES_DIR):
+    """Parses the saved results archive pages straight from disk into Draws, oldest first."""
+    draws = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("lottomax-results-archive("):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                draws += lotto_max_parser.parse_draw_history(f.read())
+    draws.sort(key=lambda draw: draw.date)
+    return draws
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+
+    def setup(self):
+        # Runs once per accepted connection: stands in for the TCP+TLS handshake
+        time.sleep(self.server.handshake_latency)
+        super().setup()
+
+    def do_GET(self):
+        self.server.request_count += 1
+        time.sleep(self.server.latency)
+        name = unquote(self.path.lstrip("/").split("?")[0])
+        path = os.path.join(self.server.directory, name + ".html")
+        if os.path.basename(path) != name + ".html" or not os.path.isfile(path):
+            self.send_error(404)
+            return
+        mtime = os.stat(path).st_mtime
+        etag = f'"{int(mtime * 1000):x}"'
+        last_modified = formatdate(mtime, usegmt=True)
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == last_modified:
+            self.server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer:
+    """Serves fixture pages from a background thread; use as a context manager."""
+
+    def __init__(self, directory=FIXTURES_DIR, latency=0.0, handshake_latency=0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.directory = directory
+        self.httpd.latency = latency
+        self.httpd.handshake_latency = handshake_latency
+        self.httpd.request_count = 0
+        self.httpd.not_modified_count = 0
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    @property
+    def not_modified_count(self):
+        return self.httpd.not_modified_count
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
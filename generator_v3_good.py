@@ -12,29 +12,26 @@
 # The output will be a single set of 7 Lotto Max numbers.
 # frequency_table is scrapped from the lotto max website 
 
-import random
-from lotto_max_scraper import LottoMaxScraper
+from lotto_max_bitmask import to_mask
+from lotto_max_sampler import sampler_for
+from lotto_max_stats import get_statistics
 
-scraper = LottoMaxScraper()
-frequency_table = scraper.get_number_frequency_table()
+stats = get_statistics()  # shared provider; each table is loaded on first use
 
 def generate_weighted_random_number(frequency_table):
     """Generates a number based on its frequency in the table."""
-    numbers = list(frequency_table.keys())
-    frequencies = list(frequency_table.values())
-    return random.choices(numbers, weights=frequencies, k=1)[0]
+    # The sampler for this table is built once and cached (lotto_max_sampler.py)
+    return sampler_for(frequency_table).draw()
 
 def generate_lotto_max_set(frequency_table, user_numbers=None):
     """Generates a set of 7 unique Lotto Max numbers (1-50), considering frequency."""
     if user_numbers:
-        numbers_set = user_numbers
+        numbers_set = set(user_numbers)
     else:
         numbers_set = set()
 
-    while len(numbers_set) < 7:
-        number = generate_weighted_random_number(frequency_table)
-        if number not in numbers_set:
-            numbers_set.add(number)
+    # Draw the missing numbers in one pass, without repeats (lotto_max_sampler.py)
+    numbers_set.update(sampler_for(frequency_table).sample(7 - len(numbers_set), to_mask(numbers_set)))
 
     return sorted(numbers_set)
 
@@ -60,13 +57,14 @@ def generate_ticket():
     use_user_numbers = input("Do you want to choose your Lotto Max numbers? (yes/no): ").lower()
     if use_user_numbers == "yes":
         user_numbers = get_user_numbers()
-        ticket = generate_lotto_max_set(frequency_table, user_numbers)
+        ticket = generate_lotto_max_set(stats.frequency_table, user_numbers)
     else:
-        ticket = generate_lotto_max_set(frequency_table)
+        ticket = generate_lotto_max_set(stats.frequency_table)
 
     # Display the ticket
     print("\nYour Lotto Max Numbers:")
     print(ticket)
 
 # Run the ticket generator
-generate_ticket()
+if __name__ == "__main__":
+    generate_ticket()
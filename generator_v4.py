@@ -8,23 +8,17 @@
 # Common Sets Selection: The script checks if there's enough space (less than 4 numbers chosen) to include a pair, triplet, or quad from your common sets. It prioritizes quads, then triplets, then pairs.
 # Random Filling: After adding numbers from the common sets, the script fills the remaining slots with numbers generated using the weighted frequency method.
 
-from lotto_max_scraper import LottoMaxScraper
-import random
+from lotto_max_bitmask import to_mask
+from lotto_max_sampler import sampler_for
+from lotto_max_stats import get_statistics
 
-scraper = LottoMaxScraper()
-frequency_table = scraper.get_number_frequency_table()
-most_common_pairs = scraper.get_most_common_pairs()
-most_common_consecutive_pairs = scraper.get_most_common_consecutive_pairs()
-most_common_triplets = scraper.get_most_common_triplets()
-most_common_consecutive_triplets = scraper.get_most_common_consecutive_triplets()
-most_common_four_numbers = scraper.get_most_common_four_numbers()
+stats = get_statistics()  # shared provider; each table is loaded on first use
 
 
 def generate_weighted_random_number(frequency_table):
     """Generates a number based on its frequency in the table."""
-    numbers = list(frequency_table.keys())
-    frequencies = list(frequency_table.values())
-    return random.choices(numbers, weights=frequencies, k=1)[0]
+    # The sampler for this table is built once and cached (lotto_max_sampler.py)
+    return sampler_for(frequency_table).draw()
 
 def select_from_common_sets(set_list, numbers_set, max_size):
     """Selects numbers from common pairs, triplets, or quads if space allows."""
@@ -40,24 +34,22 @@ def generate_lotto_max_set(frequency_table, user_numbers=None):
     numbers_set = set(user_numbers) if user_numbers else set()
 
     if len(numbers_set) < 4:
-        select_from_common_sets(most_common_four_numbers, numbers_set, 4)
+        select_from_common_sets(stats.numbers("most_common_four_numbers"), numbers_set, 4)
     
     if len(numbers_set) < 4:
-        select_from_common_sets(most_common_triplets, numbers_set, 4)
+        select_from_common_sets(stats.numbers("most_common_triplets"), numbers_set, 4)
     
     if len(numbers_set) < 4:
-        select_from_common_sets(most_common_consecutive_triplets, numbers_set, 4)
+        select_from_common_sets(stats.numbers("most_common_consecutive_triplets"), numbers_set, 4)
     
     if len(numbers_set) < 4:
-        select_from_common_sets(most_common_pairs, numbers_set, 4)
+        select_from_common_sets(stats.numbers("most_common_pairs"), numbers_set, 4)
     
     if len(numbers_set) < 4:
-        select_from_common_sets(most_common_consecutive_pairs, numbers_set, 4)
+        select_from_common_sets(stats.numbers("most_common_consecutive_pairs"), numbers_set, 4)
 
-    while len(numbers_set) < 7:
-        number = generate_weighted_random_number(frequency_table)
-        if number not in numbers_set:
-            numbers_set.add(number)
+    # Draw the missing numbers in one pass, without repeats (lotto_max_sampler.py)
+    numbers_set.update(sampler_for(frequency_table).sample(7 - len(numbers_set), to_mask(numbers_set)))
 
     return sorted(numbers_set)
 
@@ -83,8 +75,9 @@ def generate_ticket():
     repeat = int(input("How many tickets do you like to buy?: "))
  
     for i in range(repeat):
-        ticket = generate_lotto_max_set(frequency_table)
+        ticket = generate_lotto_max_set(stats.frequency_table)
         print(ticket)
 
 # Run the ticket generator
-generate_ticket()
+if __name__ == "__main__":
+    generate_ticket()
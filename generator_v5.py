@@ -13,28 +13,17 @@
 # 2- Multiple Tickets: The user specifies how many tickets they want to generate.
 # 3- Custom Damping Factor: The user can provide a damping factor or use the default value of 0.8.
 
-from lotto_max_scraper import LottoMaxScraper
+from lotto_max_bitmask import to_mask
+from lotto_max_sampler import sampler_for
+from lotto_max_stats import get_statistics
 import random
 
-scraper = LottoMaxScraper()
-frequency_table = scraper.get_number_frequency_table()
-most_common_pairs = scraper.get_most_common_pairs()
-most_common_consecutive_pairs = scraper.get_most_common_consecutive_pairs()
-most_common_triplets = scraper.get_most_common_triplets()
-most_common_consecutive_triplets = scraper.get_most_common_consecutive_triplets()
-most_common_four_numbers = scraper.get_most_common_four_numbers()
+stats = get_statistics()  # shared provider; each table is loaded on first use
 
 def generate_weighted_random_number(frequency_table, damping_factor=0.8):
     """Generates a number considering frequency data with reduced bias."""
-    numbers = list(frequency_table.keys())
-    frequencies = list(frequency_table.values())
-    
-    total_weight = sum(frequencies)
-    probabilities = [freq / total_weight for freq in frequencies]
-    
-    adjusted_probabilities = [(1 - damping_factor) + damping_factor * p for p in probabilities]
-    
-    return random.choices(numbers, weights=adjusted_probabilities, k=1)[0]
+    # The sampler for this table and damping factor is built once and cached (lotto_max_sampler.py)
+    return sampler_for(frequency_table, damping_factor).draw()
 
 def select_weighted_set(set_list, numbers_set, max_size, weight):
     """Selects a pair, triplet, or quad with different weights."""
@@ -51,20 +40,18 @@ def generate_lotto_max_set(frequency_table, damping_factor=0.8, user_numbers=Non
 
     # Apply weighted influence based on the priority you provided
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_pairs, numbers_set, 7, 5)  # Highest weight
+        select_weighted_set(stats.numbers("most_common_pairs"), numbers_set, 7, 5)  # Highest weight
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_consecutive_pairs, numbers_set, 7, 4)
+        select_weighted_set(stats.numbers("most_common_consecutive_pairs"), numbers_set, 7, 4)
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_triplets, numbers_set, 7, 3)
+        select_weighted_set(stats.numbers("most_common_triplets"), numbers_set, 7, 3)
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_consecutive_triplets, numbers_set, 7, 2)
+        select_weighted_set(stats.numbers("most_common_consecutive_triplets"), numbers_set, 7, 2)
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_four_numbers, numbers_set, 7, 1)  # Lowest weight
+        select_weighted_set(stats.numbers("most_common_four_numbers"), numbers_set, 7, 1)  # Lowest weight
 
-    while len(numbers_set) < 7:
-        number = generate_weighted_random_number(frequency_table, damping_factor)
-        if number not in numbers_set:
-            numbers_set.add(number)
+    # Draw the missing numbers in one pass, without repeats (lotto_max_sampler.py)
+    numbers_set.update(sampler_for(frequency_table, damping_factor).sample(7 - len(numbers_set), to_mask(numbers_set)))
 
     return sorted(numbers_set)
 
@@ -96,7 +83,7 @@ def generate_ticket():
     for i in range(num_tickets):
         print(f"\nGenerating ticket {i + 1}:")
         
-        ticket = generate_lotto_max_set(frequency_table, damping_factor)
+        ticket = generate_lotto_max_set(stats.frequency_table, damping_factor)
 
         # Display the ticket
         print("Your Lotto Max Numbers:", ticket)
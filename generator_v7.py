@@ -14,28 +14,17 @@
 # 4- Controlled Randomness:
 # The randomness is introduced after considering both the high-priority and low-priority sets. This ensures that the final set retains some unpredictability while still being grounded in historical data.
 
-from lotto_max_scraper import LottoMaxScraper
+from lotto_max_bitmask import to_mask
+from lotto_max_sampler import sampler_for
+from lotto_max_stats import get_statistics
 import random
 
-scraper = LottoMaxScraper()
-frequency_table = scraper.get_number_frequency_table()
-most_common_pairs = scraper.get_most_common_pairs()
-most_common_consecutive_pairs = scraper.get_most_common_consecutive_pairs()
-most_common_triplets = scraper.get_most_common_triplets()
-most_common_consecutive_triplets = scraper.get_most_common_consecutive_triplets()
-most_common_four_numbers = scraper.get_most_common_four_numbers()
+stats = get_statistics()  # shared provider; each table is loaded on first use
 
 def generate_weighted_random_number(frequency_table, damping_factor=0.8):
     """Generates a number considering frequency data with reduced bias."""
-    numbers = list(frequency_table.keys())
-    frequencies = list(frequency_table.values())
-    
-    total_weight = sum(frequencies)
-    probabilities = [freq / total_weight for freq in frequencies]
-    
-    adjusted_probabilities = [(1 - damping_factor) + damping_factor * p for p in probabilities]
-    
-    return random.choices(numbers, weights=adjusted_probabilities, k=1)[0]
+    # The sampler for this table and damping factor is built once and cached (lotto_max_sampler.py)
+    return sampler_for(frequency_table, damping_factor).draw()
 
 def get_lucky_numbers():
     """Allows the user to input their lucky numbers (1 to 7 numbers)."""
@@ -90,35 +79,32 @@ def generate_lotto_max_set(frequency_table, damping_factor=0.8, lucky_numbers=No
     if lucky_numbers:
         numbers_set.update(lucky_numbers)
 
-    # Start with the frequency table to select the majority of numbers
-    while len(numbers_set) < 5:
-        number = generate_weighted_random_number(frequency_table, damping_factor)
-        if number not in numbers_set:
-            numbers_set.add(number)
+    # Start with the frequency table to select the majority of numbers, drawn in one pass
+    # without repeats (lotto_max_sampler.py)
+    numbers_set.update(sampler_for(frequency_table, damping_factor).sample(5 - len(numbers_set), to_mask(numbers_set)))
     print('1-numbers_set:', sorted(numbers_set))
     # Incorporate pairs, triplets, etc., but ensure they don't dominate
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_pairs, numbers_set, 7, 5)  # Higher priority
+        select_weighted_set(stats.numbers("most_common_pairs"), numbers_set, 7, 5)  # Higher priority
         print('most_common_pairs:numbers_set:', sorted(numbers_set))
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_consecutive_pairs, numbers_set, 7, 4)
+        select_weighted_set(stats.numbers("most_common_consecutive_pairs"), numbers_set, 7, 4)
         print('most_common_consecutive_pairs:numbers_set:', sorted(numbers_set))
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_triplets, numbers_set, 7, 3)
+        select_weighted_set(stats.numbers("most_common_triplets"), numbers_set, 7, 3)
         print('most_common_triplets:numbers_set:', sorted(numbers_set))
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_consecutive_triplets, numbers_set, 7, 2)
+        select_weighted_set(stats.numbers("most_common_consecutive_triplets"), numbers_set, 7, 2)
         print('most_common_consecutive_triplets:numbers_set:', sorted(numbers_set)) 
     if len(numbers_set) < 7:
-        select_weighted_set(most_common_four_numbers, numbers_set, 7, 1)  # Lower priority
+        select_weighted_set(stats.numbers("most_common_four_numbers"), numbers_set, 7, 1)  # Lower priority
         print('most_common_four_numbers:numbers_set:', sorted(numbers_set))
 
     # Fill any remaining slots with additional random numbers from the frequency table
-    while len(numbers_set) < 7:
-        number = generate_weighted_random_number(frequency_table, damping_factor)
-        if number not in numbers_set:
-            numbers_set.add(number)
-            print('additional numbers_set:', sorted(numbers_set))
+    # Draw the missing numbers in one pass, without repeats (lotto_max_sampler.py)
+    for number in sampler_for(frequency_table, damping_factor).sample(7 - len(numbers_set), to_mask(numbers_set)):
+        numbers_set.add(number)
+        print('additional numbers_set:', sorted(numbers_set))
 
     return sorted(numbers_set)
 
@@ -144,7 +130,7 @@ def generate_ticket():
         # Ask if the user has lucky numbers
         lucky_numbers = get_lucky_numbers()
 
-        ticket = generate_lotto_max_set(frequency_table, damping_factor, lucky_numbers)
+        ticket = generate_lotto_max_set(stats.frequency_table, damping_factor, lucky_numbers)
         
         # Display the ticket
         print("Your Lotto Max Numbers:", ticket)
@@ -15,36 +15,17 @@
 # The function should now successfully use all available data (frequency, pairs, triplets, etc.) without skipping over any sections.
 
 
-from lotto_max_scraper import LottoMaxScraper
+from lotto_max_bitmask import to_mask
+from lotto_max_sampler import sampler_for
+from lotto_max_stats import get_statistics
 import random
 
-scraper = LottoMaxScraper()
-frequency_table = scraper.get_number_frequency_table()
-most_common_pairs = scraper.get_most_common_pairs()
-most_common_consecutive_pairs = scraper.get_most_common_consecutive_pairs()
-most_common_triplets = scraper.get_most_common_triplets()
-most_common_consecutive_triplets = scraper.get_most_common_consecutive_triplets()
-most_common_four_numbers = scraper.get_most_common_four_numbers()
-
-print('frequency_table:', frequency_table)
-print('most_common_pairs:', most_common_pairs)
-print('most_common_consecutive_pairs:', most_common_consecutive_pairs)
-print('most_common_triplets:', most_common_triplets)
-print('most_common_consecutive_triplets:', most_common_consecutive_triplets)
-print('most_common_four_numbers:', most_common_four_numbers)
-
+stats = get_statistics()  # shared provider; each table is loaded on first use
 
 def generate_weighted_random_number(frequency_table, damping_factor=0.8):
     """Generates a number considering frequency data with reduced bias."""
-    numbers = list(frequency_table.keys())
-    frequencies = list(frequency_table.values())
-    
-    total_weight = sum(frequencies)
-    probabilities = [freq / total_weight for freq in frequencies]
-    
-    adjusted_probabilities = [(1 - damping_factor) + damping_factor * p for p in probabilities]
-    
-    return random.choices(numbers, weights=adjusted_probabilities, k=1)[0]
+    # The sampler for this table and damping factor is built once and cached (lotto_max_sampler.py)
+    return sampler_for(frequency_table, damping_factor).draw()
 
 def get_lucky_numbers():
     """Allows the user to input their lucky numbers (1 to 7 numbers)."""
@@ -102,15 +83,16 @@ def generate_lotto_max_set(frequency_table, damping_factor=0.8, lucky_numbers=No
 
     # Define the weighted sets and their corresponding weights
     weighted_sets = [
-        (most_common_pairs, 5, "Most Common Pairs"),
-        (most_common_consecutive_pairs, 4, "Most Common Consecutive Pairs"),
-        (most_common_triplets, 3, "Most Common Triplets"),
-        (most_common_consecutive_triplets, 2, "Most Common Consecutive Triplets"),
-        (most_common_four_numbers, 1, "Most Common Four Numbers")
+        (stats.numbers("most_common_pairs"), 5, "Most Common Pairs"),
+        (stats.numbers("most_common_consecutive_pairs"), 4, "Most Common Consecutive Pairs"),
+        (stats.numbers("most_common_triplets"), 3, "Most Common Triplets"),
+        (stats.numbers("most_common_consecutive_triplets"), 2, "Most Common Consecutive Triplets"),
+        (stats.numbers("most_common_four_numbers"), 1, "Most Common Four Numbers")
     ]
     
     # Ensure balanced contributions from frequency and combinations
     while len(numbers_set) < 7:
+        before = len(numbers_set)
         if len(numbers_set) < 5:  # First, select a few numbers based on frequency
             number = generate_weighted_random_number(frequency_table, damping_factor)
             if number not in numbers_set:
@@ -125,13 +107,17 @@ def generate_lotto_max_set(frequency_table, damping_factor=0.8, lucky_numbers=No
                 print(f"Added from {set_name}: {sorted(numbers_set)}")
             else:
                 break
-    
+
+        # With 5 or more numbers nothing but the sets can add to the ticket; if none of them
+        # fit, every further pass would fail the same way, so leave it to the final fill
+        if len(numbers_set) == before and len(numbers_set) >= 5:
+            break
+
     # Fill any remaining slots with random numbers from the frequency table
-    while len(numbers_set) < 7:
-        number = generate_weighted_random_number(frequency_table, damping_factor)
-        if number not in numbers_set:
-            numbers_set.add(number)
-            print(f"Randomly added from frequency table to fill: {number}")
+    # Draw the missing numbers in one pass, without repeats (lotto_max_sampler.py)
+    for number in sampler_for(frequency_table, damping_factor).sample(7 - len(numbers_set), to_mask(numbers_set)):
+        numbers_set.add(number)
+        print(f"Randomly added from frequency table to fill: {number}")
 
     print(f"Final generated set: {sorted(numbers_set)}\n")
     return sorted(numbers_set)
@@ -157,13 +143,19 @@ def generate_ticket():
         # Ask if the user has lucky numbers
         lucky_numbers = get_lucky_numbers()
 
-        ticket = generate_lotto_max_set(frequency_table, damping_factor, lucky_numbers)
+        ticket = generate_lotto_max_set(stats.frequency_table, damping_factor, lucky_numbers)
         
         # Display the ticket
         print("Your Lotto Max Numbers:", ticket)
 
 def main():
     """Main function to run the Lotto Max number generator."""
+    print('frequency_table:', stats.frequency_table)
+    print('most_common_pairs:', stats.numbers("most_common_pairs"))
+    print('most_common_consecutive_pairs:', stats.numbers("most_common_consecutive_pairs"))
+    print('most_common_triplets:', stats.numbers("most_common_triplets"))
+    print('most_common_consecutive_triplets:', stats.numbers("most_common_consecutive_triplets"))
+    print('most_common_four_numbers:', stats.numbers("most_common_four_numbers"))
     generate_ticket()
 
 if __name__ == "__main__":
@@ -18,88 +18,80 @@
 # This approach should prevent any single method (like frequency or pairs) from dominating the final set, allowing for a more balanced and diverse selection of numbers.
 # The function should now successfully use all available data (frequency, pairs, triplets, etc.) without skipping over any sections.
 
-from lotto_max_scraper import LottoMaxScraper
-import random
+from lotto_max_bitmask import from_mask, to_mask
+from lotto_max_sampler import sampler_for
+from lotto_max_stats import get_statistics
 
-scraper = LottoMaxScraper()
-frequency_table = scraper.get_number_frequency_table()
-most_common_pairs = scraper.get_most_common_pairs()
-most_common_consecutive_pairs = scraper.get_most_common_consecutive_pairs()
-most_common_triplets = scraper.get_most_common_triplets()
-most_common_consecutive_triplets = scraper.get_most_common_consecutive_triplets()
-most_common_four_numbers = scraper.get_most_common_four_numbers()
+stats = get_statistics()  # shared provider; each table is loaded on first use
 
 
 def generate_weighted_random_number(frequency_table, damping_factor=0.8):
     """Generates a number considering frequency data with reduced bias."""
-    numbers = list(frequency_table.keys())
-    frequencies = list(frequency_table.values())
-    
-    total_weight = sum(frequencies)
-    probabilities = [freq / total_weight for freq in frequencies]
-    
-    adjusted_probabilities = [(1 - damping_factor) + damping_factor * p for p in probabilities]
-    
-    selected_number = random.choices(numbers, weights=adjusted_probabilities, k=1)[0]
-    # print(f"Generated weighted random number: {selected_number}")
-    return selected_number
+    # The sampler for this table and damping factor is built once and cached (lotto_max_sampler.py)
+    return sampler_for(frequency_table, damping_factor).draw()
 
-def select_weighted_set(set_list, numbers_set, max_size, weight, selected_count, set_name):
+def select_weighted_set(set_index, numbers_mask, max_size, weight, selected_count, set_name):
     """Selects a pair, triplet, or quad with different weights, with an early exit if unsuccessful."""
-    available_sets = [s for s in set_list if all(num not in numbers_set for num in s)]
-    if available_sets and len(numbers_set) < max_size and selected_count < weight:
-        weighted_choice = random.choice(available_sets)
-        if len(numbers_set) + len(weighted_choice) <= max_size:
-            numbers_set.update(weighted_choice)
+    size = numbers_mask.bit_count()
+    if size < max_size and selected_count < weight and size + set_index.size <= max_size:
+        # Combinations that were drawn together more often are proportionally more likely;
+        # the index skips combinations sharing a number with the ticket (lotto_max_bitmask.py)
+        chosen = set_index.choose(numbers_mask)
+        if chosen is not None:
+            numbers_mask |= set_index.masks[chosen]
             selected_count += 1
-            # print(f"Added from {set_name}: {weighted_choice}, updated set: {sorted(numbers_set)}")
-    return selected_count
+            # print(f"Added from {set_name}: {from_mask(set_index.masks[chosen])}, updated set: {from_mask(numbers_mask)}")
+    return numbers_mask, selected_count
 
 def generate_lotto_max_set(frequency_table, damping_factor=0.8, lucky_numbers=None):
     """Generates a set of 7 unique Lotto Max numbers with balanced contributions from all sources."""
-    numbers_set = set()
+    numbers_mask = 0
     selected_counts = {"pairs": 0, "triplets": 0, "quads": 0}
 
     # Include lucky numbers from the user, if any
     if lucky_numbers:
-        numbers_set.update(lucky_numbers)
+        numbers_mask = to_mask(lucky_numbers)
         print(f"Added lucky numbers: {lucky_numbers}")
 
     # Define the weighted sets and their corresponding weights
     weighted_sets = [
-        (most_common_pairs, 5, "pairs"),
-        (most_common_consecutive_pairs, 4, "pairs"),
-        (most_common_triplets, 3, "triplets"),
-        (most_common_consecutive_triplets, 2, "triplets"),
-        (most_common_four_numbers, 1, "quads")
+        (stats.index("most_common_pairs"), 5, "pairs"),
+        (stats.index("most_common_consecutive_pairs"), 4, "pairs"),
+        (stats.index("most_common_triplets"), 3, "triplets"),
+        (stats.index("most_common_consecutive_triplets"), 2, "triplets"),
+        (stats.index("most_common_four_numbers"), 1, "quads")
     ]
     
     # Staggered and diversified selection process
-    while len(numbers_set) < 7:
-        if len(numbers_set) < 5:  # First, select a few numbers based on frequency
+    while numbers_mask.bit_count() < 7:
+        before = numbers_mask
+        if numbers_mask.bit_count() < 5:  # First, select a few numbers based on frequency
             number = generate_weighted_random_number(frequency_table, damping_factor)
-            if number not in numbers_set:
-                numbers_set.add(number)
-                # print(f"Added from frequency table: {number}, current set: {sorted(numbers_set)}")
+            numbers_mask |= 1 << number
+            # print(f"Added from frequency table: {number}, current set: {from_mask(numbers_mask)}")
         
         # Rotate through the weighted sets to add diversity, with limited selection per set
         for weighted_choice in weighted_sets:
-            if len(numbers_set) < 7:
+            if numbers_mask.bit_count() < 7:
                 selected_count = selected_counts[weighted_choice[2]]
-                selected_count = select_weighted_set(weighted_choice[0], numbers_set, 7, weighted_choice[1], selected_count, weighted_choice[2])
+                numbers_mask, selected_count = select_weighted_set(weighted_choice[0], numbers_mask, 7, weighted_choice[1], selected_count, weighted_choice[2])
                 selected_counts[weighted_choice[2]] = selected_count
             else:
                 break
+
+        # With 5 or more numbers nothing but the sets can add to the ticket; if none of them
+        # fit, every further pass would fail the same way, so leave it to the final fill
+        if numbers_mask == before and numbers_mask.bit_count() >= 5:
+            break
     
     # Fill any remaining slots with additional random numbers from the frequency table
-    while len(numbers_set) < 7:
-        number = generate_weighted_random_number(frequency_table, damping_factor)
-        if number not in numbers_set:
-            numbers_set.add(number)
-            # print(f"Randomly added from frequency table to fill: {number}, current set: {sorted(numbers_set)}")
+    # in one pass, without repeats (lotto_max_sampler.py)
+    for number in sampler_for(frequency_table, damping_factor).sample(7 - numbers_mask.bit_count(), numbers_mask):
+        numbers_mask |= 1 << number
+        # print(f"Randomly added from frequency table to fill: {number}, current set: {from_mask(numbers_mask)}")
 
-    print(f"Final generated set: {sorted(numbers_set)}\n")
-    return sorted(numbers_set)
+    print(f"Final generated set: {from_mask(numbers_mask)}\n")
+    return from_mask(numbers_mask)
 
 def get_lucky_numbers():
     """Allows the user to input their lucky numbers (1 to 7 numbers)."""
@@ -153,7 +145,7 @@ def generate_ticket():
         # Ask if the user has lucky numbers
         lucky_numbers = get_lucky_numbers()
 
-        ticket = generate_lotto_max_set(frequency_table, damping_factor, lucky_numbers)
+        ticket = generate_lotto_max_set(stats.frequency_table, damping_factor, lucky_numbers)
         
         # Display the ticket
         print("Your Lotto Max Numbers:", ticket)
@@ -0,0 +1,204 @@
+# Historical backtesting of the generator strategies.
+# Backtest replays the stored draw history oldest first. Before each draw it builds the
+# statistics tables from the earlier draws only (CombinationStats.advance updates them by
+# one draw at a time), generates tickets with each strategy from those tables, and scores
+# the tickets against the draw: how many of the 7 winning numbers each ticket matched, and
+# whether it also held the bonus number. Tickets and draws are 64-bit masks, so scoring is
+# a vectorized AND and popcount (NumPy). Results are match/bonus histograms per strategy
+# and damping factor. match_histogram() scores any set of tickets against every draw.
+
+#   python lotto_max_backtest.py [tickets_per_draw] [strategies] [damping_factors]
+#   python lotto_max_backtest.py 20 v3,v9 0.2,0.8
+
+from collections import namedtuple
+import contextlib
+import importlib
+import os
+import random
+import sys
+import time
+import numpy as np
+from lotto_max_batch import generate_batch
+from lotto_max_bitmask import from_mask
+from lotto_max_history import CombinationStats, DrawHistory
+from lotto_max_stats import StatisticsProvider
+
+# Strategy name -> generator module. v3 and v4 use raw frequencies, with no damping factor
+STRATEGIES = {
+    "v3": "generator_v3_good",
+    "v4": "generator_v4",
+    "v5": "generator_v5",
+    "v7": "generator_v7",
+    "v9": "generator_v9_good",
+}
+UNDAMPED = {"v3", "v4"}
+MIN_HISTORY = 20  # draws needed before the first backtested draw, so the tables mean something
+DRAW_CHUNK = 8  # draws scored at once in match_histogram
+
+# Tickets scored for one strategy and damping factor. histogram[m, b] counts the tickets
+# that matched m winning numbers, with b = 1 when they also held the bonus number.
+BacktestResult = namedtuple("BacktestResult", ["strategy", "damping_factor", "draws", "tickets", "histogram"])
+
+def to_masks(tickets):
+    """Converts tickets (an (n, 7) array or a list of number lists) into uint64 masks."""
+    tickets = np.asarray(tickets, dtype=np.uint64)
+    return np.bitwise_or.reduce(np.uint64(1) << tickets, axis=1)
+
+def draw_masks(draws):
+    """Returns (winning number masks, bonus numbers) arrays for a list of Draws."""
+    return to_masks([draw.numbers for draw in draws]), np.array([draw.bonus for draw in draws], dtype=np.uint64)
+
+def score(ticket_masks, winning_mask, bonus):
+    """Returns (matches, bonus hits) arrays for tickets against one draw."""
+    matches = np.bitwise_count(ticket_masks & np.uint64(winning_mask))
+    bonus_hits = ((ticket_masks >> np.uint64(bonus)) & np.uint64(1)).astype(np.uint8)
+    return matches, bonus_hits
+
+def histogram(matches, bonus_hits):
+    """Counts (matches, bonus hit) pairs into an (8, 2) histogram."""
+    return np.bincount(matches.ravel().astype(np.intp) * 2 + bonus_hits.ravel(), minlength=16).reshape(8, 2)
+
+def ticket_planes(ticket_masks):
+    """Returns a (51, words) uint64 array whose row n is a bitmap of the tickets holding n."""
+    words = -(-len(ticket_masks) // 64)
+    planes = np.zeros((51, words * 8), dtype=np.uint8)
+    for number in range(1, 51):
+        holds = ((ticket_masks >> np.uint64(number)) & np.uint64(1)).astype(bool)
+        packed = np.packbits(holds, bitorder="little")
+        planes[number, :len(packed)] = packed
+    return planes.view(np.uint64)
+
+def match_histogram(ticket_masks, winning_masks, bonuses):
+    """Scores every ticket against every draw and returns the combined (8, 2) histogram."""
+    # Bit-sliced counting: each draw adds its 7 number bitmaps into three counter bitmaps
+    # (bits 0-2 of every ticket's match count), so one uint64 operation scores 64 tickets,
+    # and the histogram is a popcount of each counter pattern
+    planes = ticket_planes(ticket_masks)
+    numbers = np.array([from_mask(int(mask)) for mask in winning_masks], dtype=np.intp)
+    bonuses = np.asarray(bonuses, dtype=np.intp)
+    total = np.zeros((8, 2), dtype=np.int64)
+    for start in range(0, len(numbers), DRAW_CHUNK):
+        chunk = numbers[start:start + DRAW_CHUNK]
+        counters = [np.zeros((len(chunk), planes.shape[1]), dtype=np.uint64) for _ in range(3)]
+        for column in range(7):
+            carry = planes[chunk[:, column]]
+            for counter in counters:
+                next_carry = counter & carry
+                counter ^= carry
+                carry = next_carry
+        bonus_planes = planes[bonuses[start:start + DRAW_CHUNK]]
+        # Split the tickets by each counter bit in turn, from the high bit down
+        groups = [~counters[2], counters[2]]
+        for counter in reversed(counters[:2]):
+            groups = [group & bit for group in groups for bit in (~counter, counter)]
+        for m, selected in enumerate(groups):
+            total[m, 0] += int(np.bitwise_count(selected).sum())
+            total[m, 1] += int(np.bitwise_count(selected & bonus_planes).sum())
+    # Padding bits past the last ticket count as tickets matching nothing
+    total[0, 0] -= (planes.shape[1] * 64 - len(ticket_masks)) * len(numbers)
+    total[:, 0] -= total[:, 1]
+    return total
+
+def draw_histogram(tickets, draw):
+    """Scores tickets (an (n, 7) array) against one Draw into an (8, 2) histogram."""
+    return histogram(*score(to_masks(tickets), to_masks([draw.numbers])[0], draw.bonus))
+
+def generate_tickets(strategy, stats, count, damping_factor=None, seed=None, weights=None):
+    """Generates count tickets with one strategy from the given statistics, as a (count, 7) array."""
+    if strategy == "v9":
+        return generate_batch(count, damping_factor, seed=seed, stats=stats, weights=weights)
+    module = importlib.import_module(STRATEGIES[strategy])
+    # The generators read their combination tables from their module's provider, and draw from
+    # the global random module: lend them this provider and seed for the run, and put back the
+    # provider and random state their other callers see
+    previous, random_state = module.stats, random.getstate()
+    module.stats = stats
+    random.seed(seed)
+    frequency_table = stats.frequency_table
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if strategy in UNDAMPED:
+                tickets = [module.generate_lotto_max_set(frequency_table) for _ in range(count)]
+            else:
+                tickets = [module.generate_lotto_max_set(frequency_table, damping_factor) for _ in range(count)]
+    finally:
+        module.stats = previous
+        random.setstate(random_state)
+    return np.array(tickets, dtype=np.uint8)
+
+class Backtest:
+    def __init__(self, draws, tickets_per_draw=10, min_history=MIN_HISTORY, seed=2024):
+        self.draws = list(draws)  # oldest first
+        self.tickets_per_draw = tickets_per_draw
+        self.min_history = min_history
+        self.seed = seed
+
+    def runs(self, strategies, damping_factors):
+        """Returns the (strategy, damping factor) pairs to backtest; undamped strategies run once."""
+        return [
+            (strategy, None if strategy in UNDAMPED else damping_factor)
+            for strategy in strategies
+            for damping_factor in (damping_factors if strategy not in UNDAMPED else [None])
+        ]
+
+    def replay(self, start=0, stop=None):
+        """Yields (index, draw, provider) for the backtested draws in [start, stop), each provider
+        holding the tables built from the draws before that one."""
+        start = max(start, self.min_history)
+        stop = len(self.draws) if stop is None else stop
+        stats = CombinationStats(self.draws[:start])
+        tables = stats.tables()
+        for i in range(start, stop):
+            draw = self.draws[i]
+            yield i, draw, StatisticsProvider(tables=tables)
+            if i + 1 < stop:
+                tables = stats.advance(tables, draw)
+
+    def run(self, strategies=tuple(STRATEGIES), damping_factors=(0.8,)):
+        """Replays the history and returns a BacktestResult per strategy and damping factor."""
+        runs = self.runs(strategies, damping_factors)
+        histograms = {run: np.zeros((8, 2), dtype=np.int64) for run in runs}
+        for i, draw, provider in self.replay():
+            for run_index, (strategy, damping_factor) in enumerate(runs):
+                # One seed per draw and run, so each run is reproducible on its own
+                seed = int(np.random.SeedSequence([self.seed, i, run_index]).generate_state(1)[0])
+                tickets = generate_tickets(strategy, provider, self.tickets_per_draw, damping_factor, seed)
+                histograms[strategy, damping_factor] += draw_histogram(tickets, draw)
+        draws = max(len(self.draws) - self.min_history, 0)
+        return [
+            BacktestResult(strategy, damping_factor, draws, draws * self.tickets_per_draw, histograms[strategy, damping_factor])
+            for strategy, damping_factor in runs
+        ]
+
+def format_result(result):
+    """Returns one report line: the share of tickets matching 3 to 7 numbers (and the bonus)."""
+    shares = result.histogram / max(result.tickets, 1)
+    damping = "-" if result.damping_factor is None else f"{result.damping_factor:g}"
+    cells = "  ".join(
+        f"{m}:{shares[m].sum():.5f}" + (f" (+b {shares[m, 1]:.5f})" if 3 <= m <= 6 else "")
+        for m in range(3, 8)
+    )
+    return f"{result.strategy:<4}{damping:>6}{result.tickets:>9}  {cells}"
+
+def main(argv):
+    tickets_per_draw = int(argv[1]) if len(argv) > 1 else 10
+    strategies = argv[2].split(",") if len(argv) > 2 else list(STRATEGIES)
+    damping_factors = [float(d) for d in argv[3].split(",")] if len(argv) > 3 else [0.8]
+    unknown = [strategy for strategy in strategies if strategy not in STRATEGIES]
+    if unknown:
+        print(f"Unknown strategies {unknown}; expected some of {', '.join(STRATEGIES)}.")
+        return 1
+    history = DrawHistory()
+    if len(history) <= MIN_HISTORY:
+        print(f"Not enough draws in {history.path}; run 'python lotto_max_history.py update' first.")
+        return 1
+    start = time.perf_counter()
+    results = Backtest(history, tickets_per_draw).run(strategies, damping_factors)
+    print(f"{len(history) - MIN_HISTORY} draws, {tickets_per_draw} tickets per draw and strategy, "
+          f"{time.perf_counter() - start:.1f} s")
+    for result in results:
+        print(format_result(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
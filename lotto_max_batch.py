@@ -0,0 +1,395 @@
+# Vectorized batch generation for the v9 strategy.
+# generate_batch() runs the same interleaved selection as generator_v9_good.py's
+# generate_lotto_max_set, but for every ticket at once: the tickets are a NumPy array of
+# 64-bit masks (bit n set for number n, as in lotto_max_bitmask.py), and each step of a
+# pass (one frequency draw, then one pick from each combination table) is a handful of
+# array operations over the tickets still being built. Tickets come back as an (n, 7)
+# uint8 array, one sorted ticket per row. Needs numpy.
+# Tickets are generated in fixed-size chunks, each from its own random stream spawned from
+# the root seed (numpy SeedSequence), so a seed always gives the same tickets.
+# generate_parallel() hands the chunks to a process pool whose workers read the statistics
+# tables from shared memory, and the output is identical to generate_batch() for any
+# worker count.
+
+#   tickets = generate_batch(1_000_000, damping_factor=0.8, lucky_numbers=[7], seed=2024)
+#   tickets = generate_parallel(10_000_000, seed=2024, workers=8)
+#   tickets = generate_batch(1000, weights=(1, 1, 1, 1, 1))  # at most one pick per table
+#   with BatchPool(stats) as pool: pool.submit(count, 0.8, [7], seed_sequence).result()
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import numpy as np
+from lotto_max_sampler import AliasSampler, damped_weights
+from lotto_max_shared import SharedStatistics, attach_statistics
+from lotto_max_stats import get_statistics
+
+# The v9 combination tables in pass order: (table, most picks per ticket, shared count)
+WEIGHTED_SETS = [
+    ("most_common_pairs", 5, "pairs"),
+    ("most_common_consecutive_pairs", 4, "pairs"),
+    ("most_common_triplets", 3, "triplets"),
+    ("most_common_consecutive_triplets", 2, "triplets"),
+    ("most_common_four_numbers", 1, "quads"),
+]
+COUNT_COLUMNS = {"pairs": 0, "triplets": 1, "quads": 2}
+DEFAULT_WEIGHTS = tuple(weight for _, weight, _ in WEIGHTED_SETS)
+REJECTION_TRIES = 8
+CHUNK_SIZE = 1 << 16
+ALIAS_MAX_ENTRIES = 4096
+NUMBER_BITS = np.arange(51, dtype=np.uint64)
+# Damping factors whose alias arrays a provider keeps, and generators a pool worker keeps; the
+# least recently used go first, so a resident service asked for any damping factor stays bounded
+ALIAS_CACHE_SIZE = 32
+GENERATOR_CACHE_SIZE = 32
+
+def popcount(masks):
+    return np.bitwise_count(masks)
+
+def combination_arrays(stats, name):
+    """Returns the CombinationArrays for one table, built once per provider."""
+    # Kept with the provider's other derived structures, so every damping factor and weight
+    # schedule run against the same tables shares one set of arrays
+    key = ("arrays", name)
+    arrays = stats.derived.get(key)
+    if arrays is None:
+        arrays = stats.derived[key] = _build_combination_arrays(stats, name)
+    return arrays
+
+def frequency_arrays(stats, damping_factor):
+    """Returns (numbers, weights, AliasArrays over the number bits) for a damping factor, built once per provider."""
+    with stats.lock:
+        cache = stats.derived.get(("alias", None))
+        if cache is None:
+            cache = stats.derived["alias", None] = OrderedDict()  # damping factor -> arrays, least recently used first
+        arrays = cache.get(damping_factor)
+        if arrays is not None:
+            cache.move_to_end(damping_factor)
+            return arrays
+    numbers, weights = damped_weights(stats.frequency_table, damping_factor)
+    numbers = np.array(numbers, dtype=np.uint64)
+    arrays = (numbers, np.array(weights, dtype=np.float64), AliasArrays(weights, np.uint64(1) << numbers))
+    with stats.lock:
+        cache[damping_factor] = arrays
+        while len(cache) > ALIAS_CACHE_SIZE:
+            cache.popitem(last=False)
+    return arrays
+
+def _build_combination_arrays(stats, name):
+    if stats.snapshot is not None and not stats.is_loaded(name):
+        # Read the fixed-layout number and count arrays in place (e.g. from shared memory)
+        # rather than building Combination records first
+        k, numbers, counts = stats.snapshot.arrays[name]
+        numbers = np.frombuffer(numbers, dtype=np.uint8).reshape(-1, k).astype(np.uint64)
+        masks = np.bitwise_or.reduce(np.uint64(1) << numbers, axis=1) if k else np.zeros(0, np.uint64)
+        # counts is a uint32 memoryview, or a tuple on big-endian hosts (lotto_max_snapshot.py)
+        return CombinationArrays(masks, np.asarray(counts, dtype=np.uint32), k)
+    set_masks = stats.masks(name)
+    return CombinationArrays(set_masks.masks, set_masks.frequencies, set_masks.size)
+
+def masks_to_tickets(masks):
+    """Converts an array of 7-bit masks into an (n, 7) uint8 array of sorted numbers."""
+    tickets = np.empty((len(masks), 7), dtype=np.uint8)
+    masks = masks.copy()
+    below = np.empty_like(masks)
+    for column in range(7):
+        np.subtract(masks, np.uint64(1), out=below)
+        tickets[:, column] = np.bitwise_count(masks ^ below)  # one more than the lowest set bit's index
+        masks &= below
+    tickets -= 1
+    return tickets
+
+class AliasArrays:
+    """An AliasSampler's tables as arrays, to draw many values at once."""
+
+    def __init__(self, weights, values):
+        sampler = AliasSampler(range(len(weights)), weights)
+        # Column i keeps its own value when x < i + probability, else its alias: store both
+        # side by side so a draw is one comparison and one gather, with no np.where
+        self.size = len(weights)
+        self.thresholds = np.arange(self.size) + np.array(sampler.probabilities, dtype=np.float64)
+        self.pairs = np.empty(2 * self.size, dtype=values.dtype)
+        self.pairs[0::2] = values[np.array(sampler.aliases, dtype=np.intp)]
+        self.pairs[1::2] = values
+
+    def draw(self, count, rng):
+        """Returns count independent values, each drawn with probability proportional to its weight."""
+        x = rng.random(count)
+        x *= self.size
+        i = x.astype(np.intp)
+        keep = x < self.thresholds.take(i)
+        i += i
+        i += keep
+        return self.pairs.take(i)
+
+class CumulativeArrays:
+    """Draws many values at once by binary search over cumulative weights."""
+
+    def __init__(self, weights, values):
+        self.cum_weights = np.cumsum(weights, dtype=np.float64)
+        self.values = values
+
+    def draw(self, count, rng):
+        u = rng.random(count) * self.cum_weights[-1]
+        return self.values.take(np.minimum(np.searchsorted(self.cum_weights, u, side="right"), len(self.values) - 1))
+
+class CombinationArrays:
+    """One combination table as arrays: entry masks, frequencies and an alias table over them."""
+
+    def __init__(self, masks, frequencies, size):
+        self.masks = np.asarray(masks, dtype=np.uint64)
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        if self.frequencies.sum() <= 0:
+            self.alias = None
+        elif len(self.masks) <= ALIAS_MAX_ENTRIES:
+            self.alias = AliasArrays(self.frequencies.tolist(), self.masks)
+        else:
+            # Building an alias table is a Python loop over the entries; for the large
+            # full-history tables a binary search per draw is cheaper overall
+            self.alias = CumulativeArrays(self.frequencies, self.masks)
+        self.size = size
+        self.subsets = None  # built by choose_exact() on first use
+
+    def choose(self, ticket_masks, rng):
+        """Returns the chosen entry masks for each ticket (0 where no entry fits)."""
+        if self.alias is None:
+            return np.zeros(len(ticket_masks), dtype=np.uint64)
+        # Draw from the whole table and redraw the rows that clash, as CombinationIndex does
+        chosen = self.alias.draw(len(ticket_masks), rng)
+        pending = np.flatnonzero(chosen & ticket_masks)
+        chosen[pending] = 0
+        for _ in range(REJECTION_TRIES - 1):
+            if not len(pending):
+                return chosen
+            entries = self.alias.draw(len(pending), rng)
+            fits = (entries & ticket_masks[pending]) == 0
+            chosen[pending[fits]] = entries[fits]
+            pending = pending[~fits]
+        if len(pending):
+            # Choose exactly among the entries left for the few rows still clashing
+            chosen[pending] = self.choose_exact(ticket_masks[pending], rng)
+        return chosen
+
+    def choose_exact(self, ticket_masks, rng):
+        """Like choose(), without rejection; the cost grows with the tickets' numbers, not the table."""
+        subset_masks, keys, cum_held = self._subset_arrays()
+        n, count = len(ticket_masks), len(self.masks)
+        # The (row, subset, sign) terms of CombinationIndex.choose_exact's inclusion-exclusion,
+        # for each group of tickets with the same number of numbers
+        rows, ids, signs = [], [], []
+        sizes = popcount(ticket_masks)
+        for k in map(int, np.unique(sizes[sizes > 0])):
+            group = np.flatnonzero(sizes == k)
+            numbers = np.nonzero((ticket_masks[group, None] >> NUMBER_BITS) & np.uint64(1))[1]
+            bits = np.uint64(1) << numbers.astype(np.uint64).reshape(len(group), k)
+            for r in range(1, min(k, self.size) + 1):
+                subsets = np.bitwise_or.reduce(bits[:, list(combinations(range(k), r))], axis=2)
+                at = np.minimum(np.searchsorted(subset_masks, subsets), len(subset_masks) - 1)
+                held = subset_masks[at] == subsets
+                rows.append(np.broadcast_to(group[:, None], held.shape)[held])
+                ids.append(at[held] * count)
+                signs.append(np.full(len(ids[-1]), 1.0 if r % 2 else -1.0))
+        rows, ids, signs = np.concatenate(rows), np.concatenate(ids), np.concatenate(signs)
+        held_before = cum_held[np.searchsorted(keys, ids)]
+        cum_weights = np.concatenate(([0.0], np.cumsum(self.frequencies)))
+
+        def free_before(p):
+            held = cum_held[np.searchsorted(keys, ids + p[rows])] - held_before
+            return cum_weights[p] - np.bincount(rows, signs * held, n)
+
+        free_weight = free_before(np.full(n, count))
+        target = rng.random(n) * free_weight
+        # Bisect every row for the entry whose range of free weight holds its target
+        low, high = np.zeros(n, dtype=np.intp), np.full(n, count)
+        while (high - low > 1).any():
+            middle = (low + high) // 2
+            below = free_before(middle) <= target
+            low = np.where(below, middle, low)
+            high = np.where(below, high, middle)
+        found = free_weight > 0
+        while True:
+            # Rounding put a few targets on the end of the chosen entry's range
+            off = found & (((self.masks[low] & ticket_masks) != 0) | (self.frequencies[low] == 0))
+            if not off.any():
+                break
+            low[off] -= 1
+        return np.where(found, self.masks[low], np.uint64(0))
+
+    def _subset_arrays(self):
+        """Returns (sorted subset masks, keys subset * entries + entry, cumulative weights along the keys)."""
+        # Every subset of every entry's numbers, as CombinationIndex._subset_index, flattened
+        # so the entries holding one subset are a sorted run of keys
+        if self.subsets is None:
+            count = len(self.masks)
+            numbers = np.nonzero((self.masks[:, None] >> NUMBER_BITS) & np.uint64(1))[1]
+            bits = np.uint64(1) << numbers.astype(np.uint64).reshape(count, self.size)
+            subsets = np.concatenate([
+                np.bitwise_or.reduce(bits[:, combination], axis=1)
+                for r in range(1, self.size + 1) for combination in combinations(range(self.size), r)
+            ])
+            subset_masks, ids = np.unique(subsets, return_inverse=True)
+            keys = np.sort(ids * count + np.tile(np.arange(count), len(subsets) // count))
+            cum_held = np.concatenate(([0.0], np.cumsum(self.frequencies[keys % count])))
+            self.subsets = (subset_masks, keys, cum_held)
+        return self.subsets
+
+class BatchGenerator:
+    """The v9 tables for one damping factor, set of lucky numbers and table weights, prepared as arrays."""
+
+    def __init__(self, stats, damping_factor=0.8, lucky_numbers=None, weights=None):
+        self.numbers, self.weights, self.alias = frequency_arrays(stats, damping_factor)  # alias draws number bits
+        # weights: most picks per ticket from each table, in WEIGHTED_SETS order
+        self.weighted_sets = [
+            (combination_arrays(stats, name), weight, COUNT_COLUMNS[kind])
+            for (name, _, kind), weight in zip(WEIGHTED_SETS, weights or DEFAULT_WEIGHTS)
+        ]
+        self.lucky_mask = 0
+        for number in lucky_numbers or ():
+            self.lucky_mask |= 1 << number
+
+    def chunk(self, count, seed_sequence):
+        """Generates count tickets from one random stream, as a (count, 7) uint8 array."""
+        masks = np.full(count, self.lucky_mask, dtype=np.uint64)
+        self._generate_masks(masks, np.random.default_rng(seed_sequence))
+        return masks_to_tickets(masks)
+
+    def _generate_masks(self, masks, rng):
+        """Runs the v9 selection on an array of starting masks in place."""
+        alias, numbers, weights = self.alias, self.numbers, self.weights
+        n = len(masks)
+        selected_counts = [np.zeros(n, dtype=np.int8) for _ in COUNT_COLUMNS]  # per shared count
+        active = np.arange(n)  # tickets still in the staggered selection loop
+
+        while len(active):
+            everything = len(active) == n
+            current = masks if everything else masks[active]  # a pass over every ticket works in place
+            before = current.copy()
+            counts = selected_counts if everything else [column[active] for column in selected_counts]
+
+            # First, select a few numbers based on frequency
+            low = popcount(current) < 5
+            if low.all():
+                current |= alias.draw(len(current), rng)
+            else:
+                low = np.flatnonzero(low)
+                current[low] |= alias.draw(len(low), rng)
+
+            # Rotate through the weighted sets, with limited selection per set
+            for set_arrays, weight, column in self.weighted_sets:
+                room = popcount(current) <= 7 - set_arrays.size
+                if not room.any():
+                    continue
+                count = counts[column]
+                eligible = room & (count < weight)
+                if eligible.all():
+                    chosen = set_arrays.choose(current, rng)
+                    current |= chosen
+                    count += chosen != 0
+                    continue
+                eligible = np.flatnonzero(eligible)
+                if len(eligible):
+                    chosen = set_arrays.choose(current[eligible], rng)
+                    current[eligible] |= chosen
+                    count[eligible] += chosen != 0
+
+            if not everything:
+                masks[active] = current
+                for column, count in zip(selected_counts, counts):
+                    column[active] = count
+            size = popcount(current)
+            # Done when full, or stuck with 5 or more numbers (nothing but the sets can add any)
+            active = active[(size < 7) & ~((current == before) & (size >= 5))]
+
+        # Fill the remaining slots without repeats, as AliasSampler.sample does: redraw the
+        # numbers already taken a few times, then give the rows still short Efraimidis-Spirakis
+        # keys, where taken numbers never win and the largest keys fill one slot at a time
+        rows = np.flatnonzero(popcount(masks) < 7)
+        for _ in range(REJECTION_TRIES):
+            if not len(rows):
+                return
+            masks[rows] |= alias.draw(len(rows), rng)
+            rows = rows[popcount(masks[rows]) < 7]
+        if not len(rows):
+            return
+        missing = 7 - popcount(masks[rows])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            keys = np.log1p(-rng.random((len(rows), len(numbers)))) / weights
+        keys[np.isnan(keys)] = -np.inf  # zero-weight numbers are never drawn
+        keys[(masks[rows, None] >> numbers[None, :]) & np.uint64(1) == 1] = -np.inf
+        for slot in range(int(missing.max())):
+            needed = missing > slot
+            best = np.argmax(keys[needed], axis=1)
+            masks[rows[needed]] |= np.uint64(1) << numbers[best]
+            keys[np.flatnonzero(needed), best] = -np.inf
+
+def chunk_streams(n, seed=None, chunk_size=CHUNK_SIZE):
+    """Splits n tickets into (start, count, SeedSequence) chunks, one independent stream each."""
+    # The chunks, and the stream spawned from the root seed for each, depend only on n, the
+    # seed and the chunk size, so whoever generates a chunk produces the same tickets
+    starts = range(0, n, chunk_size)
+    children = np.random.SeedSequence(seed).spawn(len(starts))
+    return [(start, min(chunk_size, n - start), child) for start, child in zip(starts, children)]
+
+def generate_batch(n, damping_factor=0.8, lucky_numbers=None, seed=None, stats=None, weights=None):
+    """Generates n v9 tickets as an (n, 7) uint8 array."""
+    generator = BatchGenerator(stats or get_statistics(), damping_factor, lucky_numbers, weights)
+    tickets = np.empty((n, 7), dtype=np.uint8)
+    # Work through the tickets in chunks small enough for the working arrays to stay in cache
+    for start, count, seed_sequence in chunk_streams(n, seed):
+        tickets[start:start + count] = generator.chunk(count, seed_sequence)
+    return tickets
+
+_worker_stats = None  # set in each worker process by _init_worker
+_worker_generators = OrderedDict()  # (damping factor, lucky numbers, weights) -> BatchGenerator, per worker
+
+def _init_worker(shared_name):
+    global _worker_stats
+    _worker_stats = attach_statistics(shared_name)
+
+def _generate_chunk(count, damping_factor, lucky_numbers, weights, seed_sequence):
+    key = (damping_factor, lucky_numbers, weights)
+    generator = _worker_generators.get(key)
+    if generator is None:
+        generator = _worker_generators[key] = BatchGenerator(_worker_stats, damping_factor, lucky_numbers, weights)
+        while len(_worker_generators) > GENERATOR_CACHE_SIZE:
+            _worker_generators.popitem(last=False)
+    _worker_generators.move_to_end(key)
+    return generator.chunk(count, seed_sequence)
+
+class BatchPool:
+    """A process pool kept open across batches, its workers reading the tables from shared memory."""
+
+    def __init__(self, stats, workers=None, mp_context=None):
+        # The tables are published once into shared memory and every worker reads them in
+        # place (lotto_max_shared.py), instead of each receiving and unpickling its own copy
+        self.shared = SharedStatistics(stats.tables)
+        self.executor = ProcessPoolExecutor(workers, mp_context=mp_context, initializer=_init_worker, initargs=(self.shared.name,))
+
+    def submit(self, count, damping_factor, lucky_numbers, seed_sequence, weights=None):
+        """Returns a Future for one chunk of tickets, as BatchGenerator.chunk would generate it."""
+        return self.executor.submit(_generate_chunk, count, damping_factor, tuple(lucky_numbers or ()),
+                                    tuple(weights or DEFAULT_WEIGHTS), seed_sequence)
+
+    def close(self):
+        """Waits for the submitted chunks, stops the workers and releases the shared tables."""
+        self.executor.shutdown()
+        self.shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def generate_parallel(n, damping_factor=0.8, lucky_numbers=None, seed=None, stats=None, workers=None, mp_context=None,
+                      weights=None):
+    """Generates n v9 tickets across a process pool; the result does not depend on the worker count."""
+    tickets = np.empty((n, 7), dtype=np.uint8)
+    with BatchPool(stats or get_statistics(), workers, mp_context) as pool:
+        futures = [
+            (start, count, pool.submit(count, damping_factor, lucky_numbers, seed_sequence, weights))
+            for start, count, seed_sequence in chunk_streams(n, seed)
+        ]
+        for start, count, future in futures:
+            tickets[start:start + count] = future.result()
+    return tickets
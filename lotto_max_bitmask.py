@@ -0,0 +1,137 @@
+# Bitmask representation of tickets and combinations.
+# A set of Lotto Max numbers (1-50) is stored as a single int with bit n set for number n,
+# so it always fits in 64 bits. Size is a popcount, "no number in common" is a single AND,
+# and adding a combination to a ticket is a single OR, instead of building Python sets and
+# testing membership number by number. CombinationIndex picks a combination that avoids a
+# ticket's numbers without scanning the whole table; when rejection draws keep clashing, it
+# chooses exactly by inclusion-exclusion over the subsets of the ticket's numbers.
+
+#   mask = to_mask([3, 11, 23])
+#   size(mask) == 3; from_mask(mask) == [3, 11, 23]; disjoint(mask, to_mask([4, 5]))
+
+from bisect import bisect, bisect_left
+from collections import namedtuple
+from itertools import accumulate, combinations
+import random
+
+ALL_NUMBERS = sum(1 << n for n in range(1, 51))
+
+# A combination table as parallel lists: one mask and one frequency per entry, plus the
+# number of numbers in each entry (2 for pairs, 3 for triplets, 4 for quads)
+CombinationMasks = namedtuple("CombinationMasks", ["masks", "frequencies", "size"])
+
+def to_mask(numbers):
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+    return mask
+
+def from_mask(mask):
+    """Returns the numbers in a mask, ascending."""
+    numbers = []
+    while mask:
+        low_bit = mask & -mask
+        numbers.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return numbers
+
+def size(mask):
+    return mask.bit_count()
+
+def disjoint(mask, other):
+    return not mask & other
+
+def combination_masks(table):
+    """Converts a list of Combination records into CombinationMasks."""
+    return CombinationMasks(
+        masks=[to_mask(combination.numbers) for combination in table],
+        frequencies=[combination.frequency for combination in table],
+        size=len(table[0].numbers) if table else 0,
+    )
+
+class CombinationIndex:
+    """Index from number to the entries of one combination table that contain it."""
+
+    def __init__(self, set_masks):
+        self.masks = set_masks.masks
+        self.frequencies = set_masks.frequencies
+        self.size = set_masks.size
+        self.cum_weights = list(accumulate(set_masks.frequencies))
+        self.total_weight = self.cum_weights[-1] if self.cum_weights else 0
+        self.all_entries = (1 << len(self.masks)) - 1
+        # containing[n] has bit i set when entry i contains number n. Each bitmap is built
+        # as bytes and converted once; OR-ing bits into an int one by one would be quadratic.
+        bitmaps = [bytearray((len(self.masks) + 7) // 8) for _ in range(51)]
+        for i, mask in enumerate(self.masks):
+            for number in from_mask(mask):
+                bitmaps[number][i >> 3] |= 1 << (i & 7)
+        self.containing = [int.from_bytes(bitmap, "little") for bitmap in bitmaps]
+        self.subsets = None  # built by choose_exact() on first use
+
+    def conflicts(self, numbers_mask):
+        """Returns the bitmap of entries sharing a number with numbers_mask: one OR per number."""
+        blocked = 0
+        for number in from_mask(numbers_mask):
+            blocked |= self.containing[number]
+        return blocked
+
+    def choose(self, numbers_mask, rng=random, max_tries=16):
+        """Returns the index of a frequency-weighted entry sharing no number with numbers_mask, or None."""
+        if not self.total_weight:
+            return None
+        # Draw from the whole table and reject clashes: with a ticket of at most 7 numbers
+        # most of the weight is usually still available, so this rarely takes more than a
+        # couple of tries and never looks at the rest of the table
+        last = len(self.masks) - 1
+        for _ in range(max_tries):
+            i = bisect(self.cum_weights, rng.random() * self.total_weight, 0, last)
+            if not self.masks[i] & numbers_mask:
+                return i
+        # Most of the weight is blocked: choose exactly among the entries that are left
+        return self.choose_exact(numbers_mask, rng)
+
+    def choose_exact(self, numbers_mask, rng=random):
+        """Like choose(), without rejection; the cost grows with the numbers, not the table."""
+        # By inclusion-exclusion, the blocked weight of entries[:p] is the signed sum over the
+        # subsets of the numbers of the weight of entries[:p] holding the whole subset
+        subsets, numbers, terms = self._subset_index(), from_mask(numbers_mask), []
+        for count in range(1, min(len(numbers), self.size) + 1):
+            for combination in combinations(numbers, count):
+                held = subsets.get(to_mask(combination))
+                if held:
+                    terms.append((held[0], held[1], 1 if count % 2 else -1))
+
+        def free_before(p):
+            blocked = sum(sign * cum[bisect_left(entries, p)] for entries, cum, sign in terms)
+            return (self.cum_weights[p - 1] if p else 0) - blocked
+
+        free_weight = free_before(len(self.masks))
+        if free_weight <= 0:
+            return None
+        target = rng.random() * free_weight
+        # Bisect for the entry whose range of free weight holds the target
+        low, high = 0, len(self.masks)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if free_before(middle) <= target:
+                low = middle
+            else:
+                high = middle
+        while self.masks[low] & numbers_mask or not self.frequencies[low]:
+            low -= 1  # rounding put the target on the end of the chosen entry's range
+        return low
+
+    def _subset_index(self):
+        """Maps each subset of an entry's numbers to (entries holding it, cumulative weights)."""
+        if self.subsets is None:
+            entries = {}
+            for i, mask in enumerate(self.masks):
+                subset = mask
+                while subset:
+                    entries.setdefault(subset, []).append(i)
+                    subset = (subset - 1) & mask
+            self.subsets = {
+                subset: (held, list(accumulate((self.frequencies[i] for i in held), initial=0)))
+                for subset, held in entries.items()
+            }
+        return self.subsets
@@ -0,0 +1,147 @@
+# On-disk response cache for LottoMaxScraper.
+# The statistics pages only change after a draw (Tuesday and Friday), so a page fetched
+# since the most recent draw's cutoff, and within the last `ttl` seconds, is served straight
+# from disk without touching the network. A page fetched before the cutoff holds the
+# previous draw's statistics however young it is. Once an entry expires the scraper
+# revalidates it with If-None-Match / If-Modified-Since, and a 304 answer keeps the stored
+# body. The cache directory is bounded to `max_bytes`; the least recently used entries are
+# evicted first.
+
+#   scraper = LottoMaxScraper(cache=ResponseCache(ttl=6 * 3600))
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "lotto_max")
+
+# Lotto Max is drawn Tuesday and Friday at 22:30 Eastern; 04:00 UTC the next day is safely
+# after the draw in both EST and EDT, and is when the website statistics change.
+DRAW_WEEKDAYS_UTC = (2, 5)  # Wednesday, Saturday
+DRAW_CUTOFF_UTC = datetime.time(4, 0)
+
+def most_recent_draw(now=None):
+    """Returns the UTC datetime after which the latest draw's statistics are available."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    for days_back in range(8):
+        day = (now - datetime.timedelta(days=days_back)).date()
+        cutoff = datetime.datetime.combine(day, DRAW_CUTOFF_UTC, tzinfo=datetime.timezone.utc)
+        if day.weekday() in DRAW_WEEKDAYS_UTC and cutoff <= now:
+            return cutoff
+
+def next_draw(now=None):
+    """Returns the UTC datetime at which the next draw's statistics become available."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    for days_ahead in range(8):
+        day = (now + datetime.timedelta(days=days_ahead)).date()
+        cutoff = datetime.datetime.combine(day, DRAW_CUTOFF_UTC, tzinfo=datetime.timezone.utc)
+        if day.weekday() in DRAW_WEEKDAYS_UTC and cutoff > now:
+            return cutoff
+
+class ResponseCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=12 * 3600, max_bytes=16 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl  # at most, seconds an entry is served without revalidation
+        self.max_bytes = max_bytes  # total size of the cache directory before eviction
+        self.hits = 0  # served from disk, no request made
+        self.misses = 0  # full download (no entry, or the server sent a new page)
+        self.revalidations = 0  # expired entry confirmed unchanged by a 304
+        self.evictions = 0
+        self.lock = threading.Lock()  # fetch_all() uses the cache from several threads
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, url):
+        """Returns the file the entry for a URL is stored in."""
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def lookup(self, url):
+        """Returns the stored entry for a URL, or None if it has not been cached."""
+        path = self.path(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry, now=None):
+        """True when the entry is younger than the TTL and was fetched after the most recent draw."""
+        now = time.time() if now is None else now
+        draw = most_recent_draw(datetime.datetime.fromtimestamp(now, datetime.timezone.utc))
+        return now - entry["fetched_at"] < self.ttl and entry["fetched_at"] >= draw.timestamp()
+
+    def conditional_headers(self, entry):
+        """Builds the revalidation headers for an expired entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, body, headers):
+        """Writes a downloaded page to disk and evicts old entries if over the size bound."""
+        entry = {
+            "url": url,
+            "fetched_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "body": body,
+        }
+        self._write(url, entry)
+        self.evict()
+        return entry
+
+    def refresh(self, url, entry):
+        """Restarts the TTL of an entry the server reported as unchanged."""
+        entry["fetched_at"] = time.time()
+        self._write(url, entry)
+        return entry
+
+    def _write(self, url, entry):
+        path = self.path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)  # readers never see a half-written entry
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        with self.lock:
+            files = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    files.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in files)
+            for _, size, name in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+                self.evictions += 1
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        """Returns the hit/miss counters since this cache object was created."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,182 @@
+# Checking stored tickets against draw results.
+# check() scores every ticket of a store against one or more draws: the main draw (7
+# numbers and a bonus) and any MAXMILLIONS draws (7 numbers, no bonus, only a full match
+# wins). A store is a packed rank file (lotto_max_packed.py), a memory-mapped file of
+# 7-byte binary rows (lotto_max_cli.py --format binary), or an array of tickets or masks.
+# The tickets are read one chunk at a time and turned into uint64 masks (bit n for number
+# n) once per chunk; each draw then costs an AND and a popcount per ticket, so memory
+# stays bounded by the chunk and every draw is scored from the same masks. For each draw
+# the result holds the (matches, bonus hit) histogram, the count per prize tier, and the
+# positions of the winning tickets in the store with their tier (for a packed file,
+# positions in rank order: packed.tickets(i, i + 1) or packed.metadata[i]).
+
+#   results = check(open_store("tickets.lmxp"), [Draw(None, (3, 11, 23, 28, 34, 41, 47), 49)])
+#   python lotto_max_checker.py tickets.lmxp 3,11,23,28,34,41,47+49 [5,8,13,21,30,38,44 ...]
+#   python lotto_max_checker.py tickets.bin                 # the latest draw in the draw history
+
+from collections import namedtuple
+import sys
+import time
+import numpy as np
+from lotto_max_bitmask import from_mask, to_mask
+from lotto_max_history import DrawHistory
+from lotto_max_packed import MAGIC, PackedTickets, open_packed
+from lotto_max_parser import Draw
+from lotto_max_rank import unrank_masks
+
+CHUNK_SIZE = 1 << 20  # tickets scored at once; about 16 MB of masks and scores
+
+# Lotto Max prize tiers, best first: (name, matches, bonus number needed). A ticket is in
+# the first tier it qualifies for; 3/7 wins a free play. A draw without a bonus number
+# (MAXMILLIONS) only pays 7/7.
+PRIZE_TIERS = [
+    ("7/7", 7, False),
+    ("6/7+bonus", 6, True),
+    ("6/7", 6, False),
+    ("5/7+bonus", 5, True),
+    ("5/7", 5, False),
+    ("4/7+bonus", 4, True),
+    ("4/7", 4, False),
+    ("3/7+bonus", 3, True),
+    ("3/7", 3, False),
+]
+# BYTE_BITS[n] is the mask of number n (0 past 63); PAIR_BITS[a + 256 * b] that of a and b, so
+# two bytes of a binary row are looked up at once
+BYTE_BITS = np.where(np.arange(256) < 64, np.uint64(1) << (np.arange(256, dtype=np.uint64) & np.uint64(63)), np.uint64(0))
+PAIR_BITS = BYTE_BITS[np.arange(1 << 16) & 255] | BYTE_BITS[np.arange(1 << 16) >> 8]
+
+# histogram is the (8, 2) count of tickets by matches and bonus hit, tiers the count per
+# PRIZE_TIERS entry, winners the store positions of the tickets in a tier and
+# winner_tiers the index of that tier
+CheckResult = namedtuple("CheckResult", ["draw", "histogram", "tiers", "winners", "winner_tiers"])
+
+def tier_table(has_bonus=True):
+    """Returns a table from matches * 2 + bonus hit to the PRIZE_TIERS index, or -1 for no prize."""
+    table = np.full(16, -1, dtype=np.int8)
+    for index, (_, matches, needs_bonus) in reversed(list(enumerate(PRIZE_TIERS))):
+        if not has_bonus and matches < 7:
+            continue
+        table[matches * 2 + 1] = index  # a bonus hit qualifies for both tiers; the better one wins
+        if not needs_bonus:
+            table[matches * 2] = index
+    return table
+
+def rows_to_masks(rows):
+    """Converts an (n, 7) array of numbers into uint64 masks."""
+    rows = np.ascontiguousarray(rows, dtype=np.uint8)
+    masks = BYTE_BITS[rows[:, 6]]
+    flat = rows.reshape(-1)
+    for column in (0, 2, 4):
+        if not len(rows):
+            break
+        # Columns column and column + 1 of every row, read as one little-endian uint16
+        pairs = np.ndarray(len(rows), dtype="<u2", buffer=flat, offset=column, strides=7)
+        masks |= PAIR_BITS[pairs]
+    return masks
+
+def open_store(path):
+    """Opens a packed file, or memory-maps a file of 7-byte binary rows, without reading it."""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:  # a binary row starts with a number from 1 to 50, never with "L"
+        return open_packed(path)
+    rows = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(rows) % 7:
+        raise ValueError(f"{path} is neither a packed file nor 7-byte ticket rows")
+    return rows.reshape(-1, 7)
+
+def mask_chunks(store, chunk_size=CHUNK_SIZE):
+    """Yields (start position, uint64 masks) for consecutive chunks of a ticket store."""
+    if isinstance(store, PackedTickets):
+        tickets, convert = store.ranks, lambda ranks: unrank_masks(ranks, is_sorted=True)
+    else:
+        tickets = np.asarray(store)
+        convert = rows_to_masks if tickets.ndim == 2 else (lambda masks: masks.astype(np.uint64, copy=False))
+    for start in range(0, len(tickets), chunk_size):
+        yield start, convert(tickets[start:start + chunk_size])
+
+def ticket_at(store, position):
+    """Returns the numbers of the ticket at a position of a store."""
+    if isinstance(store, PackedTickets):
+        return store.tickets(position, position + 1)[0].tolist()
+    tickets = np.asarray(store)
+    return from_mask(int(tickets[position])) if tickets.ndim == 1 else sorted(tickets[position].tolist())
+
+def check(store, draws, chunk_size=CHUNK_SIZE):
+    """Scores every ticket in store against each Draw (bonus None for MAXMILLIONS) and returns a CheckResult per draw."""
+    draws = list(draws)
+    winning_masks = [np.uint64(to_mask(draw.numbers)) for draw in draws]
+    bonus_bits = [np.uint64(1 << (draw.bonus or 0)) for draw in draws]
+    tables = [tier_table(draw.bonus is not None) for draw in draws]
+    histograms = [np.zeros(16, dtype=np.int64) for _ in draws]
+    winners = [[] for _ in draws]
+    winner_tiers = [[] for _ in draws]
+    for start, masks in mask_chunks(store, chunk_size):
+        for i, draw in enumerate(draws):
+            codes = np.bitwise_count(masks & winning_masks[i]) << np.uint8(1)
+            if draw.bonus is not None:
+                codes |= ((masks & bonus_bits[i]) != 0).view(np.uint8)
+            histograms[i] += np.bincount(codes, minlength=16)
+            # Only 3 or more matches can win, a few percent of tickets; look their tiers up alone
+            positions = np.flatnonzero(codes >= 6)
+            chunk_tiers = tables[i][codes[positions]]
+            keep = chunk_tiers >= 0
+            winners[i].append(positions[keep] + start)
+            winner_tiers[i].append(chunk_tiers[keep])
+    results = []
+    for i, draw in enumerate(draws):
+        histogram = histograms[i].reshape(8, 2)
+        draw_winners = np.concatenate(winners[i]) if winners[i] else np.zeros(0, dtype=np.intp)
+        draw_tiers = np.concatenate(winner_tiers[i]) if winner_tiers[i] else np.zeros(0, dtype=np.int8)
+        tiers = np.bincount(draw_tiers, minlength=len(PRIZE_TIERS)) if len(draw_tiers) else np.zeros(len(PRIZE_TIERS), dtype=np.int64)
+        results.append(CheckResult(draw, histogram, tiers, draw_winners, draw_tiers))
+    return results
+
+def parse_draw(text):
+    """Parses "3,11,23,28,34,41,47+49" (or without "+bonus" for a MAXMILLIONS draw) into a Draw."""
+    numbers, _, bonus = text.partition("+")
+    numbers = tuple(sorted(int(number) for number in numbers.split(",")))
+    if len(numbers) != 7 or len(set(numbers)) != 7 or not all(1 <= number <= 50 for number in numbers):
+        raise ValueError(f"a draw is 7 distinct numbers between 1 and 50: {text}")
+    bonus = int(bonus) if bonus else None
+    if bonus is not None and (bonus in numbers or not 1 <= bonus <= 50):
+        raise ValueError(f"the bonus number is between 1 and 50 and not one of the 7: {text}")
+    return Draw(None, numbers, bonus)
+
+def format_result(result, store_size):
+    draw = result.draw
+    bonus = f" + {draw.bonus}" if draw.bonus is not None else " (MAXMILLIONS)"
+    lines = [f"{list(draw.numbers)}{bonus}: {len(result.winners)} winning tickets of {store_size}"]
+    for (name, _, _), count in zip(PRIZE_TIERS, result.tiers):
+        if count:
+            lines.append(f"  {name:<10}{count:>12}")
+    return "\n".join(lines)
+
+def main(argv):
+    if len(argv) < 2:
+        print("Usage: python lotto_max_checker.py TICKETS [3,11,23,28,34,41,47+49 ...]")
+        return 1
+    if len(argv) > 2:
+        draws = [parse_draw(text) for text in argv[2:]]
+    else:
+        history = DrawHistory()
+        if not len(history):
+            print(f"No draws in {history.path}; pass the winning numbers or run 'python lotto_max_history.py update'.")
+            return 1
+        draws = [history.draws[-1]]
+    store = open_store(argv[1])
+    start = time.perf_counter()
+    results = check(store, draws)
+    elapsed = time.perf_counter() - start
+    for result in results:
+        print(format_result(result, len(store)))
+        # The ten best winners of 5/7 or better, best tier first and in store order within a tier
+        order = np.argsort(result.winner_tiers, kind="stable")
+        best = order[result.winner_tiers[order] <= 4][:10]
+        for position, tier in zip(result.winners[best], result.winner_tiers[best]):
+            print(f"  {PRIZE_TIERS[tier][0]:<10}#{position}: {ticket_at(store, position)}")
+    print(f"Checked {len(store)} tickets against {len(draws)} draws in {elapsed:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
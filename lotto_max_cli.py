@@ -0,0 +1,207 @@
+# Non-interactive ticket generation for scripts and scheduled jobs.
+# The generators' generate_ticket() functions ask their questions through input() and print
+# one ticket at a time. This entry point takes everything as arguments and streams the
+# tickets to stdout or a file, one chunk at a time, so memory stays bounded however many
+# tickets are asked for. v9 runs on the batch generator (lotto_max_batch.py; the same seed
+# gives the same tickets as generate_batch), the other strategies call their own
+# generate_lotto_max_set with their progress messages silenced. Each chunk is encoded in one
+# go and written as one block:
+#   csv     one ticket per line: 3,11,23,28,34,41,47
+#   jsonl   one JSON array per line: [3,11,23,28,34,41,47]
+#   binary  7 bytes per ticket, the numbers in ascending order
+#   packed  a sorted, searchable file of 4-byte ranks (lotto_max_packed.py); needs -o, and
+#           holds the run's ranks in memory to sort them (8 bytes per ticket at the peak)
+# With --unique no ticket is written twice (lotto_max_unique.py): repeats are dropped as they
+# come and more tickets are drawn until the count is reached, and the number of duplicates
+# rejected is reported on stderr.
+
+#   python lotto_max_cli.py -n 10 --lucky 7,14
+#   python lotto_max_cli.py -n 10000000 --seed 2024 --format binary -o tickets.bin
+#   python lotto_max_cli.py -n 1000 --strategy v5 --damping 0.5 --format jsonl
+#   python lotto_max_cli.py -n 10000000 --seed 2024 --format packed -o tickets.lmxp
+#   python lotto_max_cli.py -n 100000 --strategy v4 --unique -o tickets.csv
+
+import argparse
+import contextlib
+import importlib
+import os
+import random
+import sys
+import time
+import numpy as np
+from lotto_max_batch import BatchGenerator, chunk_streams
+from lotto_max_packed import pack_chunks
+from lotto_max_rank import rank_tickets
+from lotto_max_stats import get_statistics
+from lotto_max_unique import TicketSet
+
+# Strategy name -> generator module. v3 and v4 use raw frequencies, with no damping factor
+GENERATORS = {
+    "v3": "generator_v3_good",
+    "v4": "generator_v4",
+    "v5": "generator_v5",
+    "v6": "generator_v6",
+    "v7": "generator_v7",
+    "v8": "generator_v8",
+    "v9": "generator_v9_good",
+}
+UNDAMPED = {"v3", "v4"}
+SCALAR_CHUNK = 4096  # tickets per chunk for the one-ticket-at-a-time strategies
+WRITE_BUFFER = 1 << 20
+DRAWS_PER_UNIQUE = 10  # --unique gives up after drawing this many times the count asked for
+
+class TextFormat:
+    """Encodes tickets as lines of text, all rows of a chunk at once."""
+
+    def __init__(self, prefix, separator, suffix):
+        # Every number takes two digit columns in a fixed row template; numbers below 10 then
+        # drop their leading zero when the rows are flattened
+        template = bytearray(prefix)
+        self.tens_columns = []
+        for column in range(7):
+            self.tens_columns.append(len(template))
+            template += b"00"
+            template += separator if column < 6 else suffix
+        self.template = np.frombuffer(bytes(template), dtype=np.uint8)
+        self.tens_columns = np.array(self.tens_columns)
+
+    def encode(self, tickets):
+        rows = np.tile(self.template, (len(tickets), 1))
+        tens, ones = np.divmod(tickets, 10)
+        rows[:, self.tens_columns] += tens
+        rows[:, self.tens_columns + 1] += ones
+        keep = np.ones(rows.shape, dtype=bool)
+        keep[:, self.tens_columns] = tens > 0
+        return rows[keep].tobytes()
+
+class BinaryFormat:
+    def encode(self, tickets):
+        return np.ascontiguousarray(tickets, dtype=np.uint8).tobytes()
+
+FORMATS = {
+    "csv": TextFormat(b"", b",", b"\n"),
+    "jsonl": TextFormat(b"[", b",", b"]\n"),
+    "binary": BinaryFormat(),
+}
+
+def ticket_chunks(count, strategy="v9", damping_factor=0.8, lucky_numbers=None, seed=None, stats=None):
+    """Yields count tickets as (n, 7) uint8 arrays of a bounded number of rows."""
+    if strategy == "v9":
+        generator = BatchGenerator(stats or get_statistics(), damping_factor, lucky_numbers)
+        for _, chunk_count, seed_sequence in chunk_streams(count, seed):
+            yield generator.chunk(chunk_count, seed_sequence)
+        return
+    module = importlib.import_module(GENERATORS[strategy])
+    stats = stats or module.stats
+    run_state = random.Random(seed).getstate()  # this run's stream, kept apart from the caller's
+    frequency_table = stats.frequency_table
+    arguments = (frequency_table,) if strategy in UNDAMPED else (frequency_table, damping_factor)
+    for start in range(0, count, SCALAR_CHUNK):
+        chunk_count = min(SCALAR_CHUNK, count - start)
+        # The generator reads its combination tables from its module's provider and draws from
+        # the global random module: lend it this provider and the run's random state while the
+        # chunk is drawn, so nothing else sees them between chunks
+        previous, module.stats = module.stats, stats
+        caller_state = random.getstate()
+        random.setstate(run_state)
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                tickets = [module.generate_lotto_max_set(*arguments, list(lucky_numbers or ()) or None) for _ in range(chunk_count)]
+        finally:
+            run_state = random.getstate()
+            random.setstate(caller_state)
+            module.stats = previous
+        yield np.array(tickets, dtype=np.uint8)
+
+def unique_ticket_chunks(count, strategy="v9", damping_factor=0.8, lucky_numbers=None, seed=None, stats=None, seen=None):
+    """Yields up to count distinct tickets as (n, 7) uint8 arrays, recording them in seen (a TicketSet)."""
+    seen = TicketSet() if seen is None else seen
+    # The first round is the run ticket_chunks would give, with its repeats dropped; each
+    # top-up round draws as many tickets as are still missing, on a seed derived from the run's.
+    # The weighted strategies only reach a few million distinct tickets in practice (a handful
+    # with v4 or many lucky numbers), so the draws are bounded rather than the rounds
+    missing, round_number, drawn = count, 0, 0
+    while missing > 0 and drawn < DRAWS_PER_UNIQUE * count:
+        if round_number == 0:
+            round_count, round_seed = count, seed
+        else:
+            round_count = max(missing, SCALAR_CHUNK)
+            round_seed = None if seed is None else int(np.random.SeedSequence([seed, round_number]).generate_state(1)[0])
+        for tickets in ticket_chunks(round_count, strategy, damping_factor, lucky_numbers, round_seed, stats):
+            keep = seen.add(rank_tickets(tickets), limit=missing)
+            if keep.any():
+                yield tickets[keep]
+            drawn += len(tickets)
+            missing -= int(np.count_nonzero(keep))
+            if not missing:
+                break
+        round_number += 1
+
+def write_tickets(output, chunks, format_name="csv"):
+    """Encodes and writes each chunk as it comes; returns the number of tickets written."""
+    encoder = FORMATS[format_name]
+    written = 0
+    for tickets in chunks:
+        output.write(encoder.encode(tickets))
+        written += len(tickets)
+    return written
+
+def lucky_numbers_argument(text):
+    numbers = [int(number) for number in text.split(",") if number.strip()]
+    if len(numbers) > 7 or len(set(numbers)) != len(numbers) or not all(1 <= number <= 50 for number in numbers):
+        raise argparse.ArgumentTypeError("expected up to 7 distinct numbers between 1 and 50, e.g. 7,14,21")
+    return numbers
+
+def damping_argument(text):
+    damping_factor = float(text)
+    if not 0 <= damping_factor <= 1:
+        raise argparse.ArgumentTypeError("the damping factor is between 0 and 1")
+    return damping_factor
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Generate Lotto Max tickets without prompts.")
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of tickets (default 1)")
+    parser.add_argument("-d", "--damping", type=damping_argument, default=0.8, help="damping factor, 0 to 1 (default 0.8)")
+    parser.add_argument("-l", "--lucky", type=lucky_numbers_argument, default=[], help="lucky numbers on every ticket, e.g. 7,14")
+    parser.add_argument("-s", "--strategy", choices=sorted(GENERATORS), default="v9", help="generator version (default v9)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("-f", "--format", choices=sorted([*FORMATS, "packed"]), default="csv", help="output format (default csv)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default stdout)")
+    parser.add_argument("-u", "--unique", action="store_true", help="never write the same ticket twice")
+    args = parser.parse_args(argv)
+    if args.format == "packed" and args.output == "-":
+        parser.error("the packed format is sorted and memory-mapped, so it needs an output file (-o)")
+    return args
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    seen = TicketSet() if args.unique else None
+    if args.unique:
+        chunks = unique_ticket_chunks(args.count, args.strategy, args.damping, args.lucky, args.seed, seen=seen)
+    else:
+        chunks = ticket_chunks(args.count, args.strategy, args.damping, args.lucky, args.seed)
+    start = time.perf_counter()
+    try:
+        if args.format == "packed":
+            written = pack_chunks(args.output, chunks)
+            print(f"Wrote {written} tickets to {args.output} in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+        elif args.output == "-":
+            written = write_tickets(sys.stdout.buffer, chunks, args.format)
+            sys.stdout.flush()
+        else:
+            with open(args.output, "wb", buffering=WRITE_BUFFER) as output:
+                written = write_tickets(output, chunks, args.format)
+            print(f"Wrote {written} tickets to {args.output} in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    if seen is not None:
+        print(f"Rejected {seen.rejected} duplicate tickets", file=sys.stderr)
+        if written < args.count:
+            print(f"Only {written} distinct tickets of {args.count}: the {args.strategy} strategy keeps repeating the same ones", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
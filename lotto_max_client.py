@@ -0,0 +1,149 @@
+# Thin client for the ticket daemon (lotto_max_daemon.py).
+# Imports nothing but the standard library, so a run costs little more than starting
+# Python: it sends one request over the daemon's Unix socket and copies the tickets to
+# stdout. When no daemon is listening it starts one in the background and waits for it,
+# so only the first run pays for loading the statistics.
+# With no arguments it asks the same questions as generator_v9_good.py.
+
+#   python lotto_max_client.py                       # interactive
+#   python lotto_max_client.py -n 5 --lucky 7,14 --damping 0.7
+#   python lotto_max_client.py -n 1000000 --seed 2024 --format binary > tickets.bin
+#   python lotto_max_client.py --status | --stop
+
+import argparse
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".cache", "lotto_max", "daemon.sock")  # as in lotto_max_daemon.py
+DAEMON_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lotto_max_daemon.py")
+START_TIMEOUT = 120  # seconds; the first start may have to scrape the statistics
+READ_SIZE = 1 << 16
+
+class ClientError(Exception):
+    pass
+
+def connect(socket_path=DEFAULT_SOCKET_PATH):
+    sock = socket.socket(socket.AF_UNIX)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def start_daemon(socket_path=DEFAULT_SOCKET_PATH, timeout=START_TIMEOUT):
+    """Starts a daemon in the background and returns a connection once it is listening."""
+    log_path = os.path.splitext(socket_path)[0] + ".log"
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen([sys.executable, DAEMON_SCRIPT, socket_path], stdin=subprocess.DEVNULL,
+                                   stdout=log, stderr=log, start_new_session=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return connect(socket_path)
+        except OSError:
+            # Exits at once when another client started a daemon first; keep waiting for that one
+            if time.monotonic() > deadline:
+                raise ClientError(f"the daemon did not start within {timeout} s; see {log_path}")
+            if process.poll() not in (None, 0) and not os.path.exists(socket_path):
+                raise ClientError(f"the daemon failed to start; see {log_path}")
+            time.sleep(0.05)
+
+def request(message, output, socket_path=DEFAULT_SOCKET_PATH, start=True):
+    """Sends one request and copies the answer to output (a binary file)."""
+    try:
+        sock = connect(socket_path)
+    except OSError:
+        if not start:
+            raise ClientError(f"no daemon is listening on {socket_path}")
+        sock = start_daemon(socket_path)
+    with sock:
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        reader = sock.makefile("rb")
+        status = reader.readline()
+        if not status.startswith(b"OK"):
+            raise ClientError(status.decode(errors="replace").strip().removeprefix("ERROR ") or "the daemon closed the connection")
+        # A daemon failing after OK cuts the stream short: count what arrives (7-byte binary rows, or lines)
+        binary = message.get("format") == "binary"
+        received = 0
+        while True:
+            data = reader.read1(READ_SIZE)
+            if not data:
+                break
+            output.write(data)
+            received += len(data) if binary else data.count(b"\n")
+        tickets = received // 7 if binary else received
+        if "count" in message and tickets != message["count"]:
+            raise ClientError(f"the daemon stopped after {tickets} of {message['count']} tickets")
+
+def interactive(socket_path=DEFAULT_SOCKET_PATH, start=True):
+    try:
+        count = int(input("How many tickets would you like to generate? "))
+    except ValueError:
+        count = 1
+    try:
+        custom_damping = input("Enter a damping factor (press Enter to use default 0.8): ")
+        damping_factor = float(custom_damping) if custom_damping else 0.8
+    except ValueError:
+        damping_factor = 0.8
+    while True:
+        try:
+            lucky_numbers = lucky_numbers_argument(input("Enter up to 7 lucky numbers, separated by commas (press Enter for none): "))
+            break
+        except argparse.ArgumentTypeError as error:
+            print(f"{str(error).capitalize()}.")
+    output = io.BytesIO()
+    request({"count": count, "damping": damping_factor, "lucky": lucky_numbers, "format": "jsonl"}, output, socket_path, start)
+    for i, ticket in enumerate(json.loads(line) for line in output.getvalue().splitlines()):
+        print(f"\nTicket {i + 1}: Your Lotto Max Numbers: {ticket}")
+
+def lucky_numbers_argument(text):
+    try:
+        numbers = [int(number) for number in text.split(",") if number.strip()]
+    except ValueError:
+        numbers = None
+    if numbers is None or len(numbers) > 7 or len(set(numbers)) != len(numbers) or not all(1 <= number <= 50 for number in numbers):
+        raise argparse.ArgumentTypeError("expected up to 7 distinct numbers between 1 and 50, e.g. 7,14,21")
+    return numbers
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Get Lotto Max tickets from the resident daemon.")
+    parser.add_argument("-n", "--count", type=int, help="number of tickets; without it, ask interactively")
+    parser.add_argument("-d", "--damping", type=float, default=0.8, help="damping factor, 0 to 1 (default 0.8)")
+    parser.add_argument("-l", "--lucky", type=lucky_numbers_argument, default=[], help="lucky numbers on every ticket, e.g. 7,14")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("-f", "--format", choices=["binary", "csv", "jsonl"], default="csv", help="output format (default csv)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="daemon socket path")
+    parser.add_argument("--no-start", action="store_true", help="fail instead of starting a daemon")
+    parser.add_argument("--status", action="store_true", help="show the daemon's status")
+    parser.add_argument("--stop", action="store_true", help="stop the daemon")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    start = not args.no_start
+    try:
+        if args.status or args.stop:
+            request({"command": "status" if args.status else "stop"}, sys.stdout.buffer, args.socket, start=False)
+        elif args.count is None:
+            interactive(args.socket, start)
+        else:
+            message = {"count": args.count, "damping": args.damping, "lucky": args.lucky, "seed": args.seed, "format": args.format}
+            request(message, sys.stdout.buffer, args.socket, start)
+        sys.stdout.flush()
+    except ClientError as error:
+        print(f"lotto_max_client: {error}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
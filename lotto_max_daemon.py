@@ -0,0 +1,299 @@
+# Resident ticket daemon for instant command-line runs.
+# Every run of a generator pays for starting Python, importing numpy and loading the
+# statistics before the first ticket. The daemon does that once: it loads the tables,
+# builds the v9 combination arrays and the alias table for the default damping factor, and
+# then answers requests from lotto_max_client.py over a Unix domain socket in a few
+# milliseconds. Every WATCH_INTERVAL seconds it checks the snapshot file. When another
+# process has rewritten it (a rebuilt snapshot, e.g. after `python lotto_max_snapshot.py
+# build` or a generator refreshing from the response cache), the daemon loads the new
+# tables off the event loop and swaps them in. When a draw has made the snapshot stale, or
+# another process has stored new statistics pages in the response cache (a scraper using
+# the cache directly), the daemon rebuilds the snapshot itself through the cache, which
+# triggers the same reload.
+
+# Protocol: the client sends one JSON line, e.g.
+#   {"count": 5, "damping": 0.8, "lucky": [7, 14], "seed": null, "format": "csv"}
+#   {"command": "status"}   {"command": "stop"}
+# and the daemon answers "OK\n" followed by the encoded tickets (or the status as JSON)
+# until it closes the connection, or "ERROR <message>\n". A failure once tickets have been
+# sent cuts the connection instead; the client then finds fewer tickets than it asked for.
+
+#   python lotto_max_daemon.py [socket_path]   # runs in the foreground; the client starts it when needed
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from lotto_max_batch import BatchGenerator, chunk_streams
+from lotto_max_cache import DEFAULT_CACHE_DIR, ResponseCache
+from lotto_max_cli import FORMATS
+from lotto_max_snapshot import DEFAULT_SNAPSHOT_PATH, build_snapshot, most_recent_draw
+from lotto_max_stats import StatisticsProvider
+
+DEFAULT_SOCKET_PATH = os.path.join(DEFAULT_CACHE_DIR, "daemon.sock")
+WATCH_INTERVAL = 1.0  # seconds between snapshot checks
+RETRY_DELAY = 10 * 60  # seconds before retrying a failed snapshot rebuild
+MAX_TICKETS = 10_000_000  # per request
+MAX_REQUEST_BYTES = 4096
+
+class DaemonError(ValueError):
+    pass
+
+class StreamError(Exception):
+    """Raised when generating fails after tickets were sent: the connection is cut, with no ERROR line."""
+
+def snapshot_signature(path):
+    """Returns what identifies one version of the snapshot file, or None when there is none."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # write_snapshot replaces the file, so a rebuild always changes the inode
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def statistics_pages():
+    """Returns the response cache files of the six statistics pages, as the default scraper stores them."""
+    from lotto_max_scraper import LottoMaxScraper  # requests and bs4, only needed for the URLs
+
+    scraper = LottoMaxScraper()
+    cache = ResponseCache()
+    return [cache.path(f"{scraper.base_url}{endpoint}") for endpoint in scraper.endpoints.values()]
+
+def pages_signature(paths):
+    """Returns what identifies the stored versions of cache entries (None for a missing one)."""
+    signature = []
+    for path in paths:
+        try:
+            # Storing an entry replaces its file; reading one only touches its mtime (for eviction)
+            signature.append(os.stat(path).st_ino)
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def load_provider(snapshot_path):
+    """Loads every table and the default v9 structures; returns (provider, snapshot signature)."""
+    signature = snapshot_signature(snapshot_path)
+    stats = StatisticsProvider(snapshot_path).warm_up()
+    BatchGenerator(stats)  # combination arrays and the 0.8 alias table, cached on the provider
+    # Loading a missing or stale snapshot rewrites it; the tables are then those of the new file
+    return stats, snapshot_signature(snapshot_path) if stats.snapshot is None else signature
+
+def parse_request(request):
+    """Returns (count, damping_factor, lucky_numbers, seed, format) from a ticket request."""
+    try:
+        count = int(request.get("count", 1))
+        damping_factor = float(request.get("damping", 0.8))
+        lucky_numbers = [int(number) for number in request.get("lucky") or ()]
+        seed = request.get("seed")
+        seed = None if seed is None else int(seed)
+    except (TypeError, ValueError):
+        raise DaemonError("count, damping, lucky and seed must be numbers")
+    output = request.get("format", "csv")
+    if not 1 <= count <= MAX_TICKETS:
+        raise DaemonError(f"count must be between 1 and {MAX_TICKETS}")
+    if not 0 <= damping_factor <= 1:
+        raise DaemonError("damping must be between 0 and 1")
+    if len(lucky_numbers) > 7 or len(set(lucky_numbers)) != len(lucky_numbers) or not all(1 <= x <= 50 for x in lucky_numbers):
+        raise DaemonError("lucky takes up to 7 distinct numbers between 1 and 50")
+    if seed is not None and seed < 0:
+        raise DaemonError("seed must not be negative")
+    if output not in FORMATS:
+        raise DaemonError(f"format must be one of {', '.join(FORMATS)}")
+    return count, damping_factor, lucky_numbers, seed, output
+
+async def read_request(reader):
+    """Returns the request sent on a connection as a dict."""
+    try:
+        request = json.loads(await reader.readline())  # readline raises ValueError past the limit
+    except ValueError:
+        request = None
+    if not isinstance(request, dict):
+        raise DaemonError(f"the request is one JSON object on one line of at most {MAX_REQUEST_BYTES} bytes")
+    return request
+
+class TicketDaemon:
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, snapshot_path=DEFAULT_SNAPSHOT_PATH):
+        self.socket_path = socket_path
+        self.snapshot_path = snapshot_path
+        self.stats = None
+        self.signature = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.requests = 0
+        self.rebuild_after = 0.0  # monotonic time before which a stale snapshot is not rebuilt again
+        self.pages = []  # response cache files of the statistics pages
+        self.pages_seen = ()  # their signature when the snapshot last matched them
+        self.server = None
+        self.stopped = None
+        # Chunks are generated here, one at a time, so a large request never blocks the loop
+        self.executor = ThreadPoolExecutor(1)
+
+    async def start(self):
+        """Loads the statistics and starts listening; fails if another daemon already is."""
+        self.stopped = asyncio.Event()
+        self.pages = await asyncio.get_running_loop().run_in_executor(None, statistics_pages)
+        await self.reload()
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)  # left behind by a daemon that did not shut down
+            else:
+                raise DaemonError(f"a daemon is already listening on {self.socket_path}")
+            finally:
+                probe.close()
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        self.server = await asyncio.start_unix_server(self.handle_connection, self.socket_path, limit=MAX_REQUEST_BYTES)
+        os.chmod(self.socket_path, 0o600)
+        return self.server
+
+    async def reload(self):
+        loop = asyncio.get_running_loop()
+        self.stats, self.signature = await loop.run_in_executor(None, load_provider, self.snapshot_path)
+        self.pages_seen = pages_signature(self.pages)  # a scrape while loading stores the pages itself
+        self.loaded_at = datetime.datetime.now(datetime.timezone.utc)
+        self.reloads += 1
+
+    async def watch(self):
+        """Reloads when the snapshot file changes, and rebuilds it when a draw has made it stale or
+        the cached statistics pages change."""
+        while not self.stopped.is_set():
+            try:
+                await asyncio.wait_for(self.stopped.wait(), WATCH_INTERVAL)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                if snapshot_signature(self.snapshot_path) != self.signature:
+                    await self.reload()
+                    print(f"Reloaded {self.snapshot_path}", file=sys.stderr)
+                elif self.is_stale() and time.monotonic() >= self.rebuild_after:
+                    # The rebuild revalidates every cached page fetched before the draw; until the
+                    # new data is loaded and postdates the draw, it is retried every RETRY_DELAY
+                    self.rebuild_after = time.monotonic() + RETRY_DELAY
+                    await self.rebuild()
+                elif pages_signature(self.pages) != self.pages_seen:
+                    print("Statistics pages changed in the response cache; rebuilding", file=sys.stderr)
+                    self.pages_seen = pages_signature(self.pages)  # once per change, even if the rebuild fails
+                    await self.rebuild()
+            except Exception as error:  # keep serving the tables already loaded
+                print(f"Reload failed: {error!r}", file=sys.stderr)
+
+    async def tickets(self, writer, count, damping_factor, lucky_numbers, seed, output):
+        """Writes count encoded tickets chunk by chunk, the same as generate_batch for the same seed."""
+        loop = asyncio.get_running_loop()
+        # Alias tables are shared with every request of the same damping factor and kept in
+        # frequency_arrays' LRU of ALIAS_CACHE_SIZE, so any number of distinct factors is bounded
+        generator = BatchGenerator(self.stats, damping_factor, lucky_numbers)
+        encoder = FORMATS[output]
+        started = False  # OK is only sent with the first chunk, so an early failure is a clean ERROR
+        for _, chunk_count, seed_sequence in chunk_streams(count, seed):
+            try:
+                if chunk_count <= 1000:  # a few hundred microseconds, not worth a thread hop
+                    data = encoder.encode(generator.chunk(chunk_count, seed_sequence))
+                else:
+                    data = await loop.run_in_executor(self.executor, lambda: encoder.encode(generator.chunk(chunk_count, seed_sequence)))
+            except Exception as error:
+                if not started:
+                    raise
+                raise StreamError(f"failed after the first tickets: {error!r}") from error
+            if not started:
+                writer.write(b"OK\n")
+                started = True
+            writer.write(data)
+            await writer.drain()
+
+    async def rebuild(self):
+        """Rebuilds the snapshot through the response cache; the watch then reloads it."""
+        await asyncio.get_running_loop().run_in_executor(None, build_snapshot, self.snapshot_path)
+        self.pages_seen = pages_signature(self.pages)  # the rebuild may have stored pages itself
+
+    def is_stale(self):
+        """True when the loaded tables' data was fetched before the most recent draw."""
+        fetched_at = self.stats.fetched_at
+        return fetched_at is not None and fetched_at < most_recent_draw().timestamp()
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "snapshot": self.snapshot_path,
+            "loaded_at": self.loaded_at.isoformat(),
+            "reloads": self.reloads,
+            "requests": self.requests,
+            "alias_tables": len(self.stats.derived.get(("alias", None), ())),
+            "fetched_at": self.stats.fetched_at and datetime.datetime.fromtimestamp(self.stats.fetched_at, datetime.timezone.utc).isoformat(),
+            "stale": self.is_stale(),
+        }
+
+    async def handle_connection(self, reader, writer):
+        """Answers the one request sent on a connection."""
+        request = None
+        try:
+            request = await read_request(reader)
+            self.requests += 1
+            command = request.get("command", "tickets")
+            if command == "tickets":
+                await self.tickets(writer, *parse_request(request))
+            elif command == "status":
+                writer.write(b"OK\n" + json.dumps(self.status()).encode() + b"\n")
+            elif command == "stop":
+                writer.write(b"OK\n")
+                self.stopped.set()
+            else:
+                raise DaemonError(f"unknown command {command!r}")
+            await writer.drain()
+        except DaemonError as error:
+            writer.write(f"ERROR {error}\n".encode())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except StreamError as error:
+            # An ERROR line now would read as one more ticket; the client sees the stream end short
+            print(f"Error serving {request!r}: {error}", file=sys.stderr)
+            writer.transport.abort()
+        except Exception as error:
+            print(f"Error serving {request!r}: {error!r}", file=sys.stderr)
+            writer.write(b"ERROR internal error\n")
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        self.executor.shutdown()
+
+async def run_daemon(socket_path=DEFAULT_SOCKET_PATH, snapshot_path=DEFAULT_SNAPSHOT_PATH):
+    """Serves until a stop request, SIGINT or SIGTERM."""
+    daemon = TicketDaemon(socket_path, snapshot_path)
+    try:
+        await daemon.start()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, daemon.stopped.set)
+        print(f"Daemon {os.getpid()} listening on {socket_path}", file=sys.stderr)
+        await daemon.watch()
+    finally:
+        await daemon.close()
+
+def main(argv):
+    socket_path = argv[1] if len(argv) > 1 else DEFAULT_SOCKET_PATH
+    try:
+        asyncio.run(run_daemon(socket_path))
+    except DaemonError as error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
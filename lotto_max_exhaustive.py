@@ -0,0 +1,304 @@
+# Exhaustive ranking of every possible ticket under the project's scoring model.
+# A ticket's score is the sum of the damped frequency weights of its numbers (the weights the
+# v5-v9 generators draw with, scaled to a mean of 1) plus a bonus for every combination of
+# the scraped tables it contains: a common pair, triplet or quad, in proportion to how often
+# the table saw it next to the table's most frequent entry.
+# All C(50, 7) = 99,884,400 tickets are scored, in colex order (lotto_max_rank.py). The
+# tickets sharing their three largest numbers H form one run of ranks, whose four smallest
+# numbers L go through every 4-set below min(H) in colex order. So a run's scores are one
+# precomputed array over L (its numbers and the combinations inside L) plus the combinations
+# that meet H: those inside H add a constant, those with one number in L a per-number weight,
+# and the few with two or three add their bonus at the ranks of L holding them.
+# Runs are grouped into tasks of about two million tickets for a process pool; each task
+# keeps the best top_k tickets it has seen in a heap and the heaps are merged at the end.
+# As in lotto_max_sweep.py, every finished task is appended to a JSONL checkpoint file, and
+# rerunning the same command skips the tasks it already holds, so a pass can be interrupted
+# and resumed; a checkpoint written for other tables or another model is ignored.
+
+#   model = score_model(get_statistics(), damping_factor=0.8)
+#   top = ExhaustiveSearch("exhaustive.jsonl", model, top_k=1000).run(workers=4)
+#   unrank_ranks(top.ranks[:10]), top.scores[:10]
+#   score_tickets(model, tickets)                                   # any (n, 7) tickets
+#   python lotto_max_exhaustive.py exhaustive.jsonl -k 1000 -o top.lmxp
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import signal
+import sys
+import time
+import numpy as np
+from lotto_max_batch import WEIGHTED_SETS
+from lotto_max_rank import BINOMIALS, NUMBERS, TICKET_COUNT, unrank_ranks
+from lotto_max_sampler import damped_weights
+
+DEFAULT_BONUSES = {"pairs": 1.0, "triplets": 2.0, "quads": 4.0}  # for the most frequent entry of a table
+TOP_K = 1000
+TASK_TICKETS = 1 << 21  # tickets per task, in whole runs
+
+# number_weights[n] is the weight of number n, combinations a tuple of (sorted numbers, bonus)
+# and signature a digest of both, so a checkpoint is only reused for the same model
+ScoreModel = namedtuple("ScoreModel", ["number_weights", "combinations", "signature"])
+# ranks and scores of the best tickets, best first; among equal scores the lower rank first
+TopTickets = namedtuple("TopTickets", ["ranks", "scores"])
+
+def score_model(stats, damping_factor=0.8, bonuses=None):
+    """Builds the ScoreModel for the loaded tables, a damping factor and a bonus per combination kind."""
+    bonuses = {**DEFAULT_BONUSES, **(bonuses or {})}
+    numbers, weights = damped_weights(stats.frequency_table, damping_factor)
+    number_weights = np.zeros(NUMBERS + 1)
+    number_weights[numbers] = weights
+    number_weights /= number_weights[1:].mean()
+    combination_bonuses = {}
+    for name, _, kind in WEIGHTED_SETS:
+        table = stats.table(name)
+        if not table:
+            continue
+        top = max(combination.frequency for combination in table)
+        for combination in table:
+            numbers = tuple(sorted(combination.numbers))
+            # A combination listed by two tables (e.g. a pair that is also consecutive) gets both bonuses
+            combination_bonuses[numbers] = combination_bonuses.get(numbers, 0.0) + bonuses[kind] * combination.frequency / top
+    combination_bonuses = tuple(sorted(combination_bonuses.items()))
+    digest = hashlib.sha256(json.dumps([number_weights.tolist(), combination_bonuses]).encode()).hexdigest()
+    return ScoreModel(number_weights, combination_bonuses, digest[:16])
+
+def score_tickets(model, tickets):
+    """Scores an (n, 7) array of tickets one combination at a time."""
+    tickets = np.asarray(tickets, dtype=np.intp)
+    masks = np.bitwise_or.reduce(np.uint64(1) << tickets.astype(np.uint64), axis=1)
+    scores = model.number_weights[tickets].sum(axis=1)
+    for numbers, bonus in model.combinations:
+        mask = np.uint64(sum(1 << number for number in numbers))
+        scores[(masks & mask) == mask] += bonus
+    return scores
+
+def colex_runs():
+    """Returns the three largest numbers (R, 3) and the first rank (R,) of every run, in rank order."""
+    high = np.array([(c5, c6, c7) for c7 in range(6, NUMBERS) for c6 in range(5, c7) for c5 in range(4, c6)], dtype=np.intp)
+    starts = BINOMIALS[high[:, 0], 5] + BINOMIALS[high[:, 1], 6] + BINOMIALS[high[:, 2], 7]
+    return high + 1, starts
+
+def run_tasks(task_tickets=TASK_TICKETS):
+    """Returns (first run, stop run, first rank, stop rank) for each task: consecutive runs of about task_tickets tickets."""
+    high, starts = colex_runs()
+    stops = np.append(starts[1:], TICKET_COUNT)
+    tasks = []
+    first = 0
+    for run in range(len(starts)):
+        if stops[run] - starts[first] >= task_tickets or run == len(starts) - 1:
+            tasks.append((first, run + 1, int(starts[first]), int(stops[run])))
+            first = run + 1
+    return tasks
+
+class RunScorer:
+    """Scores whole runs of tickets for one ScoreModel."""
+
+    def __init__(self, model):
+        self.model = model
+        self.high, self.starts = colex_runs()
+        # Every 4-set of numbers, indexed by its colex rank: a run's four smallest numbers in order
+        low = np.array(list(combinations(range(NUMBERS), 4)), dtype=np.intp)
+        low_ranks = sum(BINOMIALS[low[:, i], i + 1] for i in range(4))
+        self.low = np.empty_like(low)
+        self.low[low_ranks] = low + 1
+        self.low_masks = np.bitwise_or.reduce(np.uint64(1) << self.low.astype(np.uint64), axis=1)
+        self.containing_cache = {}
+        self.by_number = [[] for _ in range(NUMBERS + 1)]
+        self.low_scores = model.number_weights[self.low].sum(axis=1)
+        for numbers, bonus in model.combinations:
+            for number in numbers:
+                self.by_number[number].append((numbers, bonus))
+            if len(numbers) <= 4:
+                self.low_scores[self.containing(numbers)] += bonus
+
+    def containing(self, numbers):
+        """Returns the ascending colex ranks of the 4-sets holding all the given numbers."""
+        ranks = self.containing_cache.get(numbers)
+        if ranks is None:
+            mask = np.uint64(sum(1 << number for number in numbers))
+            ranks = self.containing_cache[numbers] = np.flatnonzero((self.low_masks & mask) == mask)
+        return ranks
+
+    def score_run(self, run):
+        """Returns the scores of the tickets of one run, in rank order."""
+        high = tuple(self.high[run].tolist())
+        smallest = high[0]
+        count = math.comb(smallest - 1, 4)
+        scores = self.low_scores[:count].copy()
+        base = self.model.number_weights[list(high)].sum()
+        per_number = np.zeros(NUMBERS + 1)
+        seen = set()
+        for number in high:
+            for numbers, bonus in self.by_number[number]:
+                if numbers in seen:
+                    continue
+                seen.add(numbers)
+                rest = tuple(n for n in numbers if n not in high)
+                if rest and rest[-1] >= smallest:
+                    continue  # needs a number above the run's four smallest that is not in H
+                if not rest:
+                    base += bonus
+                elif len(rest) == 1:
+                    per_number[rest[0]] += bonus
+                else:
+                    # The 4-sets holding rest are ascending, and those below min(H) come first
+                    ranks = self.containing(rest)
+                    scores[ranks[:np.searchsorted(ranks, count)]] += bonus
+        if per_number.any():
+            scores += per_number[self.low[:count]].sum(axis=1)
+        scores += base
+        return scores
+
+def top_of_runs(scorer, first_run, stop_run, top_k):
+    """Scores runs first_run..stop_run and returns their best top_k as a list of (score, -rank), best first."""
+    heap = []  # min-heap of (score, -rank): the worst of the best so far on top
+    for run in range(first_run, stop_run):
+        scores = scorer.score_run(run)
+        candidates = np.flatnonzero(scores >= heap[0][0]) if len(heap) == top_k else np.arange(len(scores))
+        if len(candidates) > top_k:
+            candidates = candidates[np.lexsort((candidates, -scores[candidates]))[:top_k]]
+        start = int(scorer.starts[run])
+        for index, score in zip(candidates.tolist(), scores[candidates].tolist()):
+            item = (score, -(start + index))
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return sorted(heap, reverse=True)
+
+_worker_scorer = None  # set in each worker process by _init_worker
+
+def _init_worker(model):
+    global _worker_scorer
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is handled by the parent, which cancels the pass
+    _worker_scorer = RunScorer(model)
+
+def _score_task(first_run, stop_run, top_k):
+    return top_of_runs(_worker_scorer, first_run, stop_run, top_k)
+
+class ExhaustiveSearch:
+    def __init__(self, path, model, top_k=TOP_K, task_tickets=TASK_TICKETS):
+        self.path = path
+        self.model = model
+        self.top_k = top_k
+        self.tasks = run_tasks(task_tickets)
+        self.cut_short = False  # the file ends in a partial line, which the next record must not extend
+
+    def load(self):
+        """Returns {(first rank, stop rank): [(score, -rank), ...]} for the tasks already in the checkpoint file."""
+        done = {}
+        try:
+            f = open(self.path)
+        except FileNotFoundError:
+            return done
+        with f:
+            for line in f:
+                self.cut_short = not line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short when a pass was interrupted
+                if record["signature"] != self.model.signature or record["top_k"] != self.top_k:
+                    continue  # another model or another top_k
+                done[record["start"], record["stop"]] = [(score, -rank) for rank, score in zip(record["ranks"], record["scores"])]
+        return done
+
+    def record(self, start, stop, top):
+        return {
+            "start": start, "stop": stop, "signature": self.model.signature, "top_k": self.top_k,
+            "ranks": [-negative_rank for _, negative_rank in top], "scores": [score for score, _ in top],
+        }
+
+    def run(self, workers=None, mp_context=None, progress=None):
+        """Scores the tasks not already in the checkpoint file and returns the merged TopTickets."""
+        done = self.load()
+        todo = [task for task in self.tasks if (task[2], task[3]) not in done]
+        finished = TICKET_COUNT - sum(stop - start for _, _, start, stop in todo)
+        if progress:
+            progress(finished, TICKET_COUNT)
+        if todo:
+            with open(self.path, "a") as f, ProcessPoolExecutor(workers, mp_context=mp_context, initializer=_init_worker,
+                                                                initargs=(self.model,)) as executor:
+                if self.cut_short:
+                    f.write("\n")
+                futures = {executor.submit(_score_task, first_run, stop_run, self.top_k): (start, stop)
+                           for first_run, stop_run, start, stop in todo}
+                try:
+                    for future in as_completed(futures):
+                        start, stop = futures[future]
+                        top = future.result()
+                        f.write(json.dumps(self.record(start, stop, top)) + "\n")
+                        f.flush()
+                        done[start, stop] = top
+                        finished += stop - start
+                        if progress:
+                            progress(finished, TICKET_COUNT)
+                except KeyboardInterrupt:
+                    # Drop the queued tasks rather than run them all on the way out; the
+                    # finished ones are in the file for the next run
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+        best = heapq.nlargest(self.top_k, (item for _, _, start, stop in self.tasks for item in done[start, stop]))
+        return TopTickets(np.array([-negative_rank for _, negative_rank in best], dtype=np.uint32),
+                          np.array([score for score, _ in best]))
+
+def parse_bonuses(text):
+    values = [float(value) for value in text.split(",")]
+    if len(values) != len(DEFAULT_BONUSES):
+        raise argparse.ArgumentTypeError("expected a bonus for pairs, triplets and quads, e.g. 1,2,4")
+    return dict(zip(DEFAULT_BONUSES, values))
+
+def parse_arguments(argv):
+    from lotto_max_cli import damping_argument
+
+    parser = argparse.ArgumentParser(description="Score every possible Lotto Max ticket and keep the best.")
+    parser.add_argument("checkpoint", help="JSONL file of finished tasks; rerun the same command to resume")
+    parser.add_argument("-k", "--top", type=int, default=TOP_K, help=f"tickets to keep (default {TOP_K})")
+    parser.add_argument("-d", "--damping", type=damping_argument, default=0.8, help="damping factor, 0 to 1 (default 0.8)")
+    parser.add_argument("-b", "--bonuses", type=parse_bonuses, default=DEFAULT_BONUSES,
+                        help="bonus for the most frequent pair, triplet and quad (default 1,2,4)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default one per CPU)")
+    parser.add_argument("-o", "--output", default=None, help="also write the best tickets, with their scores, as a packed file")
+    parser.add_argument("--show", type=int, default=10, help="best tickets to print (default 10)")
+    args = parser.parse_args(argv)
+    if args.top < 1:
+        parser.error("keep at least one ticket (-k)")
+    return args
+
+def main(argv=None):
+    from lotto_max_packed import write_packed
+    from lotto_max_stats import get_statistics
+
+    args = parse_arguments(argv)
+    model = score_model(get_statistics(), args.damping, args.bonuses)
+    start = time.perf_counter()
+    resumed = []  # tickets already in the checkpoint, from the first report
+
+    def progress(finished, total):
+        resumed.append(finished) if not resumed else None
+        elapsed = time.perf_counter() - start
+        rate = (finished - resumed[0]) / elapsed if elapsed else 0
+        remaining = f", {(total - finished) / rate:.0f} s left" if rate else ""
+        print(f"\r{finished}/{total} tickets ({finished / total:.0%}), {elapsed:.0f} s{remaining}   ", end="", file=sys.stderr, flush=True)
+
+    try:
+        top = ExhaustiveSearch(args.checkpoint, model, args.top).run(args.workers, progress=progress)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; rerun the same command to resume from {args.checkpoint}", file=sys.stderr)
+        return 1
+    print(f"\nScored {TICKET_COUNT} tickets in {time.perf_counter() - start:.1f} s; checkpoint in {args.checkpoint}", file=sys.stderr)
+    for ticket, score in zip(unrank_ranks(top.ranks[:args.show]), top.scores[:args.show]):
+        print(f"{score:8.4f}  {ticket.tolist()}")
+    if args.output:
+        write_packed(args.output, top.ranks, metadata=top.scores)
+        print(f"Wrote the best {len(top.ranks)} tickets and their scores to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
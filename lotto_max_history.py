@@ -0,0 +1,188 @@
+# Local draw history and combination statistics.
+# DrawHistory keeps every Lotto Max draw since September 2009 in a CSV file, filled from the
+# yearly results archive pages through LottoMaxScraper and appended to as new draws happen.
+# CombinationStats counts every 1- to 4-number sub-combination of each draw (7 + 21 + 35 + 35
+# per draw) and updates the counts incrementally as draws are added or removed, so it can
+# produce the same tables the statistics pages provide for any window of draws, offline.
+
+#   python lotto_max_history.py update [base_url]
+#   python lotto_max_history.py info
+
+from bisect import bisect_left
+from collections import Counter
+from itertools import combinations
+import csv
+import datetime
+import heapq
+import os
+import sys
+from lotto_max_cache import DEFAULT_CACHE_DIR
+from lotto_max_parser import Combination, Draw, LottoMaxTables
+
+FIRST_DRAW_YEAR = 2009
+DEFAULT_HISTORY_PATH = os.path.join(DEFAULT_CACHE_DIR, "draws.csv")
+
+# The combination tables as (name, numbers per entry, consecutive runs only)
+TABLE_SHAPES = [
+    ("most_common_pairs", 2, False),
+    ("most_common_consecutive_pairs", 2, True),
+    ("most_common_triplets", 3, False),
+    ("most_common_consecutive_triplets", 3, True),
+    ("most_common_four_numbers", 4, False),
+]
+
+class DrawHistory:
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self.draws = self._read()  # Draws, oldest first
+        self.dates = [draw.date for draw in self.draws]
+
+    def _read(self):
+        try:
+            with open(self.path, newline="") as f:
+                return [
+                    Draw(datetime.date.fromisoformat(row[0]), tuple(int(n) for n in row[1:8]), int(row[8]))
+                    for row in csv.reader(f)
+                ]
+        except FileNotFoundError:
+            return []
+
+    def __len__(self):
+        return len(self.draws)
+
+    def __iter__(self):
+        return iter(self.draws)
+
+    def append(self, draws):
+        """Stores the draws newer than the last stored one and returns them."""
+        last_date = self.dates[-1] if self.dates else datetime.date.min
+        new_draws = sorted((draw for draw in draws if draw.date > last_date), key=lambda draw: draw.date)
+        if new_draws:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", newline="") as f:
+                writer = csv.writer(f)
+                for draw in new_draws:
+                    writer.writerow([draw.date.isoformat(), *draw.numbers, draw.bonus])
+            self.draws.extend(new_draws)
+            self.dates.extend(draw.date for draw in new_draws)
+        return new_draws
+
+    def update(self, scraper=None, today=None):
+        """Fetches the archive pages from the last stored year onwards and stores any new draws."""
+        if scraper is None:
+            from lotto_max_cache import ResponseCache
+            from lotto_max_scraper import LottoMaxScraper
+            scraper = LottoMaxScraper(cache=ResponseCache())
+        today = today or datetime.date.today()
+        first_year = self.dates[-1].year if self.dates else FIRST_DRAW_YEAR
+        new_draws = []
+        for year in range(first_year, today.year + 1):
+            new_draws += self.append(scraper.get_draw_history(year))
+        return new_draws
+
+    def before(self, date):
+        """Returns the draws that took place strictly before the given date."""
+        return self.draws[:bisect_left(self.dates, date)]
+
+class CombinationStats:
+    def __init__(self, draws=(), max_k=4):
+        self.max_k = max_k
+        self.counts = {k: Counter() for k in range(1, max_k + 1)}  # k -> {numbers tuple: draws}
+        self.draw_count = 0
+        for draw in draws:
+            self.add_draw(draw)
+
+    def add_draw(self, draw):
+        """Counts every sub-combination of one more draw."""
+        for k, counter in self.counts.items():
+            counter.update(combinations(draw.numbers, k))
+        self.draw_count += 1
+
+    def remove_draw(self, draw):
+        """Forgets a draw that was added before, e.g. to slide a window forward."""
+        for k, counter in self.counts.items():
+            counter.subtract(combinations(draw.numbers, k))
+            for combination in combinations(draw.numbers, k):
+                if counter[combination] <= 0:
+                    del counter[combination]
+        self.draw_count -= 1
+
+    def count(self, numbers):
+        """Returns how many draws contained all of the given numbers."""
+        numbers = tuple(sorted(numbers))
+        return self.counts[len(numbers)].get(numbers, 0)
+
+    def frequency_table(self, highest=50):
+        return {number: self.counts[1].get((number,), 0) for number in range(1, highest + 1)}
+
+    def most_common(self, k, limit=100, consecutive=False):
+        """Returns the `limit` (or, with None, all) most frequent k-number combinations as Combination records."""
+        counter = self.counts[k]
+        if consecutive:
+            runs = (tuple(range(first, first + k)) for first in range(1, 52 - k))
+            items = [(numbers, counter[numbers]) for numbers in runs if counter.get(numbers)]
+        else:
+            items = counter.items()
+        if limit is not None and len(items) > limit:
+            # Only entries at least as frequent as the limit-th count can make the cut; finding
+            # that count over the plain values is far cheaper than ranking every entry
+            threshold = heapq.nlargest(limit, counter.values() if not consecutive else (c for _, c in items))[-1]
+            items = [item for item in items if item[1] >= threshold]
+        top = sorted(items, key=lambda item: (-item[1], item[0]))[:limit]
+        return [Combination(numbers, count) for numbers, count in top]
+
+    def advance(self, tables, draw, limit=100, consecutive_limit=40):
+        """Adds a draw and returns the tables after it, updated from `tables`, the tables before it."""
+        # Counts only grow, so an entry can only enter a table if this draw contains it: every
+        # entry of the old table still ranks ahead of any other entry that was left out
+        self.add_draw(draw)
+        updated = {"number_frequency_table": self.frequency_table()}
+        for name, k, consecutive in TABLE_SHAPES:
+            counter = self.counts[k]
+            candidates = [numbers for numbers in combinations(draw.numbers, k)
+                          if not consecutive or numbers[-1] - numbers[0] == k - 1]
+            pool = {numbers: counter[numbers] for numbers in candidates}
+            pool.update((entry.numbers, counter[entry.numbers]) for entry in getattr(tables, name))
+            top = sorted(pool.items(), key=lambda item: (-item[1], item[0]))
+            table_limit = consecutive_limit if consecutive else limit
+            if table_limit is not None:
+                top = top[:table_limit]
+            updated[name] = [Combination(numbers, count) for numbers, count in top]
+        return LottoMaxTables(**updated)
+
+    def tables(self, limit=100, consecutive_limit=40):
+        """Builds the same tables the scraper returns from the statistics pages."""
+        return LottoMaxTables(
+            number_frequency_table=self.frequency_table(),
+            most_common_pairs=self.most_common(2, limit),
+            most_common_consecutive_pairs=self.most_common(2, consecutive_limit, consecutive=True),
+            most_common_triplets=self.most_common(3, limit),
+            most_common_consecutive_triplets=self.most_common(3, consecutive_limit, consecutive=True),
+            most_common_four_numbers=self.most_common(4, limit),
+        )
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "info"
+    history = DrawHistory()
+    if command == "update":
+        scraper = None
+        if len(argv) > 2:
+            from lotto_max_scraper import LottoMaxScraper
+            scraper = LottoMaxScraper(base_url=argv[2])
+        new_draws = history.update(scraper)
+        print(f"Stored {len(new_draws)} new draws; {len(history)} draws in {history.path}")
+    elif command == "info":
+        if not history.draws:
+            print(f"No draws stored in {history.path}; run 'update' first.")
+            return 1
+        tables = CombinationStats(history).tables(limit=5, consecutive_limit=5)
+        print(f"{len(history)} draws from {history.dates[0]} to {history.dates[-1]}")
+        for name in LottoMaxTables._fields[1:]:
+            print(f"  {name}: {[(c.numbers, c.frequency) for c in getattr(tables, name)]}")
+    else:
+        print(f"Unknown command {command!r}; expected 'update' or 'info'.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
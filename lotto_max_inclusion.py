@@ -0,0 +1,194 @@
+# Inclusion probabilities of the v9 strategy, computed instead of counted.
+# inclusion_probabilities() returns, for the loaded tables, a damping factor, lucky numbers
+# and a weight schedule, the probability that each number 1-50 and each pair of numbers
+# ends up on a v9 ticket. It first tries an exact forward propagation: the selection loop of
+# generator_v9_good.py is run on a distribution of states (ticket mask and per-kind pick
+# counts) rather than on one ticket, branching on every frequency draw and every
+# combination pick with its exact probability, and the final fill on every number left.
+# A pass that leaves a ticket with fewer than 5 numbers unchanged starts the same pass over,
+# so such passes are resolved as a geometric series rather than iterated.
+# The number of states grows about a hundredfold with every combination pick, so the
+# exact engine has a budget; it fits when lucky numbers fix most of the ticket. Past the
+# budget the probabilities are estimated from a batch of tickets (lotto_max_batch.py)
+# large enough that every estimate is within the tolerance at 99.9% confidence.
+
+#   result = inclusion_probabilities(stats, damping_factor=0.8, lucky_numbers=[7, 14, 21, 28])
+#   result.numbers[7], result.pairs[3, 11], result.exact, result.tolerance
+
+from collections import defaultdict, namedtuple
+import math
+import numpy as np
+from lotto_max_batch import DEFAULT_WEIGHTS, WEIGHTED_SETS, COUNT_COLUMNS, BatchGenerator, chunk_streams, masks_to_tickets
+from lotto_max_bitmask import to_mask
+from lotto_max_sampler import damped_weights
+from lotto_max_stats import get_statistics
+
+EXACT_BUDGET = 300_000  # states expanded before giving up on the exact computation (a few seconds)
+DEFAULT_TOLERANCE = 0.002  # largest error of a sampled probability
+CONFIDENCE_Z = 3.29  # standard errors within the tolerance: 99.9% two-sided
+
+# numbers[n] is the probability that n is on the ticket and pairs[a, b] (a < b, also
+# mirrored) that both are. tolerance is 0 for exact results, otherwise the bound on the
+# error of every sampled probability at 99.9% confidence.
+Inclusion = namedtuple("Inclusion", ["numbers", "pairs", "exact", "tickets", "tolerance"])
+
+class BudgetExceeded(Exception):
+    pass
+
+class ExactInclusion:
+    """Forward propagation of the v9 selection loop over ticket states."""
+
+    def __init__(self, stats, damping_factor=0.8, lucky_numbers=None, weights=None, budget=EXACT_BUDGET):
+        numbers, number_weights = damped_weights(stats.frequency_table, damping_factor)
+        total_weight = sum(number_weights)
+        self.draws = [(1 << number, weight / total_weight) for number, weight in zip(numbers, number_weights) if weight > 0]
+        self.number_weights = dict(zip(numbers, number_weights))
+        self.weighted_sets = [
+            (stats.index(name), weight, COUNT_COLUMNS[kind])
+            for (name, _, kind), weight in zip(WEIGHTED_SETS, weights or DEFAULT_WEIGHTS)
+        ]
+        self.start = to_mask(lucky_numbers or ())
+        self.budget = budget
+        self.expanded = 0
+        self.picks_cache = {}
+
+    def _spend(self, states):
+        self.expanded += states
+        if self.expanded > self.budget:
+            raise BudgetExceeded(f"more than {self.budget} states")
+
+    def _picks(self, position, index, mask):
+        """Returns [(entry mask, probability)] for one table pick, or [] when no entry fits."""
+        key = (position, mask)
+        picks = self.picks_cache.get(key)
+        if picks is None:
+            # CombinationIndex.choose picks a free entry in proportion to its frequency
+            free = index.all_entries & ~index.conflicts(mask)
+            entries = []
+            while free:
+                low_bit = free & -free
+                i = low_bit.bit_length() - 1
+                if index.frequencies[i] > 0:
+                    entries.append((index.masks[i], index.frequencies[i]))
+                free ^= low_bit
+            total = sum(frequency for _, frequency in entries)
+            picks = self.picks_cache[key] = [(entry, frequency / total) for entry, frequency in entries]
+        return picks
+
+    def _pass(self, mask, counts):
+        """Returns {(mask, counts): probability} after one pass of the selection loop."""
+        outcomes = {(mask, counts): 1.0}
+        if mask.bit_count() < 5:
+            # First, a number based on frequency; one already on the ticket changes nothing
+            outcomes = defaultdict(float)
+            for bit, probability in self.draws:
+                outcomes[mask | bit, counts] += probability
+            self._spend(len(self.draws))
+        for position, (index, weight, column) in enumerate(self.weighted_sets):
+            following = defaultdict(float)
+            for (current, current_counts), probability in outcomes.items():
+                size = current.bit_count()
+                picks = []
+                if size < 7 and current_counts[column] < weight and size + index.size <= 7:
+                    picks = self._picks(position, index, current)
+                if not picks:
+                    following[current, current_counts] += probability
+                    continue
+                picked_counts = tuple(count + (i == column) for i, count in enumerate(current_counts))
+                for entry, entry_probability in picks:
+                    following[current | entry, picked_counts] += probability * entry_probability
+                self._spend(len(picks))
+            outcomes = following
+        return outcomes
+
+    def _fill(self, mask, probability, finals):
+        """Adds every way of filling the ticket, as AliasSampler.sample does, to finals."""
+        free = [(1 << number, weight) for number, weight in self.number_weights.items() if weight > 0 and not mask >> number & 1]
+        pending = [(mask, probability, 0.0)]  # (mask, probability, weight already taken)
+        total_weight = sum(weight for _, weight in free)
+        while pending:
+            current, current_probability, taken = pending.pop()
+            if current.bit_count() >= 7 or total_weight - taken <= 0:
+                finals[current] += current_probability
+                continue
+            remaining = total_weight - taken
+            for bit, weight in free:
+                if not current & bit:
+                    pending.append((current | bit, current_probability * weight / remaining, taken + weight))
+            self._spend(len(free))
+
+    def finals(self):
+        """Returns {final ticket mask: probability}."""
+        finals = defaultdict(float)
+        frontier = {(self.start, (0,) * len(COUNT_COLUMNS)): 1.0}
+        while frontier:
+            following = defaultdict(float)
+            for (mask, counts), probability in frontier.items():
+                size = mask.bit_count()
+                if size >= 7:
+                    finals[mask] += probability
+                    continue
+                outcomes = self._pass(mask, counts)
+                unchanged = outcomes.pop((mask, counts), 0.0)
+                if size >= 5:
+                    # Stuck: nothing but the sets can add a number and none of them fit
+                    if unchanged:
+                        self._fill(mask, probability * unchanged, finals)
+                    scale = 1.0
+                elif unchanged >= 1.0:
+                    raise ValueError("no number can ever be drawn; the selection loop would not end")
+                else:
+                    scale = 1.0 / (1.0 - unchanged)  # the same pass is retried until something changes
+                for (outcome, outcome_counts), outcome_probability in outcomes.items():
+                    if outcome.bit_count() >= 7:
+                        finals[outcome] += probability * outcome_probability * scale
+                    else:
+                        following[outcome, outcome_counts] += probability * outcome_probability * scale
+            frontier = following
+        return finals
+
+def marginals(tickets, probabilities):
+    """Returns (numbers, pairs) inclusion arrays from (n, 7) tickets and a probability for each."""
+    tickets = tickets.astype(np.intp)
+    numbers = np.bincount(tickets.ravel(), weights=np.repeat(probabilities, 7), minlength=51)
+    pairs = np.zeros(51 * 51)
+    for first in range(7):
+        for second in range(first + 1, 7):
+            pairs += np.bincount(tickets[:, first] * 51 + tickets[:, second], weights=probabilities, minlength=51 * 51)
+    pairs = pairs.reshape(51, 51)
+    return numbers, pairs + pairs.T
+
+def exact_inclusion(stats, damping_factor=0.8, lucky_numbers=None, weights=None, budget=EXACT_BUDGET):
+    """Returns the exact Inclusion, or None when the computation would take more than budget states."""
+    try:
+        finals = ExactInclusion(stats, damping_factor, lucky_numbers, weights, budget).finals()
+    except BudgetExceeded:
+        return None
+    masks = np.fromiter(finals.keys(), dtype=np.uint64, count=len(finals))
+    probabilities = np.fromiter(finals.values(), dtype=np.float64, count=len(finals))
+    numbers, pairs = marginals(masks_to_tickets(masks), probabilities)
+    return Inclusion(numbers, pairs, True, 0, 0.0)
+
+def sampled_inclusion(stats, damping_factor=0.8, lucky_numbers=None, weights=None, tolerance=DEFAULT_TOLERANCE, seed=None):
+    """Estimates the Inclusion from enough tickets that every probability is within tolerance."""
+    # A probability estimated from n tickets has a standard error of sqrt(p(1 - p) / n), at
+    # most 1 / (2 sqrt(n)), so this many tickets bounds every number and pair alike
+    n = math.ceil((CONFIDENCE_Z / (2 * tolerance)) ** 2)
+    generator = BatchGenerator(stats, damping_factor, lucky_numbers, weights)
+    numbers, pairs = np.zeros(51), np.zeros((51, 51))
+    # Count chunk by chunk, so memory stays flat however small the tolerance; the tickets
+    # are the same as generate_batch(n, ..., seed=seed) would return
+    for _, count, seed_sequence in chunk_streams(n, seed):
+        chunk_numbers, chunk_pairs = marginals(generator.chunk(count, seed_sequence), np.full(count, 1.0 / n))
+        numbers += chunk_numbers
+        pairs += chunk_pairs
+    return Inclusion(numbers, pairs, False, n, CONFIDENCE_Z / (2 * math.sqrt(n)))
+
+def inclusion_probabilities(stats=None, damping_factor=0.8, lucky_numbers=None, weights=None,
+                            tolerance=DEFAULT_TOLERANCE, budget=EXACT_BUDGET, seed=None):
+    """Returns the v9 Inclusion probabilities: exact when within budget, otherwise sampled within tolerance."""
+    stats = stats or get_statistics()
+    result = exact_inclusion(stats, damping_factor, lucky_numbers, weights, budget)
+    if result is None:
+        result = sampled_inclusion(stats, damping_factor, lucky_numbers, weights, tolerance, seed)
+    return result
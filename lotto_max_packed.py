@@ -0,0 +1,185 @@
+# Packed ticket files.
+# A set of tickets is stored as their colex ranks (lotto_max_rank.py), 4 bytes per ticket,
+# sorted, so ten million tickets take 40 MB instead of several hundred as text. The file is
+# memory-mapped and the ranks are read in place: finding a ticket is a binary search that
+# touches a few pages, without loading the file. Tickets may carry one fixed-size
+# metadata record each (any NumPy dtype without objects, e.g. the position at which the
+# ticket was generated), stored after the ranks in the same sorted order.
+
+# File layout (all integers little-endian):
+#   header    magic "LMXP", u16 version, u16 length of the metadata dtype, u64 ticket count,
+#             f64 created_at (unix time), u32 metadata record size (0: no metadata), 4 reserved bytes
+#   dtype     the metadata dtype as JSON (numpy.lib.format descr), zero padding to 8 bytes
+#   ranks     count u32 ranks in ascending order, zero padding to 8 bytes
+#   metadata  count records of the metadata dtype, in the order of the ranks
+
+#   write_packed("tickets.lmxp", rank_tickets(tickets), metadata=np.arange(len(tickets), dtype=np.uint32))
+#   with open_packed("tickets.lmxp") as packed: packed.count([3, 11, 23, 28, 34, 41, 47])
+#   python lotto_max_packed.py info tickets.lmxp
+#   python lotto_max_packed.py find tickets.lmxp 3,11,23,28,34,41,47
+
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import numpy as np
+from lotto_max_rank import rank, rank_tickets, unrank_ranks
+
+MAGIC = b"LMXP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQdI4x")
+
+class PackedError(ValueError):
+    """Raised when a packed ticket file is truncated or from another format version."""
+
+def _padded(size):
+    return size + -size % 8
+
+def encode_header(count, metadata_dtype=None, created_at=None):
+    """Returns the header and dtype block that precede the ranks."""
+    descr = b""
+    itemsize = 0
+    if metadata_dtype is not None:
+        metadata_dtype = np.dtype(metadata_dtype)
+        if metadata_dtype.hasobject:
+            raise ValueError("metadata records must not hold Python objects")
+        descr = json.dumps(np.lib.format.dtype_to_descr(metadata_dtype)).encode()
+        itemsize = metadata_dtype.itemsize
+    created_at = time.time() if created_at is None else created_at
+    header = HEADER.pack(MAGIC, VERSION, len(descr), count, created_at, itemsize)
+    return header + descr + bytes(_padded(len(descr)) - len(descr))
+
+def write_packed(path, ranks, metadata=None, created_at=None):
+    """Sorts the ranks (and metadata with them) and writes them atomically as a packed file."""
+    ranks = np.asarray(ranks, dtype=np.uint32)
+    if metadata is not None:
+        metadata = np.asarray(metadata)
+        if len(metadata) != len(ranks):
+            raise ValueError(f"{len(metadata)} metadata records for {len(ranks)} tickets")
+        order = np.argsort(ranks, kind="stable")  # equal tickets keep their metadata order
+        ranks, metadata = ranks[order], metadata[order]
+    else:
+        ranks = np.sort(ranks)
+    _write_sorted(path, ranks, metadata, created_at)
+
+def _write_sorted(path, ranks, metadata=None, created_at=None):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_header(len(ranks), None if metadata is None else metadata.dtype, created_at))
+        f.write(np.ascontiguousarray(ranks, dtype="<u4"))  # written from the array's buffer, without a bytes copy
+        f.write(bytes(_padded(4 * len(ranks)) - 4 * len(ranks)))
+        if metadata is not None:
+            f.write(np.ascontiguousarray(metadata).tobytes())
+    os.replace(tmp_path, path)
+
+def pack_chunks(path, chunks, created_at=None):
+    """Ranks (n, 7) ticket chunks as they come and writes them as a packed file; returns the ticket count."""
+    # Only the ranks are held, 4 bytes per ticket; joining the chunks briefly needs them twice,
+    # so the peak is 8 bytes per ticket, and the ranks are then sorted and written in place
+    ranks = [rank_tickets(tickets) for tickets in chunks]
+    ranks = np.concatenate(ranks) if ranks else np.zeros(0, dtype=np.uint32)
+    ranks.sort()
+    _write_sorted(path, ranks, created_at=created_at)
+    return len(ranks)
+
+class PackedTickets:
+    """A read-only view over a packed ticket file (a memory map or any other buffer)."""
+
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise PackedError("packed file is truncated")
+        magic, version, descr_length, count, created_at, itemsize = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise PackedError("not a packed ticket file")
+        if version != VERSION:
+            raise PackedError(f"unsupported packed file version {version}")
+        offset = HEADER.size
+        metadata_dtype = None
+        if descr_length:
+            descr = json.loads(bytes(buffer[offset:offset + descr_length]))
+            if isinstance(descr, list):
+                descr = [tuple(field) for field in descr]
+            metadata_dtype = np.lib.format.descr_to_dtype(descr)
+            if metadata_dtype.itemsize != itemsize:
+                raise PackedError("metadata dtype does not match its record size")
+        offset += _padded(descr_length)
+        ranks_offset = offset
+        metadata_offset = ranks_offset + _padded(4 * count)
+        if len(buffer) < metadata_offset + count * itemsize:
+            raise PackedError("packed file is truncated")
+        self.buffer = buffer
+        self.version = version
+        self.created_at = created_at
+        self.ranks = np.frombuffer(buffer, dtype="<u4", count=count, offset=ranks_offset)  # read in place, no copy
+        self.metadata = None
+        if metadata_dtype is not None:
+            self.metadata = np.frombuffer(buffer, dtype=metadata_dtype, count=count, offset=metadata_offset)
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def tickets(self, start=0, stop=None):
+        """Returns tickets start..stop, in rank order, as an (n, 7) uint8 array."""
+        return unrank_ranks(self.ranks[start:stop])
+
+    def search(self, numbers):
+        """Returns the (start, stop) positions holding the given ticket; empty when it is absent."""
+        ticket_rank = np.uint32(rank(numbers))  # of the array's type, or searchsorted converts the whole array
+        return (int(np.searchsorted(self.ranks, ticket_rank, side="left")),
+                int(np.searchsorted(self.ranks, ticket_rank, side="right")))
+
+    def count(self, numbers):
+        """Returns how many times the given ticket is in the file."""
+        start, stop = self.search(numbers)
+        return stop - start
+
+    def __contains__(self, numbers):
+        return self.count(numbers) > 0
+
+    def close(self):
+        self.ranks = self.metadata = None
+        if isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:
+                pass  # the caller still holds an array over the map; it is unmapped when that goes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def open_packed(path):
+    """Memory-maps a packed ticket file."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise PackedError("packed file is empty")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return PackedTickets(mapped)
+
+def main(argv):
+    if len(argv) < 3 or argv[1] not in ("info", "find") or (argv[1] == "find" and len(argv) < 4):
+        print("Usage: python lotto_max_packed.py info FILE | find FILE 3,11,23,28,34,41,47")
+        return 1
+    with open_packed(argv[2]) as packed:
+        if argv[1] == "info":
+            created_at = datetime.datetime.fromtimestamp(packed.created_at, datetime.timezone.utc)
+            distinct = int(np.count_nonzero(np.diff(packed.ranks))) + 1 if len(packed) else 0
+            metadata = packed.metadata.dtype if packed.metadata is not None else "none"
+            print(f"{argv[2]}: version {packed.version}, created {created_at:%Y-%m-%d %H:%M} UTC, "
+                  f"{len(packed)} tickets ({distinct} distinct), metadata {metadata}, {os.path.getsize(argv[2])} bytes")
+        else:
+            numbers = [int(number) for number in argv[3].split(",")]
+            start, stop = packed.search(numbers)
+            print(f"{sorted(numbers)}: {stop - start} in {argv[2]}")
+            if packed.metadata is not None and stop > start:
+                print(f"  metadata: {packed.metadata[start:stop].tolist()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,186 @@
+# Fast parsing backend for the lotteryextreme statistics pages.
+# The BeautifulSoup parsers in LottoMaxScraper build a tree of the whole page (navigation,
+# scripts, side bars) only to look at one table. This backend cuts the statistics table out
+# of the raw HTML first, then tokenizes just that slice with a single regular expression
+# into a minimal element tree that follows html.parser's nesting rules (the unclosed <td>
+# cells in the results tables nest inside each other exactly as they do in BeautifulSoup).
+# Attributes are only decoded for the elements a query actually looks at. Each parse_*
+# function returns the same values as the LottoMaxScraper method of the same name, but
+# takes the page HTML instead of a soup. The result types shared by both backends (and by
+# the snapshot loader, which must not import requests or bs4) are defined here too.
+# Markup the backend does not recognise raises ParseError, and nothing else, so that
+# LottoMaxScraper can fall back to BeautifulSoup without hiding errors of its own.
+
+from collections import namedtuple
+import functools
+from html import unescape
+import datetime
+import re
+
+TABLE_STYLE = "background:#dFdAbD;width:600px;margin-left:auto;margin-right:auto"
+ROW_STYLE = "text-align:center;background:#FFFADD"
+TABLE_START = re.compile(r"""(?i:<table)\b[^>]*\bstyle\s*=\s*(["'])""" + re.escape(TABLE_STYLE) + r"""\1[^>]*>""")
+TABLE_TAG = re.compile(r"<(/?)table\b", re.IGNORECASE)
+TOKEN = re.compile(r"""<!--.*?-->|<(/?)([A-Za-z][A-Za-z0-9]*)((?:[^>"']|"[^"]*"|'[^']*')*)>|([^<]+|<)""", re.DOTALL)
+ATTRIBUTE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+# One row of a most-common-combinations table: the numbers as listed on the page and how
+# many draws they appeared in together
+Combination = namedtuple("Combination", ["numbers", "frequency"])
+
+# One past draw: its date, the 7 winning numbers (ascending) and the bonus number
+Draw = namedtuple("Draw", ["date", "numbers", "bonus"])
+
+# All statistics tables returned by LottoMaxScraper.fetch_all(), one field per endpoint.
+# The frequency table is a {number: frequency} dict; the others are lists of Combination.
+LottoMaxTables = namedtuple("LottoMaxTables", [
+    "number_frequency_table",
+    "most_common_pairs",
+    "most_common_consecutive_pairs",
+    "most_common_triplets",
+    "most_common_consecutive_triplets",
+    "most_common_four_numbers",
+])
+
+class ParseError(ValueError):
+    pass
+
+def parser(parse):
+    """Reports any failure of a parse_* function on unexpected markup as a ParseError."""
+    @functools.wraps(parse)
+    def wrapper(html):
+        try:
+            return parse(html)
+        except ParseError:
+            raise
+        except (ValueError, LookupError, AttributeError, TypeError) as error:
+            # A missing element (None), a missing match or an unexpected cell text
+            raise ParseError(f"{parse.__name__}: {error!r}") from error
+    return wrapper
+
+class Node:
+    __slots__ = ("tag", "raw_attrs", "parsed_attrs", "children")
+
+    def __init__(self, tag, raw_attrs=""):
+        self.tag = tag
+        self.raw_attrs = raw_attrs
+        self.parsed_attrs = None
+        self.children = []  # Nodes and text strings, in document order
+
+    @property
+    def attrs(self):
+        if self.parsed_attrs is None:
+            self.parsed_attrs = {
+                name.lower(): unescape(next((v for v in values if v is not None), ""))
+                for name, *values in ATTRIBUTE.findall(self.raw_attrs)
+            }
+        return self.parsed_attrs
+
+    def find_all(self, tag, **attrs):
+        """Yields matching descendants in document order, like BeautifulSoup's find_all."""
+        for child in self.children:
+            if child.__class__ is Node:
+                if child.tag == tag and all(child.matches(name, value) for name, value in attrs.items()):
+                    yield child
+                if child.children:
+                    yield from child.find_all(tag, **attrs)
+
+    def find(self, tag, **attrs):
+        return next(self.find_all(tag, **attrs), None)
+
+    def matches(self, name, value):
+        if name == "class_":
+            return value in (self.attrs.get("class") or "").split()
+        return self.attrs.get(name) == value
+
+    @property
+    def text(self):
+        return "".join(child if child.__class__ is str else child.text for child in self.children)
+
+def build_tree(html):
+    """Tokenizes an HTML fragment into Nodes, closing elements the way BeautifulSoup's html.parser builder does."""
+    root = Node("[document]")
+    stack = [root]
+    for closing, tag, raw_attrs, text in TOKEN.findall(html):
+        if text:
+            stack[-1].children.append(unescape(text) if "&" in text else text)
+        elif not tag:
+            continue  # comment
+        elif closing:
+            # Pop up to the most recent open element with this name; stray end tags are ignored
+            tag = tag.lower()
+            for i in range(len(stack) - 1, 0, -1):
+                if stack[i].tag == tag:
+                    del stack[i:]
+                    break
+        else:
+            tag = tag.lower()
+            node = Node(tag, raw_attrs)
+            stack[-1].children.append(node)
+            if tag not in VOID_TAGS and not raw_attrs.endswith("/"):
+                stack.append(node)
+    return root
+
+def extract_table(html):
+    """Returns the statistics table as a Node, tokenizing only its slice of the page."""
+    start = TABLE_START.search(html)
+    if start is None:
+        raise ParseError("statistics table not found")
+    depth = 0
+    end = len(html)
+    for tag in TABLE_TAG.finditer(html, start.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            end = html.find(">", tag.end()) + 1 or len(html)
+            break
+    return build_tree(html[start.start():end]).find("table")
+
+@parser
+def parse_frequency_numbers(html):
+    table = extract_table(html)
+    frequency_data = {}
+    for row in list(table.find_all("tr"))[2:]:  # Skip the first 2 rows to get to the data rows
+        cols = list(row.find_all("td"))
+        if len(cols) >= 2:
+            result = re.search(r"^(\d{1,})\s(\d{1,})", cols[0].text.strip())
+            frequency_data[int(result.group(1))] = int(result.group(2))
+    return frequency_data
+
+@parser
+def parse_combinations(html):
+    table = extract_table(html)
+    most_common = []
+    for row in table.find_all("tr", style=ROW_STYLE):
+        # Each cell's own text is one number, so the nested cells need no subtracting out
+        numbers_table = row.find("table", class_="results")
+        numbers = tuple(
+            int("".join(child for child in td.children if child.__class__ is str))
+            for td in numbers_table.find_all("td")
+        )
+        frequency = int(row.find("td", class_="f20").text)
+        most_common.append(Combination(numbers, frequency))
+    return most_common
+
+parse_most_common_pairs = parse_combinations
+parse_most_common_triplets = parse_combinations
+parse_most_common_four_numbers = parse_combinations
+
+@parser
+def parse_draw_history(html):
+    """Parses a results archive page into Draws, oldest first."""
+    table = extract_table(html)
+    draws = []
+    for row in table.find_all("tr", style=ROW_STYLE):
+        date = datetime.date.fromisoformat(re.search(r"\d{4}-\d{2}-\d{2}", row.find("td", class_="date").text).group())
+        numbers = []
+        bonus = None
+        for td in row.find("table", class_="results").find_all("td"):
+            number = int("".join(child for child in td.children if child.__class__ is str))
+            if td.matches("class_", "bonus"):
+                bonus = number
+            else:
+                numbers.append(number)
+        draws.append(Draw(date, tuple(sorted(numbers)), bonus))
+    draws.sort(key=lambda draw: draw.date)
+    return draws
@@ -0,0 +1,114 @@
+# Colex ranking of Lotto Max tickets.
+# A ticket is 7 of the numbers 1-50, so there are only C(50, 7) = 99,884,400 of them and
+# each one can be stored as its rank, a uint32, instead of a Python list. With the numbers
+# shifted to 0-49 and sorted, c1 < c2 < ... < c7, the colex rank is
+#   rank = C(c1, 1) + C(c2, 2) + ... + C(c7, 7)
+# which numbers the tickets 0 .. C(50, 7) - 1 in the order of their largest number first,
+# then the next largest, and so on. Unranking goes back greedily: c7 is the largest c with
+# C(c, 7) <= rank, then c6 from what is left, and so on.
+# rank()/unrank() handle one ticket; rank_tickets()/unrank_ranks() do whole (n, 7) arrays
+# with table lookups and one binary search per position. unrank_masks() goes straight to
+# uint64 masks (lotto_max_bitmask.py) for scoring: the tickets sharing their three largest
+# numbers hold one contiguous run of ranks, so a single binary search over the starts of
+# those runs gives the three largest numbers, and what is left of the rank is the colex
+# rank of the four smallest, looked up in a table of every 4-number mask.
+
+#   rank([3, 11, 23, 28, 34, 41, 47]) -> 57619533
+#   unrank(57619533) -> (3, 11, 23, 28, 34, 41, 47)
+#   ranks = rank_tickets(generate_batch(1_000_000)); tickets = unrank_ranks(ranks)
+#   masks = unrank_masks(ranks)
+
+from itertools import combinations
+import math
+import numpy as np
+
+NUMBERS = 50
+PICKS = 7
+TICKET_COUNT = math.comb(NUMBERS, PICKS)  # 99,884,400, below 2**32
+
+# BINOMIALS[c, i] = C(c, i) for c in 0..50 and i in 0..7; each column is nondecreasing in c
+BINOMIALS = np.array([[math.comb(c, i) for i in range(PICKS + 1)] for c in range(NUMBERS + 1)], dtype=np.int64)
+_BINOMIALS = BINOMIALS.tolist()
+_mask_tables = None  # (run starts, masks of the three largest numbers, masks of the four smallest), built on first use
+
+def rank(numbers):
+    """Returns the colex rank of a ticket (7 distinct numbers from 1 to 50, in any order)."""
+    numbers = sorted(numbers)
+    if len(numbers) != PICKS or len(set(numbers)) != PICKS or not 1 <= numbers[0] <= numbers[-1] <= NUMBERS:
+        raise ValueError(f"a ticket is {PICKS} distinct numbers between 1 and {NUMBERS}: {numbers}")
+    return sum(_BINOMIALS[number - 1][i] for i, number in enumerate(numbers, 1))
+
+def unrank(ticket_rank):
+    """Returns the ticket with the given colex rank, as a sorted tuple of numbers."""
+    if not 0 <= ticket_rank < TICKET_COUNT:
+        raise ValueError(f"a rank is between 0 and {TICKET_COUNT - 1}: {ticket_rank}")
+    numbers = []
+    c = NUMBERS
+    for i in range(PICKS, 0, -1):
+        c -= 1
+        while _BINOMIALS[c][i] > ticket_rank:
+            c -= 1
+        ticket_rank -= _BINOMIALS[c][i]
+        numbers.append(c + 1)
+    return tuple(reversed(numbers))
+
+def rank_tickets(tickets):
+    """Returns the colex ranks of an (n, 7) array of tickets as a uint32 array."""
+    tickets = np.asarray(tickets)
+    if tickets.ndim != 2 or tickets.shape[1] != PICKS:
+        raise ValueError(f"tickets are an (n, {PICKS}) array, not {tickets.shape}")
+    tickets = np.sort(tickets, axis=1).astype(np.intp)  # no-op order for generate_batch output
+    # Sorted rows are valid when the first number is at least 1, the last at most 50 and no
+    # number repeats the one before it
+    bad = (tickets[:, 0] < 1) | (tickets[:, -1] > NUMBERS) | (tickets[:, 1:] == tickets[:, :-1]).any(axis=1)
+    if bad.any():
+        raise ValueError(f"a ticket is {PICKS} distinct numbers between 1 and {NUMBERS}: {tickets[bad.argmax()].tolist()}")
+    tickets -= 1
+    ranks = np.zeros(len(tickets), dtype=np.int64)
+    for i in range(PICKS):
+        ranks += BINOMIALS[tickets[:, i], i + 1]
+    return ranks.astype(np.uint32)
+
+def unrank_ranks(ranks):
+    """Returns the (n, 7) uint8 tickets, rows ascending, for an array of colex ranks."""
+    remaining = np.asarray(ranks, dtype=np.int64).copy()
+    tickets = np.empty((len(remaining), PICKS), dtype=np.uint8)
+    for i in range(PICKS, 0, -1):
+        # The largest c with C(c, i) <= remaining; the column is sorted, so one binary search
+        c = np.searchsorted(BINOMIALS[:, i], remaining, side="right") - 1
+        remaining -= BINOMIALS[c, i]
+        tickets[:, i - 1] = c + 1
+    return tickets
+
+def _build_mask_tables():
+    bits = np.uint64(1) << np.arange(1, NUMBERS + 1, dtype=np.uint64)  # bits[c] is the bit of number c + 1
+    # Every set of four smallest numbers, indexed by its colex rank
+    low = np.array(list(combinations(range(NUMBERS), 4)), dtype=np.intp)
+    low_ranks = sum(BINOMIALS[low[:, i], i + 1] for i in range(4))
+    low_masks = np.zeros(len(low), dtype=np.uint64)
+    low_masks[low_ranks] = np.bitwise_or.reduce(bits[low], axis=1)
+    # Every set of three largest numbers that leaves room for four below, by where its run starts
+    high = np.array([triple for triple in combinations(range(NUMBERS), 3) if triple[0] >= 4], dtype=np.intp)
+    starts = sum(BINOMIALS[high[:, i], i + 5] for i in range(3))
+    order = np.argsort(starts)
+    return starts[order], np.bitwise_or.reduce(bits[high[order]], axis=1), low_masks
+
+def unrank_masks(ranks, is_sorted=False):
+    """Returns the uint64 ticket masks (bit n set for number n) for an array of colex ranks."""
+    global _mask_tables
+    if _mask_tables is None:
+        _mask_tables = _build_mask_tables()
+    starts, high_masks, low_masks = _mask_tables
+    if is_sorted and len(ranks):
+        # Ascending ranks (a packed file): find where each run begins in the ranks, one binary
+        # search per run rather than per ticket, and repeat each run's index over its tickets
+        ranks = np.asarray(ranks, dtype=np.uint32)
+        first = np.searchsorted(starts, ranks[0], side="right") - 1
+        last = np.searchsorted(starts, ranks[-1], side="right")
+        run_starts = starts[first:last].astype(np.uint32)
+        bounds = np.searchsorted(ranks, run_starts)
+        counts = np.diff(bounds, append=len(ranks))
+        return np.repeat(high_masks[first:last], counts) | low_masks[ranks - np.repeat(run_starts, counts)]
+    ranks = np.asarray(ranks, dtype=np.int64)
+    run = np.searchsorted(starts, ranks, side="right") - 1
+    return high_masks[run] | low_masks[ranks - starts[run]]
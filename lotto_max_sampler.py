@@ -0,0 +1,133 @@
+# Precomputed samplers for weighted number draws.
+# generate_weighted_random_number used to rebuild the number and weight lists, re-sum and
+# re-damp the frequencies and call random.choices on every draw, and the generators draw
+# many times per ticket. An AliasSampler is built once per (frequency table, damping
+# factor) with Vose's alias method, after which each draw is one random() call, one index
+# and one comparison. sampler_for() keeps the samplers in a small LRU cache keyed by the
+# table and the damping factor, so sweeping over damping values only builds each once.
+# sample() draws several distinct numbers, avoiding an exclusion mask, from the same
+# distribution as drawing one number at a time and discarding repeats (what the
+# generators' fill loops did), but with a bound on the wasted draws: after max_tries
+# clashes it renormalises the weights of the numbers still free and draws from those.
+
+#   sampler = sampler_for(stats.frequency_table, 0.8)
+#   sampler.draw()       # one number
+#   sampler.draws(1000)  # a list of 1000 numbers, drawn with replacement
+#   sampler.sample(3, exclude_mask=to_mask(ticket))  # 3 distinct numbers not on the ticket
+
+from bisect import bisect
+from collections import OrderedDict
+from itertools import accumulate
+import random
+import threading
+
+SAMPLER_CACHE_SIZE = 32
+
+def damped_weights(frequency_table, damping_factor=None):
+    """Returns (numbers, weights) for a frequency table, damped the way the v5-v9 generators do it."""
+    numbers = list(frequency_table.keys())
+    frequencies = list(frequency_table.values())
+    if damping_factor is None:
+        return numbers, frequencies
+    total_weight = sum(frequencies)
+    weights = [(1 - damping_factor) + damping_factor * freq / total_weight for freq in frequencies]
+    return numbers, weights
+
+class AliasSampler:
+    """Draws from a fixed discrete distribution in constant time per draw."""
+
+    def __init__(self, numbers, weights):
+        n = len(numbers)
+        total_weight = sum(weights)
+        if n == 0 or total_weight <= 0:
+            raise ValueError("need at least one positive weight")
+        self.numbers = list(numbers)
+        self.weights = list(weights)
+        # Vose's alias method: scale the weights so they average 1, then pair every column
+        # below 1 with one above 1 that tops it up
+        scaled = [weight * n / total_weight for weight in weights]
+        self.probabilities = [1.0] * n
+        self.aliases = list(self.numbers)
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = self.numbers[more]
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1 up to rounding and keeps probability 1.0
+
+    def draw(self, rng=random):
+        x = rng.random() * len(self.numbers)
+        i = int(x)
+        return self.numbers[i] if x - i < self.probabilities[i] else self.aliases[i]
+
+    def draws(self, k, rng=random):
+        """Returns k independent draws."""
+        n = len(self.numbers)
+        numbers, probabilities, aliases = self.numbers, self.probabilities, self.aliases
+        result = []
+        for _ in range(k):
+            x = rng.random() * n
+            i = int(x)
+            result.append(numbers[i] if x - i < probabilities[i] else aliases[i])
+        return result
+
+    def sample(self, k, exclude_mask=0, rng=random, max_tries=4):
+        """Returns k distinct numbers outside exclude_mask (bit n set excludes n), in the order drawn."""
+        chosen = []
+        taken = exclude_mask
+        wasted = 0
+        # A clash only means redrawing from the same table, so while few numbers are taken
+        # this is cheaper than renormalising; either way each number is drawn from the
+        # weights of the numbers still free
+        n = len(self.numbers)
+        numbers, probabilities, aliases = self.numbers, self.probabilities, self.aliases
+        while len(chosen) < k and wasted < max_tries:
+            x = rng.random() * n
+            i = int(x)
+            number = numbers[i] if x - i < probabilities[i] else aliases[i]
+            if taken >> number & 1:
+                wasted += 1
+            else:
+                taken |= 1 << number
+                chosen.append(number)
+        if len(chosen) < k:
+            # Sequential renormalisation: zero the taken numbers and draw from the rest
+            weights = [0 if taken >> number & 1 else weight for number, weight in zip(self.numbers, self.weights)]
+            last = len(weights) - 1
+            while len(chosen) < k:
+                cum_weights = list(accumulate(weights))
+                if cum_weights[-1] <= 0:
+                    break  # fewer than k numbers can be drawn at all
+                i = bisect(cum_weights, rng.random() * cum_weights[-1], 0, last)
+                weights[i] = 0
+                chosen.append(self.numbers[i])
+        return chosen
+
+_samplers = OrderedDict()  # (id(frequency_table), damping_factor) -> (frequency_table, sampler)
+_samplers_lock = threading.Lock()
+
+def sampler_for(frequency_table, damping_factor=None):
+    """Returns the cached AliasSampler for a frequency table and damping factor (None: undamped)."""
+    # Tables are treated as read-only and recognised by identity: the statistics provider
+    # hands out the same dict until its next refresh, and the cache keeps a reference to
+    # each table so its id cannot be reused by another object
+    key = (id(frequency_table), damping_factor)
+    with _samplers_lock:
+        entry = _samplers.get(key)
+        if entry is not None and entry[0] is frequency_table:
+            _samplers.move_to_end(key)
+            return entry[1]
+    sampler = AliasSampler(*damped_weights(frequency_table, damping_factor))
+    with _samplers_lock:
+        _samplers[key] = (frequency_table, sampler)
+        _samplers.move_to_end(key)
+        while len(_samplers) > SAMPLER_CACHE_SIZE:
+            _samplers.popitem(last=False)
+    return sampler
+
+def clear_samplers():
+    with _samplers_lock:
+        _samplers.clear()
@@ -2,12 +2,20 @@
 # pip install requests
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 import re
+import lotto_max_parser
+from lotto_max_parser import Combination, LottoMaxTables
 
 class LottoMaxScraper:
-    def __init__(self):
-        self.base_url = "https://www.lotteryextreme.com/canada/"
+    def __init__(self, base_url="https://www.lotteryextreme.com/canada/", timeout=10, max_workers=6, cache=None, parser="fast"):
+        self.base_url = base_url
+        self.parser = parser  # "fast" (lotto_max_parser.py) or "soup" (the parse_* methods below)
+        self.cache = cache  # optional ResponseCache (see lotto_max_cache.py)
+        self.timeout = timeout  # seconds, applied to every request (connect and read)
+        self.max_workers = max_workers  # upper bound on concurrent requests in fetch_all()
         self.endpoints = {
             "number_frequency_table": "lottomax-statistics(1)",
             "most_common_pairs": "lottomax-statistics(5)",
@@ -16,15 +24,51 @@ class LottoMaxScraper:
             "most_common_consecutive_triplets": "lottomax-statistics(8)",
             "most_common_four_numbers": "lottomax-statistics(9)",
         }
-
-    def fetch_html_soup(self, endpoint):
+        # Results archive, one page per year; not part of fetch_all()
+        self.history_endpoint = "lottomax-results-archive({year})"
+        # One keep-alive session shared by every request, with a connection pool large
+        # enough for fetch_all() so concurrent fetches do not repeat the TCP+TLS handshake
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch_html(self, endpoint):
         url = f"{self.base_url}{endpoint}"
-        response = requests.get(url)
+        if self.cache is None:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response.text
+
+        entry = self.cache.lookup(url)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.count("hits")
+            return entry["body"]
+
+        # Missing or expired: ask the server, revalidating what we already have
+        headers = self.cache.conditional_headers(entry)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry is not None:
+            self.cache.count("revalidations")
+            return self.cache.refresh(url, entry)["body"]
         response.raise_for_status()
-        html = response.text 
+        self.cache.count("misses")
+        return self.cache.store(url, response.text, response.headers)["body"]
+
+    def fetch_html_soup(self, endpoint):
+        html = self.fetch_html(endpoint)
         soup = BeautifulSoup(html, "html.parser") 
         return soup
 
+    def parse_page(self, html, parse_name):
+        """Parses a page with the configured backend; parse_name is one of the parse_* methods."""
+        if self.parser == "fast":
+            try:
+                return getattr(lotto_max_parser, parse_name)(html)
+            except lotto_max_parser.ParseError:
+                pass  # table markup not recognised by the fast backend; let BeautifulSoup try
+        return getattr(self, parse_name)(BeautifulSoup(html, "html.parser"))
+
     def parse_frequency_numbers(self, soup):
         # Find the specific table by its style and content
         table = soup.find("table", {"style": "background:#dFdAbD;width:600px;margin-left:auto;margin-right:auto"})
@@ -38,115 +82,80 @@ class LottoMaxScraper:
                 frequency_data[int(result.group(1))] = int(result.group(2))
         return frequency_data 
 
-    def parse_most_common_pairs(self, soup):
-        data = []
-        outer_table = soup.find('table', style="background:#dFdAbD;width:600px;margin-left:auto;margin-right:auto")
-        # Iterate over the rows and extract the relevant data
-        for row in outer_table.find_all('tr', style="text-align:center;background:#FFFADD"):
-            numbers_table = row.find('table', class_='results')
-            numbers = [td.get_text() for td in numbers_table.find_all('td')]
-            frequency = row.find_all('td', class_='f20')[0].get_text()
-            entry = f"Numbers: {numbers}, Frequency: {frequency}"
-            data.append(entry)
-        return data
-    
-    def process_pair_data(self, data):
-        most_common_pairs = []    
-        for entry in data:
-            try:
-                if "Frequency:" in entry:
-                    # Split the entry to extract numbers and frequency
-                    numbers_str, frequency_str = entry.split("Frequency:")
-                    # Extract all numbers from the numbers_str
-                    numbers = re.findall(r'\d+', numbers_str)  
-                    # Check if there are exactly two numbers in the list
-                    if len(numbers) == 2:
-                        # Convert them to integers and create a tuple
-                        formatted_numbers = (int((int(numbers[0])-int(numbers[1]))/pow(10, len(numbers[1]))), int(numbers[1]))
-                        # Append the tuple of numbers to the list
-                        most_common_pairs.append(formatted_numbers)
-                    else:
-                        print(f"Error: Unexpected number format in entry: {entry}")
-                        
-                else:
-                    print(f"Error: 'Frequency:' not found in entry: {entry}")
-            except ValueError as e:
-                print(f"Error processing entry: {entry}. Error: {e}")
-
-        return most_common_pairs
-
-    def parse_most_common_triplets(self, soup):
-        # Find the table with the most common triplets
+    def parse_combinations(self, soup):
+        # Find the table with the most common combinations (pairs, triplets or four numbers)
         table = soup.find('table', {'style': 'background:#dFdAbD;width:600px;margin-left:auto;margin-right:auto'})
 
-        # Extract the rows containing triplets
+        # Extract the rows containing the combinations
         rows = table.find_all('tr', {'style': 'text-align:center;background:#FFFADD'})
 
-        # List to store the most common triplets
-        most_common_triplets = []
-
-        # Loop through each row and extract the triplets
+        most_common = []
         for row in rows:
-            # Find the table within the row that contains the triplet numbers
+            # The inner table holds the numbers; its cells are left unclosed, so each cell's
+            # text also contains the digits of every cell after it
             numbers_table = row.find('table', class_='results')
-            
-            # Extract the numbers from the inner table
-            numbers = [td.text.strip() for td in numbers_table.find_all('td')]
-            number_2 = int(numbers[2])
-            number_1 = int((int(numbers[1])-int(numbers[2]))/pow(10, len(numbers[2])))
-            number_0 = int((int(numbers[0])-int(numbers[1]))/pow(10, len(numbers[1])))
-            new_numbers = [number_0, number_1, number_2]            
-            # Convert the numbers into a tuple and add it to the list
-            most_common_triplets.append(tuple(new_numbers))
-
-        return most_common_triplets
-        
-    def parse_most_common_four_numbers(self, soup):
-        # Find the table with the most common triplets
-        table = soup.find('table', {'style': 'background:#dFdAbD;width:600px;margin-left:auto;margin-right:auto'})
-        rows = table.find_all('tr', {'style': 'text-align:center;background:#FFFADD'})
+            texts = [td.text.strip() for td in numbers_table.find_all('td')]
+            numbers = tuple(int(text[:len(text) - len(rest)]) for text, rest in zip(texts, texts[1:] + [""]))
+            frequency = int(row.find('td', class_='f20').text)
+            most_common.append(Combination(numbers, frequency))
 
-        # List to store the most common triplets
-        most_common_four_numbers = []
+        return most_common
 
-        # Loop through each row and extract the triplets
-        for row in rows:
-            # Find the table within the row that contains the triplet numbers
-            numbers_table = row.find('table', class_='results')
-            
-            # Extract the numbers from the inner table
-            numbers = [td.text.strip() for td in numbers_table.find_all('td')]
-            number_3 = int(numbers[3])
-            number_2 = int((int(numbers[2])-int(numbers[3]))/pow(10, len(numbers[3])))
-            number_1 = int((int(numbers[1])-int(numbers[2]))/pow(10, len(numbers[2])))
-            number_0 = int((int(numbers[0])-int(numbers[1]))/pow(10, len(numbers[1]))) 
-            new_numbers = [number_0, number_1, number_2, number_3]
-            
-            # Convert the numbers into a tuple and add it to the list
-            most_common_four_numbers.append(tuple(new_numbers))
-
-        return most_common_four_numbers
+    def parse_most_common_pairs(self, soup):
+        return self.parse_combinations(soup)
+
+    def parse_most_common_triplets(self, soup):
+        return self.parse_combinations(soup)
+
+    def parse_most_common_four_numbers(self, soup):
+        return self.parse_combinations(soup)
     
     def get_number_frequency_table(self):
-        soup = self.fetch_html_soup(self.endpoints["number_frequency_table"])
-        return self.parse_frequency_numbers(soup)
+        html = self.fetch_html(self.endpoints["number_frequency_table"])
+        return self.parse_page(html, "parse_frequency_numbers")
     
     def get_most_common_pairs(self):
-        soup = self.fetch_html_soup(self.endpoints["most_common_pairs"])
-        return self.process_pair_data(self.parse_most_common_pairs(soup))
+        html = self.fetch_html(self.endpoints["most_common_pairs"])
+        return self.parse_page(html, "parse_most_common_pairs")
 
     def get_most_common_consecutive_pairs(self):
-        soup = self.fetch_html_soup(self.endpoints["most_common_consecutive_pairs"])
-        return self.process_pair_data(self.parse_most_common_pairs(soup))
+        html = self.fetch_html(self.endpoints["most_common_consecutive_pairs"])
+        return self.parse_page(html, "parse_most_common_pairs")
     
     def get_most_common_triplets(self):
-        soup = self.fetch_html_soup(self.endpoints["most_common_triplets"])
-        return self.parse_most_common_triplets(soup)
+        html = self.fetch_html(self.endpoints["most_common_triplets"])
+        return self.parse_page(html, "parse_most_common_triplets")
 
     def get_most_common_consecutive_triplets(self):
-        soup = self.fetch_html_soup(self.endpoints["most_common_consecutive_triplets"])
-        return self.parse_most_common_triplets(soup)
+        html = self.fetch_html(self.endpoints["most_common_consecutive_triplets"])
+        return self.parse_page(html, "parse_most_common_triplets")
     
     def get_most_common_four_numbers(self):
-        soup = self.fetch_html_soup(self.endpoints["most_common_four_numbers"])
-        return self.parse_most_common_four_numbers(soup)
+        html = self.fetch_html(self.endpoints["most_common_four_numbers"])
+        return self.parse_page(html, "parse_most_common_four_numbers")
+
+    def get_draw_history(self, year):
+        """Returns every draw of the given year as a list of Draw, oldest first."""
+        html = self.fetch_html(self.history_endpoint.format(year=year))
+        return lotto_max_parser.parse_draw_history(html)
+
+    def get_table(self, name):
+        """Fetches and parses a single statistics table by its endpoint name."""
+        getters = {
+            "number_frequency_table": self.get_number_frequency_table,
+            "most_common_pairs": self.get_most_common_pairs,
+            "most_common_consecutive_pairs": self.get_most_common_consecutive_pairs,
+            "most_common_triplets": self.get_most_common_triplets,
+            "most_common_consecutive_triplets": self.get_most_common_consecutive_triplets,
+            "most_common_four_numbers": self.get_most_common_four_numbers,
+        }
+        return getters[name]()
+
+    def fetch_all(self, max_workers=None):
+        """Fetches and parses every statistics table concurrently over the shared session."""
+        workers = min(max_workers or self.max_workers, len(self.endpoints))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(self.get_table, name) for name in self.endpoints}
+            # result() re-raises the first failed request (HTTPError, Timeout, ...) in the caller
+            tables = {name: future.result() for name, future in futures.items()}
+        return LottoMaxTables(**tables)
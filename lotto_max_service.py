@@ -0,0 +1,281 @@
+# Asynchronous HTTP service for v9 ticket generation.
+# Other systems used to start a Python process per request, which loaded (or scraped) the
+# statistics every time. TicketService is a small asyncio HTTP/1.1 server that loads the
+# tables once and keeps them resident:
+#   GET /tickets?n=10&damping=0.8&lucky=7,14&seed=2024[&format=json|csv|jsonl|binary]
+#   GET /health
+# Small batches are generated on the event loop (a few hundred microseconds), medium ones
+# in a thread, and large ones are split into chunks for a process pool whose workers read
+# the tables from shared memory (BatchPool in lotto_max_batch.py). The same seed gives the
+# same tickets as generate_batch on every path. After each draw (next_draw() in
+# lotto_max_cache.py) a background task builds a fresh provider, pool and shared block
+# and swaps them in, and tries again later while the new tables' data still predates the
+# draw; requests in flight finish on the ones they started with, so a refresh never blocks
+# or mixes tables.
+
+#   python lotto_max_service.py [port] [host]
+#   curl 'http://127.0.0.1:8080/tickets?n=3&lucky=7'
+
+import asyncio
+import datetime
+from http import HTTPStatus
+import json
+import multiprocessing
+import signal
+import sys
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from lotto_max_batch import BatchGenerator, BatchPool, chunk_streams
+from lotto_max_cli import FORMATS, TextFormat
+from lotto_max_snapshot import most_recent_draw, next_draw
+from lotto_max_stats import StatisticsProvider
+
+DEFAULT_PORT = 8080
+MAX_TICKETS = 1_000_000  # per request
+INLINE_TICKETS = 1000  # up to this many are generated on the event loop
+POOL_TICKETS = 100_000  # from this many on, the chunks go to the process pool
+REFRESH_DELAY = 15 * 60  # seconds after the draw cutoff before refreshing
+RETRY_DELAY = 10 * 60  # seconds before retrying a failed refresh
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024  # a request body (never used) is read and dropped up to this size
+
+JSON_ROWS = TextFormat(b"[", b",", b"],")
+CONTENT_TYPES = {"json": "application/json", "csv": "text/csv", "jsonl": "application/x-ndjson",
+                 "binary": "application/octet-stream"}
+
+class RequestError(ValueError):
+    """A request the service cannot answer; carries the HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class Backend:
+    """One generation of resident statistics: the provider and the process pool reading it."""
+
+    def __init__(self, stats, workers=None, mp_context=None):
+        self.stats = stats.warm_up()
+        self.pool = BatchPool(stats, workers, mp_context)
+        self.loaded_at = datetime.datetime.now(datetime.timezone.utc)
+        # When the data was fetched (None when the tables were passed in): a reload right after
+        # a draw can still hold the previous draw's statistics if the site has not caught up
+        self.fetched_at = None if stats.fetched_at is None else datetime.datetime.fromtimestamp(stats.fetched_at, datetime.timezone.utc)
+
+    def close(self):
+        self.pool.close()
+
+def parse_tickets_query(query):
+    """Returns (n, damping_factor, lucky_numbers, seed, format) from a /tickets query string."""
+    params = {name: values[-1] for name, values in parse_qs(query).items()}
+    try:
+        n = int(params.get("n", 1))
+        damping_factor = float(params.get("damping", 0.8))
+        lucky_numbers = [int(number) for number in params.get("lucky", "").split(",") if number.strip()]
+        seed = int(params["seed"]) if "seed" in params else None
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "n, damping, lucky and seed must be numbers")
+    output = params.get("format", "json")
+    if not 1 <= n <= MAX_TICKETS:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"n must be between 1 and {MAX_TICKETS}")
+    if not 0 <= damping_factor <= 1:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "damping must be between 0 and 1")
+    if len(lucky_numbers) > 7 or len(set(lucky_numbers)) != len(lucky_numbers) or not all(1 <= x <= 50 for x in lucky_numbers):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "lucky takes up to 7 distinct numbers between 1 and 50")
+    if seed is not None and seed < 0:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "seed must not be negative")
+    if output not in CONTENT_TYPES:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"format must be one of {', '.join(CONTENT_TYPES)}")
+    return n, damping_factor, lucky_numbers, seed, output
+
+def encode_tickets(tickets, output):
+    if output == "json":
+        return b'{"tickets":[' + JSON_ROWS.encode(tickets)[:-1] + b"]}"
+    return FORMATS[output].encode(tickets)
+
+def response(status, body, content_type="application/json", keep_alive=True):
+    status = HTTPStatus(status)
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+def error_body(message):
+    return json.dumps({"error": message}).encode()
+
+class TicketService:
+    def __init__(self, stats_factory=StatisticsProvider, refresh=True, workers=None, mp_context=None):
+        self.stats_factory = stats_factory  # returns a new provider; called at start and on every refresh
+        self.refresh = refresh
+        self.workers = workers
+        # Workers are started while the loop and its threads run, so they are spawned, not forked
+        self.mp_context = mp_context or multiprocessing.get_context("spawn")
+        self.backend = None
+        self.generation = 0
+        self.server = None
+        self.refresh_task = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Loads the statistics, starts the pool and the background refresh, and starts listening."""
+        await self.reload()
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        if self.refresh:
+            self.refresh_task = asyncio.create_task(self.refresh_loop())
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.refresh_task:
+            self.refresh_task.cancel()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.backend:
+            await asyncio.get_running_loop().run_in_executor(None, self.backend.close)
+            self.backend = None
+
+    async def reload(self):
+        """Builds a new backend off the event loop and swaps it in, then retires the old one."""
+        loop = asyncio.get_running_loop()
+        backend = await loop.run_in_executor(None, Backend, self.stats_factory(), self.workers, self.mp_context)
+        old, self.backend = self.backend, backend
+        self.generation += 1
+        if old is not None:
+            await loop.run_in_executor(None, old.close)  # waits for chunks still running on it
+
+    async def refresh_loop(self):
+        while True:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            await asyncio.sleep((next_draw(now) - now).total_seconds() + REFRESH_DELAY)
+            while True:
+                try:
+                    await self.reload()
+                    fetched_at = self.backend.fetched_at
+                    if fetched_at is None or fetched_at >= most_recent_draw():
+                        print(f"Statistics refreshed (generation {self.generation})", file=sys.stderr)
+                        break
+                    print(f"Statistics still predate the draw; retrying in {RETRY_DELAY} s", file=sys.stderr)
+                except Exception as error:  # keep serving the old tables and try again later
+                    print(f"Refresh failed: {error!r}; retrying in {RETRY_DELAY} s", file=sys.stderr)
+                await asyncio.sleep(RETRY_DELAY)
+
+    async def generate(self, n, damping_factor=0.8, lucky_numbers=None, seed=None):
+        """Returns n tickets as an (n, 7) uint8 array, the same as generate_batch for the same seed."""
+        backend = self.backend  # keep the tables this request started with
+        chunks = chunk_streams(n, seed)
+        if n < POOL_TICKETS:
+            generator = BatchGenerator(backend.stats, damping_factor, lucky_numbers)
+
+            def generate():
+                return np.concatenate([generator.chunk(count, seed_sequence) for _, count, seed_sequence in chunks])
+
+            if n <= INLINE_TICKETS:
+                return generate()
+            return await asyncio.get_running_loop().run_in_executor(None, generate)
+        futures = [
+            asyncio.wrap_future(backend.pool.submit(count, damping_factor, lucky_numbers, seed_sequence))
+            for _, count, seed_sequence in chunks
+        ]
+        return np.concatenate(await asyncio.gather(*futures))
+
+    async def route(self, method, target):
+        """Returns (status, body, content type) for one request."""
+        if method != "GET":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "only GET is supported")
+        url = urlsplit(target)
+        if url.path == "/tickets":
+            n, damping_factor, lucky_numbers, seed, output = parse_tickets_query(url.query)
+            tickets = await self.generate(n, damping_factor, lucky_numbers, seed)
+            return HTTPStatus.OK, encode_tickets(tickets, output), CONTENT_TYPES[output]
+        if url.path == "/health":
+            now = datetime.datetime.now(datetime.timezone.utc)
+            body = {
+                "generation": self.generation,
+                "loaded_at": self.backend.loaded_at.isoformat(),
+                "fetched_at": self.backend.fetched_at and self.backend.fetched_at.isoformat(),
+                "next_draw": next_draw(now).isoformat(),
+            }
+            return HTTPStatus.OK, json.dumps(body).encode(), "application/json"
+        raise RequestError(HTTPStatus.NOT_FOUND, f"no such path: {url.path}")
+
+    async def handle_connection(self, reader, writer):
+        """Serves requests on one keep-alive connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(response(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, error_body("headers too large"), keep_alive=False))
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(response(HTTPStatus.BAD_REQUEST, error_body("malformed request line"), keep_alive=False))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                connection = headers.get("connection", "")
+                keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+                # No route takes a body, but one left unread would be parsed as the next request
+                if "transfer-encoding" in headers:
+                    writer.write(response(HTTPStatus.NOT_IMPLEMENTED, error_body("request bodies are not supported"), keep_alive=False))
+                    break
+                try:
+                    body_length = int(headers.get("content-length", 0))
+                except ValueError:
+                    body_length = -1
+                if not 0 <= body_length <= MAX_BODY_BYTES:
+                    writer.write(response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE if body_length > 0 else HTTPStatus.BAD_REQUEST,
+                                          error_body("bad or oversized request body"), keep_alive=False))
+                    break
+                if body_length:
+                    try:
+                        await reader.readexactly(body_length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+                try:
+                    status, body, content_type = await self.route(method, target)
+                except RequestError as error:
+                    status, body, content_type = error.status, error_body(str(error)), "application/json"
+                except Exception as error:
+                    print(f"Error serving {target}: {error!r}", file=sys.stderr)
+                    status, body, content_type = HTTPStatus.INTERNAL_SERVER_ERROR, error_body("internal error"), "application/json"
+                writer.write(response(status, body, content_type, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+async def serve(port=DEFAULT_PORT, host="127.0.0.1", **options):
+    """Runs a TicketService until SIGINT or SIGTERM, then shuts the pool and shared memory down."""
+    service = TicketService(**options)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await service.start(host, port)
+        print(f"Serving tickets on http://{host}:{service.port}/tickets", file=sys.stderr)
+        await stop.wait()
+    finally:
+        await service.close()
+
+def main(argv):
+    port = int(argv[1]) if len(argv) > 1 else DEFAULT_PORT
+    host = argv[2] if len(argv) > 2 else "127.0.0.1"
+    asyncio.run(serve(port, host))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
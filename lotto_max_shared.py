@@ -0,0 +1,47 @@
+# Statistics tables in shared memory for worker processes.
+# Instead of every worker scraping the site or unpickling its own copy of the tables,
+# SharedStatistics writes them once into a multiprocessing.shared_memory block, in the
+# snapshot format (lotto_max_snapshot.py: fixed-layout u8 number and u32 count arrays).
+# Workers attach to the block by name and read it in place through a read-only Snapshot
+# view, so attaching costs a header check and a checksum rather than a deserialisation,
+# and the tables exist once in memory however many workers there are.
+
+#   with SharedStatistics(stats.tables) as shared:           # parent
+#       ... pass shared.name to the workers ...
+#   stats = attach_statistics(name)                          # worker
+
+from multiprocessing import shared_memory
+from lotto_max_snapshot import Snapshot, encode_snapshot
+from lotto_max_stats import StatisticsProvider
+
+class SharedStatistics:
+    """Publishes statistics tables into a shared memory block until closed."""
+
+    def __init__(self, tables):
+        data = encode_snapshot(tables)
+        self.memory = shared_memory.SharedMemory(create=True, size=len(data))
+        self.memory.buf[:len(data)] = data
+        self.name = self.memory.name
+        self.size = len(data)
+
+    def close(self):
+        """Releases and removes the block; workers still attached keep their mapping."""
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+_attached = {}  # block name -> SharedMemory, kept open for the life of the process
+
+def attach_statistics(name):
+    """Returns a StatisticsProvider reading the tables in place from a published block."""
+    memory = _attached.get(name)
+    if memory is None:
+        memory = _attached[name] = shared_memory.SharedMemory(name=name)
+    # The block may be rounded up to a whole page; the snapshot header gives its own length
+    snapshot = Snapshot(memory.buf.toreadonly())
+    return StatisticsProvider(snapshot=snapshot)
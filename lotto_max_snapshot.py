@@ -0,0 +1,179 @@
+# Compiled statistics snapshot.
+# `python lotto_max_snapshot.py build` scrapes the six statistics pages once and writes them
+# to a small versioned binary file; generators then memory-map that file at startup instead
+# of downloading and parsing HTML. The snapshot is rebuilt when it is missing, corrupt, or
+# its data is older than the most recent draw. Its built_at is when the data was fetched:
+# the fetch time of the oldest page the response cache served, which may predate the file.
+
+# File layout (all integers little-endian):
+#   header   magic "LMXS", u16 version, u16 table count, f64 built_at (unix time of the data),
+#            u32 CRC-32 of the payload, u32 payload length
+#   payload  one section per table, in TABLE_NAMES order:
+#            u8 table id, u8 k (numbers per entry), u16 reserved, u32 entry count n,
+#            n*k u8 numbers, zero padding to a 4-byte boundary, n u32 counts
+# The frequency table is stored as a table of 1-number entries whose counts are the
+# frequencies; for the combination tables the counts are each Combination's frequency.
+
+#   python lotto_max_snapshot.py build [path]
+#   python lotto_max_snapshot.py info [path]
+
+import datetime
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from lotto_max_cache import DEFAULT_CACHE_DIR, most_recent_draw, next_draw  # the draw schedule
+from lotto_max_parser import Combination, LottoMaxTables
+
+MAGIC = b"LMXS"
+VERSION = 2  # 2: combination counts are the scraped frequencies
+HEADER = struct.Struct("<4sHHdII")
+SECTION = struct.Struct("<BBHI")
+TABLE_NAMES = LottoMaxTables._fields
+DEFAULT_SNAPSHOT_PATH = os.path.join(DEFAULT_CACHE_DIR, "statistics.snapshot")
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is truncated, corrupt, or from another format version."""
+
+def _table_entries(name, table):
+    """Normalises a scraped table into (numbers tuple, count) entries."""
+    if name == "number_frequency_table":
+        return [((number,), frequency) for number, frequency in table.items()]
+    return [(tuple(entry.numbers), entry.frequency) for entry in table]
+
+def encode_snapshot(tables, built_at=None):
+    """Serialises a LottoMaxTables into snapshot bytes."""
+    payload = bytearray()
+    for table_id, name in enumerate(TABLE_NAMES):
+        entries = _table_entries(name, getattr(tables, name))
+        k = len(entries[0][0]) if entries else 0
+        payload += SECTION.pack(table_id, k, 0, len(entries))
+        for numbers, _ in entries:
+            payload += bytes(numbers)
+        payload += bytes(-len(payload) % 4)
+        payload += struct.pack(f"<{len(entries)}I", *(count for _, count in entries))
+    built_at = time.time() if built_at is None else built_at
+    header = HEADER.pack(MAGIC, VERSION, len(TABLE_NAMES), built_at, zlib.crc32(payload), len(payload))
+    return header + payload
+
+def write_snapshot(path, tables, built_at=None):
+    """Writes a snapshot atomically, so a running generator never maps a partial file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_snapshot(tables, built_at))
+    os.replace(tmp_path, path)
+
+class Snapshot:
+    """A decoded view over snapshot bytes (a memory-mapped file or any other buffer)."""
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise SnapshotError("snapshot is truncated")
+        magic, version, table_count, built_at, checksum, length = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise SnapshotError("not a Lotto Max snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+        payload = view[HEADER.size:HEADER.size + length]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            raise SnapshotError("snapshot checksum mismatch")
+        self.buffer = buffer
+        self.version = version
+        self.built_at = built_at
+        self.arrays = {}  # table name -> (k, numbers memoryview, counts memoryview or tuple)
+        offset = 0
+        for _ in range(table_count):
+            table_id, k, _, n = SECTION.unpack_from(payload, offset)
+            offset += SECTION.size
+            numbers = payload[offset:offset + n * k]
+            offset += n * k
+            offset += -offset % 4
+            if sys.byteorder == "little":
+                counts = payload[offset:offset + 4 * n].cast("I")  # read in place, no copy
+            else:
+                counts = struct.unpack_from(f"<{n}I", payload, offset)
+            offset += 4 * n
+            self.arrays[TABLE_NAMES[table_id]] = (k, numbers, counts)
+
+    def table(self, name):
+        """Returns a table in the same shape the scraper's get_* methods return it."""
+        k, numbers, counts = self.arrays[name]
+        if name == "number_frequency_table":
+            return dict(zip(numbers.tolist(), counts))
+        flat = numbers.tolist()
+        return [Combination(tuple(flat[i * k:i * k + k]), count) for i, count in enumerate(counts)]
+
+    @property
+    def tables(self):
+        return LottoMaxTables(*(self.table(name) for name in TABLE_NAMES))
+
+    def is_stale(self, now=None):
+        """True when a draw has taken place since the snapshot's data was fetched."""
+        built_at = datetime.datetime.fromtimestamp(self.built_at, datetime.timezone.utc)
+        return built_at < most_recent_draw(now)
+
+def open_snapshot(path=DEFAULT_SNAPSHOT_PATH):
+    """Memory-maps a snapshot file and decodes its header and tables."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SnapshotError("snapshot is empty")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return Snapshot(mapped)
+
+def build_snapshot(path=DEFAULT_SNAPSHOT_PATH, scraper=None):
+    """Scrapes every statistics table and writes it to a snapshot file."""
+    if scraper is None:
+        from lotto_max_cache import ResponseCache
+        from lotto_max_scraper import LottoMaxScraper
+        scraper = LottoMaxScraper(cache=ResponseCache())
+    started = time.time()
+    tables = scraper.fetch_all()
+    write_snapshot(path, tables, fetched_at(scraper, started))
+    return tables
+
+def fetched_at(scraper, started):
+    """Returns when the scraper's tables were fetched: the oldest cached page it used, or started."""
+    if scraper.cache is None:
+        return started
+    entries = (scraper.cache.lookup(f"{scraper.base_url}{endpoint}") for endpoint in scraper.endpoints.values())
+    return min([started] + [entry["fetched_at"] for entry in entries if entry is not None])
+
+def load_tables(path=DEFAULT_SNAPSHOT_PATH, scraper=None):
+    """Returns the statistics tables, preferring a fresh snapshot over live scraping."""
+    try:
+        snapshot = open_snapshot(path)
+        if not snapshot.is_stale():
+            return snapshot.tables
+    except (OSError, SnapshotError):
+        pass
+    # Missing, unreadable or out of date: scrape, and leave a snapshot for the next start
+    return build_snapshot(path, scraper)
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "info"
+    path = argv[2] if len(argv) > 2 else DEFAULT_SNAPSHOT_PATH
+    if command == "build":
+        start = time.perf_counter()
+        build_snapshot(path)
+        print(f"Built {path} ({os.path.getsize(path)} bytes) in {time.perf_counter() - start:.2f} s")
+    elif command == "info":
+        start = time.perf_counter()
+        snapshot = open_snapshot(path)
+        tables = snapshot.tables
+        elapsed = time.perf_counter() - start
+        built_at = datetime.datetime.fromtimestamp(snapshot.built_at, datetime.timezone.utc)
+        print(f"{path}: version {snapshot.version}, data fetched {built_at:%Y-%m-%d %H:%M} UTC"
+              f"{' (stale)' if snapshot.is_stale() else ''}, loaded in {elapsed * 1000:.2f} ms")
+        for name in TABLE_NAMES:
+            print(f"  {name}: {len(getattr(tables, name))} entries")
+    else:
+        print(f"Unknown command {command!r}; expected 'build' or 'info'.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,154 @@
+# Lazily loaded statistics shared by the generators.
+# Importing a generator used to scrape all six statistics pages at module level. Generators
+# now hold a StatisticsProvider instead: creating one does no I/O, each table is loaded the
+# first time it is used (from the compiled snapshot when it is fresh, otherwise with one
+# concurrent fetch of every page, which also rewrites the snapshot) and is then kept for the
+# life of the process. get_statistics() returns the provider shared by every strategy in
+# the process.
+
+#   stats = get_statistics()
+#   stats.warm_up()          # optional: load everything now rather than on first use
+#   stats.most_common_pairs  # list of Combination
+#   stats.refresh()          # re-scrape after a draw
+
+import threading
+import time
+from lotto_max_bitmask import CombinationIndex, combination_masks
+from lotto_max_parser import LottoMaxTables
+from lotto_max_snapshot import DEFAULT_SNAPSHOT_PATH, SnapshotError, build_snapshot, open_snapshot
+
+TABLE_NAMES = LottoMaxTables._fields
+
+class StatisticsProvider:
+    def __init__(self, snapshot_path=DEFAULT_SNAPSHOT_PATH, scraper=None, tables=None, snapshot=None):
+        self.snapshot_path = snapshot_path
+        self.scraper = scraper  # used when the snapshot is missing or stale; None for the default
+        self.lock = threading.RLock()
+        self.loaded = {}  # table name -> table, filled on first access
+        self.derived = {}  # (kind, table name or parameter) -> structure built from the tables, see numbers()/masks()/index()
+        self.snapshot = snapshot  # an already open Snapshot (e.g. in shared memory) is used as is
+        self.fetched_at = None if snapshot is None else snapshot.built_at  # unix time of the tables' data, None if unknown
+        self.generation = 0  # incremented by every refresh(), so callers can drop derived data
+        self.load_seconds = 0.0  # total time spent loading tables
+        if tables is not None:
+            self.loaded.update(tables._asdict())
+
+    def _open_snapshot(self):
+        if self.snapshot is None:
+            try:
+                snapshot = open_snapshot(self.snapshot_path)
+            except (OSError, SnapshotError):
+                return None
+            if snapshot.is_stale():
+                return None
+            self.snapshot = snapshot
+            self.fetched_at = snapshot.built_at
+        return self.snapshot
+
+    def _scrape(self):
+        tables = build_snapshot(self.snapshot_path, self.scraper)
+        self.snapshot = None  # reopen the rewritten file on next use
+        try:
+            self.fetched_at = open_snapshot(self.snapshot_path).built_at
+        except (OSError, SnapshotError):
+            self.fetched_at = None
+        self.loaded = tables._asdict()  # swapped in one step, readers never see a mix
+        self.derived = {}
+
+    def table(self, name):
+        """Returns one statistics table, loading it on first access."""
+        try:
+            return self.loaded[name]
+        except KeyError:
+            pass
+        with self.lock:
+            if name not in self.loaded:
+                start = time.perf_counter()
+                snapshot = self._open_snapshot()
+                if snapshot is not None:
+                    self.loaded[name] = snapshot.table(name)
+                else:
+                    self._scrape()
+                self.load_seconds += time.perf_counter() - start
+            return self.loaded[name]
+
+    def _derived(self, kind, name, build):
+        key = (kind, name)
+        try:
+            return self.derived[key]
+        except KeyError:
+            value = build(self.table(name))
+            self.derived[key] = value
+            return value
+
+    def numbers(self, name):
+        """Returns a combination table as plain number tuples, for strategies that ignore frequencies."""
+        return self._derived("numbers", name, lambda table: [combination.numbers for combination in table])
+
+    def masks(self, name):
+        """Returns a combination table as CombinationMasks, for the bitmask generation path."""
+        return self._derived("masks", name, combination_masks)
+
+    def index(self, name):
+        """Returns a CombinationIndex over a combination table, for conflict-free selection."""
+        return self._derived("index", name, lambda table: CombinationIndex(self.masks(name)))
+
+    @property
+    def frequency_table(self):
+        return self.table("number_frequency_table")
+
+    @property
+    def most_common_pairs(self):
+        return self.table("most_common_pairs")
+
+    @property
+    def most_common_consecutive_pairs(self):
+        return self.table("most_common_consecutive_pairs")
+
+    @property
+    def most_common_triplets(self):
+        return self.table("most_common_triplets")
+
+    @property
+    def most_common_consecutive_triplets(self):
+        return self.table("most_common_consecutive_triplets")
+
+    @property
+    def most_common_four_numbers(self):
+        return self.table("most_common_four_numbers")
+
+    @property
+    def tables(self):
+        return LottoMaxTables(*(self.table(name) for name in TABLE_NAMES))
+
+    def is_loaded(self, name=None):
+        """True if the given table (or, with no name, every table) is already in memory."""
+        if name is None:
+            return all(name in self.loaded for name in TABLE_NAMES)
+        return name in self.loaded
+
+    def warm_up(self):
+        """Loads every table now instead of on first use."""
+        for name in TABLE_NAMES:
+            self.table(name)
+        return self
+
+    def refresh(self):
+        """Re-scrapes every table (rewriting the snapshot) and replaces the loaded ones."""
+        with self.lock:
+            start = time.perf_counter()
+            self._scrape()
+            self.generation += 1
+            self.load_seconds += time.perf_counter() - start
+        return self
+
+_shared_provider = None
+_shared_lock = threading.Lock()
+
+def get_statistics():
+    """Returns the StatisticsProvider shared by every generator in this process."""
+    global _shared_provider
+    with _shared_lock:
+        if _shared_provider is None:
+            _shared_provider = StatisticsProvider()
+        return _shared_provider
@@ -0,0 +1,185 @@
+# Parameter sweep over the v9 damping factor and table weights.
+# A sweep backtests every point of a grid (damping factors x weight schedules, a weight
+# schedule being the most picks per ticket from each of the five combination tables, 5-4-3-2-1
+# in generator_v9_good.py) with the batch generator, over the same replayed history as
+# lotto_max_backtest.py. The history is cut into blocks of draws and each block is a task
+# for a process pool. A task replays its block once and, for each draw, runs every
+# point against the same statistics provider, so the tables, the combination arrays and the
+# alias table for each damping factor are built once per draw rather than once per point.
+# Every finished (block, point) histogram is appended to a JSONL file as soon as its task
+# completes; rerunning the same command skips what the file already holds, so an
+# interrupted sweep resumes where it stopped and new grid points only cost their own runs.
+
+#   python lotto_max_sweep.py results.jsonl [damping_factors] [weight_schedules] [tickets_per_draw] [workers]
+#   python lotto_max_sweep.py sweep.jsonl 0.2,0.8,0.95,1 5-4-3-2-1,1-1-1-1-1,0-0-0-0-0 20
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import sys
+import time
+import numpy as np
+from lotto_max_backtest import MIN_HISTORY, Backtest, draw_histogram
+from lotto_max_batch import DEFAULT_WEIGHTS, generate_batch
+from lotto_max_history import DrawHistory
+
+BLOCK_SIZE = 64  # draws per task
+
+SweepPoint = namedtuple("SweepPoint", ["damping_factor", "weights"])
+SweepResult = namedtuple("SweepResult", ["damping_factor", "weights", "draws", "tickets", "histogram"])
+
+def grid(damping_factors, weight_schedules=(DEFAULT_WEIGHTS,)):
+    """Returns every (damping factor, weight schedule) pair as SweepPoints."""
+    # Both end up in the seed entropy of each point (point_seed), which must not be negative
+    for damping_factor in damping_factors:
+        if not 0 <= damping_factor <= 1:
+            raise ValueError(f"a damping factor is between 0 and 1, not {damping_factor}")
+    for weights in weight_schedules:
+        if any(weight < 0 for weight in weights):
+            raise ValueError(f"weights are not negative: {'-'.join(str(weight) for weight in weights)}")
+    return [SweepPoint(float(damping_factor), tuple(weights)) for damping_factor in damping_factors for weights in weight_schedules]
+
+def point_seed(seed, index, point):
+    """Returns the seed entropy for one point at one draw; it depends on the values, not on the grid."""
+    return [seed, index, round(point.damping_factor * 1_000_000), *point.weights]
+
+def run_block(draws, start, stop, points, tickets_per_draw, seed, min_history=MIN_HISTORY):
+    """Backtests every point over draws[start:stop] and returns {point: (8, 2) histogram}."""
+    histograms = {point: np.zeros((8, 2), dtype=np.int64) for point in points}
+    for i, draw, provider in Backtest(draws, tickets_per_draw, min_history, seed).replay(start, stop):
+        for point in points:
+            tickets = generate_batch(tickets_per_draw, point.damping_factor, seed=point_seed(seed, i, point),
+                                     stats=provider, weights=point.weights)
+            histograms[point] += draw_histogram(tickets, draw)
+    return histograms
+
+class Sweep:
+    def __init__(self, path, draws, tickets_per_draw=20, seed=2024, min_history=MIN_HISTORY, block_size=BLOCK_SIZE):
+        self.path = path
+        self.draws = list(draws)  # oldest first
+        self.tickets_per_draw = tickets_per_draw
+        self.seed = seed
+        self.min_history = min_history
+        self.block_size = block_size
+        self.cut_short = False  # the file ends in a partial line, which the next record must not extend
+
+    def blocks(self):
+        """Returns the (start, stop) draw index ranges of the tasks."""
+        return [
+            (start, min(start + self.block_size, len(self.draws)))
+            for start in range(self.min_history, len(self.draws), self.block_size)
+        ]
+
+    def record(self, start, stop, point, histogram):
+        return {
+            "start": start, "stop": stop,
+            "first_draw": self.draws[start].date.isoformat(), "last_draw": self.draws[stop - 1].date.isoformat(),
+            "damping_factor": point.damping_factor, "weights": list(point.weights),
+            "tickets_per_draw": self.tickets_per_draw, "seed": self.seed,
+            "histogram": histogram.tolist(),
+        }
+
+    def load(self):
+        """Returns {(start, stop, point): histogram} for the results already in the file that match this sweep."""
+        done = {}
+        try:
+            f = open(self.path)
+        except FileNotFoundError:
+            return done
+        with f:
+            for line in f:
+                self.cut_short = not line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short when a sweep was interrupted
+                start, stop = record["start"], record["stop"]
+                if (record["tickets_per_draw"] != self.tickets_per_draw or record["seed"] != self.seed
+                        or stop > len(self.draws)
+                        or record["first_draw"] != self.draws[start].date.isoformat()
+                        or record["last_draw"] != self.draws[stop - 1].date.isoformat()):
+                    continue  # another configuration or another history
+                point = SweepPoint(record["damping_factor"], tuple(record["weights"]))
+                done[start, stop, point] = np.array(record["histogram"], dtype=np.int64)
+        return done
+
+    def run(self, points, workers=None, mp_context=None, progress=None):
+        """Runs the points not already in the file and returns a SweepResult per point."""
+        done = self.load()
+        tasks = []
+        for start, stop in self.blocks():
+            todo = [point for point in points if (start, stop, point) not in done]
+            if todo:
+                tasks.append((start, stop, todo))
+        if tasks:
+            with open(self.path, "a") as f, ProcessPoolExecutor(workers, mp_context=mp_context) as executor:
+                if self.cut_short:
+                    f.write("\n")
+                futures = {
+                    executor.submit(run_block, self.draws[:stop], start, stop, todo,
+                                    self.tickets_per_draw, self.seed, self.min_history): (start, stop)
+                    for start, stop, todo in tasks
+                }
+                for finished, future in enumerate(as_completed(futures), 1):
+                    start, stop = futures[future]
+                    for point, histogram in future.result().items():
+                        f.write(json.dumps(self.record(start, stop, point, histogram)) + "\n")
+                        done[start, stop, point] = histogram
+                    f.flush()
+                    if progress:
+                        progress(finished, len(tasks))
+        return self.results(points, done)
+
+    def results(self, points, done):
+        results = []
+        for point in points:
+            blocks = [(start, stop) for start, stop in self.blocks() if (start, stop, point) in done]
+            draws = sum(stop - start for start, stop in blocks)
+            histogram = sum((done[start, stop, point] for start, stop in blocks), np.zeros((8, 2), dtype=np.int64))
+            results.append(SweepResult(point.damping_factor, point.weights, draws, draws * self.tickets_per_draw, histogram))
+        return results
+
+def format_result(result):
+    """Returns one report line: mean matches per ticket with its standard error, and the share matching 3+ to 5+."""
+    per_match = result.histogram.sum(axis=1)
+    tickets = max(result.tickets, 1)
+    mean = (per_match * np.arange(8)).sum() / tickets
+    error = np.sqrt(max((per_match * np.arange(8) ** 2).sum() / tickets - mean ** 2, 0) / tickets)
+    shares = "  ".join(f"{m}+:{per_match[m:].sum() / tickets:.5f}" for m in range(3, 6))
+    weights = "-".join(str(weight) for weight in result.weights)
+    return f"{result.damping_factor:>6g}  {weights:<10}{result.tickets:>9}  mean {mean:.4f} +/- {error:.4f}  {shares}"
+
+def parse_weights(text):
+    weights = tuple(int(weight) for weight in text.split("-"))
+    if len(weights) != len(DEFAULT_WEIGHTS):
+        raise ValueError(f"a weight schedule has {len(DEFAULT_WEIGHTS)} values, e.g. 5-4-3-2-1")
+    return weights
+
+def main(argv):
+    if len(argv) < 2:
+        print("Usage: python lotto_max_sweep.py results.jsonl [damping_factors] [weight_schedules] [tickets_per_draw] [workers]")
+        return 1
+    path = argv[1]
+    try:
+        damping_factors = [float(d) for d in argv[2].split(",")] if len(argv) > 2 else [0.2, 0.5, 0.8, 1.0]
+        weight_schedules = [parse_weights(w) for w in argv[3].split(",")] if len(argv) > 3 else [DEFAULT_WEIGHTS]
+        tickets_per_draw = int(argv[4]) if len(argv) > 4 else 20
+        workers = int(argv[5]) if len(argv) > 5 else None
+        points = grid(damping_factors, weight_schedules)
+    except ValueError as error:
+        print(f"Invalid sweep arguments: {error}")
+        return 1
+    history = DrawHistory()
+    if len(history) <= MIN_HISTORY:
+        print(f"Not enough draws in {history.path}; run 'python lotto_max_history.py update' first.")
+        return 1
+    start = time.perf_counter()
+    progress = lambda finished, total: print(f"\r{finished}/{total} blocks", end="", flush=True)
+    results = Sweep(path, history, tickets_per_draw).run(points, workers, progress=progress)
+    print(f"\n{len(points)} points, {time.perf_counter() - start:.1f} s; results in {path}")
+    for result in sorted(results, key=lambda result: -(result.histogram.sum(axis=1) * np.arange(8)).sum()):
+        print(format_result(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,63 @@
+# Duplicate suppression for large ticket runs.
+# Nothing stops a generator from producing the same 7 numbers twice; v4, which takes the
+# top combinations of each table, does it all the time. TicketSet remembers every ticket
+# of a run as one bit per colex rank (lotto_max_rank.py), so a run of any length uses at
+# most 12.5 MB, and checking or adding a ticket is one bit test and one bit set, whether
+# it is the first ticket or the fifty-millionth. The bitmap is allocated zeroed, so the
+# operating system only backs the pages a run actually touches.
+# Tickets are added a chunk at a time: a chunk's new tickets are the ones whose bit is
+# still clear, keeping only the first copy of a ticket the chunk holds more than once.
+
+#   seen = TicketSet()
+#   keep = seen.add(rank_tickets(tickets)); tickets = tickets[keep]
+#   seen.added, seen.rejected
+#   python lotto_max_cli.py -n 1000000 --unique --format packed -o tickets.lmxp
+
+import numpy as np
+from lotto_max_rank import TICKET_COUNT, rank
+
+class TicketSet:
+    """The tickets seen so far in a run, one bit per possible ticket."""
+
+    def __init__(self):
+        self.bits = np.zeros(-(-TICKET_COUNT // 8), dtype=np.uint8)
+        self.added = 0  # distinct tickets kept
+        self.rejected = 0  # tickets dropped as copies of one already kept
+
+    def __len__(self):
+        return self.added
+
+    def __contains__(self, numbers):
+        ticket_rank = rank(numbers)
+        return bool(self.bits[ticket_rank >> 3] >> (ticket_rank & 7) & 1)
+
+    def add(self, ranks, limit=None):
+        """Adds the new tickets among ranks (at most limit of them) and returns a mask of the ones added."""
+        ranks = np.asarray(ranks, dtype=np.int64)
+        if not len(ranks):
+            return np.zeros(0, dtype=bool)
+        # One sort of (rank, position) keys orders the chunk by ticket with the copies of a
+        # ticket in chunk order, so the first copy of each is the one that can be new
+        keys = np.sort(ranks << 32 | np.arange(len(ranks)))
+        sorted_ranks = keys >> 32
+        positions = keys & 0xFFFFFFFF
+        first_copy = np.diff(sorted_ranks, prepend=-1) != 0
+        unseen = (self.bits[sorted_ranks >> 3] >> (sorted_ranks & 7) & 1) == 0
+        new = np.zeros(len(ranks), dtype=bool)
+        new[positions] = first_copy & unseen
+        considered = len(ranks)
+        if limit is not None:
+            kept = np.flatnonzero(new)
+            if len(kept) >= limit:
+                # Enough new tickets once the limit-th is in; what follows is not looked at
+                considered = kept[limit - 1] + 1 if limit else 0
+                new[considered:] = False
+        added = sorted_ranks[new[positions]]  # ascending
+        if len(added):
+            # Several tickets can share a byte of the bitmap: combine their bits first
+            byte_index = added >> 3
+            first = np.flatnonzero(np.diff(byte_index, prepend=-1))
+            self.bits[byte_index[first]] |= np.bitwise_or.reduceat((1 << (added & 7)).astype(np.uint8), first)
+        self.added += len(added)
+        self.rejected += considered - len(added)
+        return new
@@ -0,0 +1,213 @@
+# Coverage-optimised portfolios ("wheels").
+# Tickets generated one at a time overlap: a thousand v9 tickets hold 21,000 pairs but cover
+# only part of the 1,225 possible ones, and far fewer of the 19,600 triplets than a thousand
+# tickets could. build_wheel() picks the tickets of a portfolio one after the other, each
+# time the ticket that covers the most pairs and/or triplets no earlier ticket covered: the
+# best of a few hundred random candidates, then improved by swapping one number at a time
+# for as long as a swap covers more (a greedy build with a local search per ticket). Once
+# every target is covered (about 80 tickets for every pair, under 1,000 for every triplet),
+# coverage starts over, so the rest of the portfolio covers everything a second time.
+# What is still uncovered is kept as masks (bit n for number n, as in lotto_max_bitmask.py):
+# bit c of pairs[a] is set while {a, c} is uncovered, bit c of triplets[a, b] while
+# {a, b, c} is, so a candidate's gain is a popcount of the masks of its numbers and pairs
+# ANDed with its own mask, for hundreds of candidates at once. With coverage_weights(), a
+# pair or triplet counts by the damped frequencies of its numbers, more when it is in the
+# scraped tables of most common pairs and triplets, and the gain adds up weights instead.
+
+#   wheel = build_wheel(1000, seed=1)                                  # (1000, 7) uint8 tickets
+#   wheel = build_wheel(1000, weights=coverage_weights(get_statistics()), target="triplets")
+#   coverage(wheel).pairs, coverage(wheel).triplets                   # fractions covered
+#   python lotto_max_wheel.py -n 1000 --weighted --seed 1 -o wheel.csv
+
+from collections import namedtuple
+import argparse
+import itertools
+import sys
+import time
+import numpy as np
+from lotto_max_bitmask import ALL_NUMBERS
+from lotto_max_sampler import damped_weights
+
+TARGETS = ("pairs", "triplets", "both")
+CANDIDATES = 256  # random tickets tried for each pick before the local search
+MAX_SWAPS = 50  # improving swaps at most per ticket
+# The pairs and triplets of positions of a 7-number ticket, and its ordered pairs of positions
+PAIR_POSITIONS = np.array(list(itertools.combinations(range(7), 2))).T
+TRIPLET_POSITIONS = np.array(list(itertools.combinations(range(7), 3))).T
+ORDERED_POSITIONS = np.array(list(itertools.permutations(range(7), 2))).T
+NUMBER_BITS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+PAIR_TABLES = ("most_common_pairs", "most_common_consecutive_pairs")
+TRIPLET_TABLES = ("most_common_triplets", "most_common_consecutive_triplets")
+
+# pairs and triplets are the fractions covered, by weight when the portfolio was weighted
+Coverage = namedtuple("Coverage", ["pairs", "triplets", "tickets"])
+# pairs[a, b] and triplets[a, b, c] are the weights of {a, b} and {a, b, c}, in any order
+CoverageWeights = namedtuple("CoverageWeights", ["pairs", "triplets"])
+
+def coverage_weights(stats, damping_factor=0.8):
+    """Weights each pair and triplet by its numbers' damped frequencies, up to doubled when a combination table lists it."""
+    numbers, number_weights = damped_weights(stats.frequency_table, damping_factor)
+    weights = np.zeros(51)
+    weights[numbers] = number_weights
+    weights /= weights[1:].mean()
+    pairs = np.multiply.outer(weights, weights)
+    triplets = np.multiply.outer(pairs, weights)
+    for names, table_weights in ((PAIR_TABLES, pairs), (TRIPLET_TABLES, triplets)):
+        for name in names:
+            table = stats.table(name)
+            if not table:
+                continue
+            top = max(combination.frequency for combination in table)
+            for combination in table:
+                boost = 1 + combination.frequency / top
+                for order in itertools.permutations(combination.numbers):
+                    table_weights[order] *= boost
+    return CoverageWeights(pairs, triplets)
+
+def ticket_masks(tickets):
+    return np.bitwise_or.reduce(NUMBER_BITS[tickets], axis=1)
+
+def mask_bits(masks):
+    """Returns masks as booleans, with a last axis of 51 for the numbers 0-50."""
+    return (masks[..., None] & NUMBER_BITS[:51]) != 0
+
+class CoverageState:
+    """The pairs and triplets no ticket covers yet, as masks of the numbers completing them."""
+
+    def __init__(self, weights=None):
+        self.weights = weights
+        rows = np.full(51, ALL_NUMBERS, dtype=np.uint64) & ~NUMBER_BITS[:51]
+        rows[0] = 0
+        self.pairs = rows.copy()  # bit c of pairs[a]: {a, c} uncovered
+        self.triplets = rows[:, None] & rows[None, :]  # bit c of triplets[a, b]: {a, b, c} uncovered
+        self.triplets[np.arange(51), np.arange(51)] = 0
+        self.totals = self.uncovered()
+
+    def uncovered(self):
+        """Returns the (pairs, triplets) still uncovered: counts, or weights when weighted."""
+        if self.weights is None:
+            return (int(np.bitwise_count(self.pairs).sum()) // 2, int(np.bitwise_count(self.triplets).sum()) // 6)
+        # Every pair is held twice (from each end), every triplet six times
+        pairs = (self.weights.pairs * mask_bits(self.pairs)).sum() / 2
+        triplets = (self.weights.triplets * mask_bits(self.triplets)).sum() / 6
+        return float(pairs), float(triplets)
+
+    def coverage(self, tickets=0):
+        pairs, triplets = self.uncovered()
+        return Coverage(1 - pairs / self.totals[0], 1 - triplets / self.totals[1], tickets)
+
+    def gains(self, tickets, masks=None, target="both"):
+        """Returns the share of the uncovered pairs and/or triplets that each (n, 7) ticket would cover."""
+        masks = ticket_masks(tickets) if masks is None else masks
+        gain = np.zeros(len(tickets))
+        if target != "triplets":
+            if self.weights is None:
+                # Each new pair is counted from both of its numbers
+                gain += np.bitwise_count(self.pairs[tickets] & masks[:, None]).sum(axis=1) / (2 * self.totals[0])
+            else:
+                first, second = tickets[:, PAIR_POSITIONS[0]], tickets[:, PAIR_POSITIONS[1]]
+                new = (self.pairs[first] >> second.astype(np.uint64)) & np.uint64(1)
+                gain += (self.weights.pairs[first, second] * new).sum(axis=1) / self.totals[0]
+        if target != "pairs":
+            first, second = tickets[:, PAIR_POSITIONS[0]], tickets[:, PAIR_POSITIONS[1]]
+            if self.weights is None:
+                # Each new triplet is counted from its three pairs
+                gain += np.bitwise_count(self.triplets[first, second] & masks[:, None]).sum(axis=1) / (3 * self.totals[1])
+            else:
+                first, second, third = (tickets[:, positions] for positions in TRIPLET_POSITIONS)
+                new = (self.triplets[first, second] >> third.astype(np.uint64)) & np.uint64(1)
+                gain += (self.weights.triplets[first, second, third] * new).sum(axis=1) / self.totals[1]
+        return gain
+
+    def cover(self, tickets):
+        """Marks every pair and triplet of the (n, 7) tickets as covered."""
+        tickets = np.asarray(tickets, dtype=np.intp).reshape(-1, 7)
+        cleared = ~ticket_masks(tickets)
+        np.bitwise_and.at(self.pairs, tickets.ravel(), np.repeat(cleared, 7))
+        ordered = (tickets[:, ORDERED_POSITIONS[0]].ravel(), tickets[:, ORDERED_POSITIONS[1]].ravel())
+        np.bitwise_and.at(self.triplets, ordered, np.repeat(cleared, ORDERED_POSITIONS.shape[1]))
+
+def random_tickets(count, rng):
+    """Returns count uniformly random tickets as a sorted (count, 7) array of numbers."""
+    return np.sort(rng.random((count, 50)).argpartition(7, axis=1)[:, :7] + 1, axis=1)
+
+def improve(state, ticket, gain, target):
+    """Swaps one number of the ticket for another while that covers more; returns the ticket and its gain."""
+    positions = np.repeat(np.arange(7), 43)
+    for _ in range(MAX_SWAPS):
+        others = np.setdiff1d(np.arange(1, 51), ticket)
+        neighbours = np.tile(ticket, (len(positions), 1))
+        neighbours[np.arange(len(positions)), positions] = np.tile(others, 7)
+        neighbour_gains = state.gains(neighbours, target=target)
+        best = int(np.argmax(neighbour_gains))
+        if neighbour_gains[best] <= gain * (1 + 1e-12):
+            break
+        ticket, gain = np.sort(neighbours[best]), neighbour_gains[best]
+    return ticket, gain
+
+def build_wheel(count, weights=None, target="both", seed=None, candidates=CANDIDATES):
+    """Picks count tickets that cover as many pairs and/or triplets as possible; returns a (count, 7) uint8 array."""
+    if target not in TARGETS:
+        raise ValueError(f"target is one of {', '.join(TARGETS)}")
+    rng = np.random.default_rng(seed)
+    state = CoverageState(weights)
+    wheel = np.zeros((count, 7), dtype=np.uint8)
+    for i in range(count):
+        pool = random_tickets(candidates, rng)
+        pool_gains = state.gains(pool, target=target)
+        best = int(np.argmax(pool_gains))
+        ticket, gain = improve(state, pool[best], pool_gains[best], target)
+        if gain <= 0:
+            # Everything is covered: start a new layer of coverage
+            state = CoverageState(weights)
+            ticket, _ = improve(state, pool[best], state.gains(pool[best:best + 1], target=target)[0], target)
+        state.cover(ticket)
+        wheel[i] = ticket
+    return wheel
+
+def coverage(tickets, weights=None):
+    """Returns the Coverage of the pairs and triplets by a set of tickets."""
+    state = CoverageState(weights)
+    tickets = np.asarray(tickets)
+    state.cover(tickets)
+    return state.coverage(len(tickets))
+
+def format_coverage(name, result):
+    return f"{name:<16}{result.tickets:>8}{result.pairs:>10.1%}{result.triplets:>11.1%}"
+
+def parse_arguments(argv):
+    from lotto_max_cli import FORMATS, damping_argument
+
+    parser = argparse.ArgumentParser(description="Build a portfolio of Lotto Max tickets covering as many pairs and triplets as possible.")
+    parser.add_argument("-n", "--count", type=int, default=100, help="number of tickets (default 100)")
+    parser.add_argument("-t", "--target", choices=TARGETS, default="both", help="what to cover (default both)")
+    parser.add_argument("-w", "--weighted", action="store_true", help="weight pairs and triplets by the statistics tables")
+    parser.add_argument("-d", "--damping", type=damping_argument, default=0.8, help="damping factor of the weights, 0 to 1 (default 0.8)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("-f", "--format", choices=sorted(FORMATS), default="csv", help="output format (default csv)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default stdout)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from lotto_max_cli import write_tickets
+    from lotto_max_stats import get_statistics
+
+    args = parse_arguments(argv)
+    weights = coverage_weights(get_statistics(), args.damping) if args.weighted else None
+    start = time.perf_counter()
+    wheel = build_wheel(args.count, weights, args.target, args.seed)
+    elapsed = time.perf_counter() - start
+    if args.output == "-":
+        write_tickets(sys.stdout.buffer, [wheel], args.format)
+        sys.stdout.flush()
+    else:
+        with open(args.output, "wb") as output:
+            write_tickets(output, [wheel], args.format)
+    baseline = random_tickets(args.count, np.random.default_rng(args.seed))
+    print(f"{'':<16}{'tickets':>8}{'pairs':>10}{'triplets':>11}   ({'weighted' if weights else 'counted'} coverage)", file=sys.stderr)
+    print(format_coverage("wheel", coverage(wheel, weights)) + f"   built in {elapsed:.1f} s", file=sys.stderr)
+    print(format_coverage("random tickets", coverage(baseline, weights)), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())